@@ -0,0 +1,233 @@
+"""
+Пропускная способность и задержки клиентов API и маршрутов Flask на заглушках
+
+Поднимает в процессе заглушки Telemost и Telegram (задержка, доля ошибок и
+ответов 429 настраиваются) и измеряет:
+- методы TelemostAPI (conferences, cohosts, default-settings);
+- TelegramBot.send_bulk_invitations (один бот и пул ботов);
+- маршруты Flask через test client (без сетевого стека сервера).
+
+    python -m benchmarks.bench_clients --latency 0.02 --concurrency 16
+
+Сравнение с сохраненным прогоном (код выхода 1 при ухудшении больше --threshold %):
+
+    python -m benchmarks.bench_clients --output baseline.json
+    python -m benchmarks.bench_clients --compare baseline.json
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List
+
+import requests
+
+from benchmarks.report import RESULTS_DIR, compare_results, save_results, summarize
+from benchmarks.stubs import StubTelegramServer, StubTelemostServer
+
+BOT_TOKENS = ['100001:bench-main', '100002:bench-extra', '100003:bench-extra']
+
+
+def run_concurrent(operation: Callable[[int], Any], iterations: int, concurrency: int) -> Dict[str, Any]:
+    """Выполнить operation(i) iterations раз в concurrency потоках
+
+    Исключение в operation считается ошибкой и не попадает в задержки.
+    """
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(iterations))
+
+    def worker():
+        local: List[float] = []
+        local_errors = 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            started = time.perf_counter()
+            try:
+                operation(i)
+                local.append(time.perf_counter() - started)
+            except Exception:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def _session(pool_size: int) -> requests.Session:
+    # Через src.transport — прогон можно записать в кассету (HTTP_CASSETTE_MODE=record)
+    from src.transport import build_session
+    return build_session(pool_maxsize=pool_size)
+
+
+def bench_telemost(args, telemost_stub: StubTelemostServer) -> Dict[str, Any]:
+    """Методы TelemostAPI поверх заглушки"""
+    from src.telemost_api import TelemostAPI
+
+    client = TelemostAPI(oauth_token='bench-token', session=_session(args.concurrency))
+    # Встречи для чтения создаются прямо в заглушке — без ее ошибок и задержек
+    seed = [telemost_stub.create_conference({})['id'] for _ in range(args.concurrency)]
+
+    def meeting(i: int) -> str:
+        return seed[i % len(seed)]
+
+    operations = {
+        'create_meeting': lambda i: client.create_meeting(waiting_room_level='PUBLIC'),
+        'get_meeting': lambda i: client.get_meeting(meeting(i)),
+        'list_meetings': lambda i: client.list_meetings(limit=50),
+        'update_meeting': lambda i: client.update_meeting(meeting(i), waiting_room_level='ORGANIZATION'),
+        'add_meeting_cohost': lambda i: client.add_meeting_cohost(meeting(i), f"user{i}@example.com"),
+        'get_meeting_cohosts': lambda i: client.get_meeting_cohosts(meeting(i)),
+        'get_default_settings': lambda i: client.get_default_settings(),
+    }
+    return {name: run_concurrent(op, args.iterations, args.concurrency) for name, op in operations.items()}
+
+
+def bench_bulk_send(args, telegram_stub: StubTelegramServer) -> Dict[str, Any]:
+    """Массовая рассылка одним ботом и пулом ботов"""
+    from src.storage import SentMessageStore
+    from src.telegram_bot import TelegramBot
+
+    meeting = {'id': 'bench', 'join_url': 'https://telemost.yandex.ru/j/bench'}
+    contacts = [{'id': 1000 + i, 'name': f'Contact {i}'} for i in range(args.contacts)]
+    results = {}
+
+    for name, tokens in (('single_bot', BOT_TOKENS[:1]), ('bot_pool', BOT_TOKENS)):
+        bot = TelegramBot(
+            bot_token=tokens[0],
+            bot_tokens=tokens[1:],
+            rate_limit=args.telegram_rate,
+            message_store=SentMessageStore(os.path.join(args.tmp, f'{name}.db')),
+            session=_session(len(tokens) * 2)
+        )
+        sent_before = len(telegram_stub.sent)
+        started = time.perf_counter()
+        result = bot.send_bulk_invitations(contacts, meeting)
+        elapsed = time.perf_counter() - started
+        results[name] = {
+            'contacts': len(contacts),
+            'sent': result['sent_count'],
+            'errors': result['failed_count'],
+            'duration_ms': round(elapsed * 1000, 1),
+            'messages_per_sec': round((len(telegram_stub.sent) - sent_before) / elapsed, 1),
+        }
+    return results
+
+
+def bench_routes(args, telemost_stub: StubTelemostServer) -> Dict[str, Any]:
+    """Маршруты Flask через test client"""
+    from src.main import create_app
+
+    app = create_app()
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client
+
+    created = telemost_stub.create_conference({})
+    send_payload = {
+        'meeting_data': created,
+        'contacts': [{'id': 2000 + i, 'name': f'Contact {i}'} for i in range(5)],
+    }
+
+    def call(method: str, path: str, body: Any = None) -> Callable[[int], None]:
+        def operation(i: int):
+            response = client().open(path, method=method, json=body)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path}: {response.status_code}")
+        return operation
+
+    routes = {
+        'POST /api/meetings': call('POST', '/api/meetings', {'waiting_room_level': 'PUBLIC'}),
+        'GET /api/meetings/<id>': call('GET', f"/api/meetings/{created['id']}"),
+        'GET /api/meetings': call('GET', '/api/meetings'),
+        'POST /api/send-meeting': call('POST', '/api/send-meeting', send_payload),
+        'GET /api/health': call('GET', '/api/health'),
+    }
+    return {name: run_concurrent(op, args.iterations, args.concurrency) for name, op in routes.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suites', default='telemost,bulk_send,routes')
+    parser.add_argument('--iterations', type=int, default=500, help='Вызовов на каждый метод')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--contacts', type=int, default=200, help='Получателей в массовой рассылке')
+    parser.add_argument('--telegram-rate', type=float, default=1000, help='Лимит сообщений в секунду на бота')
+    parser.add_argument('--latency', type=float, default=0.01, help='Задержка заглушек (сек)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Доля ответов 429')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'clients.json'))
+    parser.add_argument('--compare', help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args()
+
+    stub_options = dict(latency=args.latency, error_rate=args.error_rate,
+                        rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    results: Dict[str, Any] = {'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}}
+
+    with StubTelemostServer(**stub_options) as telemost, StubTelegramServer(**stub_options) as telegram, \
+            tempfile.TemporaryDirectory() as tmp:
+        args.tmp = tmp
+        os.environ.update({
+            'TELEMOST_API_URL': f"{telemost.url}/v1/telemost-api",
+            'TELEGRAM_API_URL': telegram.url,
+            'YANDEX_OAUTH_TOKEN': 'bench-token',
+            'YANDEX_OAUTH_TOKENS': '',
+            'TELEGRAM_BOT_TOKEN': BOT_TOKENS[0],
+            'TELEGRAM_BOT_TOKENS': '',
+            'TELEGRAM_RATE_LIMIT': str(args.telegram_rate),
+            'TELEMOST_POOL_MAXSIZE': str(args.concurrency),
+            'BOT_DB_PATH': os.path.join(tmp, 'bot.db'),
+            'WEBAPP_AUTH': '0',
+            'MEETING_RATE_LIMIT_IP': '0',
+            'MEETING_RATE_LIMIT_USER': '0',
+            'LOG_LEVEL': os.getenv('LOG_LEVEL', 'CRITICAL'),
+        })
+        from src.logging_setup import setup_logging
+        setup_logging()
+
+        suites = args.suites.split(',')
+        if 'telemost' in suites:
+            results['telemost'] = bench_telemost(args, telemost)
+        if 'bulk_send' in suites:
+            results['bulk_send'] = bench_bulk_send(args, telegram)
+        if 'routes' in suites:
+            results['routes'] = bench_routes(args, telemost)
+
+    for suite in ('telemost', 'routes'):
+        for name, result in results.get(suite, {}).items():
+            print(f"{suite:9} {name:26} {result['rps']:>9} ops/s  p50 {result['p50_ms']:>8} ms  "
+                  f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}")
+    for name, result in results.get('bulk_send', {}).items():
+        print(f"bulk_send {name:26} {result['messages_per_sec']:>9} msg/s  "
+              f"{result['sent']}/{result['contacts']} sent in {result['duration_ms']} ms")
+
+    save_results(results, args.output)
+
+    if args.compare:
+        regressions = compare_results(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Сериализация JSON: стандартный json и orjson, передача списка встреч как есть
+
+Два набора измерений на больших страницах списка встреч (до 100 встреч
+с названием, описанием, соорганизаторами и трансляцией):
+- codec — разбор тела ответа Telemost и сериализация ответа Flask
+  (json с настройками DefaultJSONProvider против FastJSONProvider на orjson);
+- routes — GET /api/meetings через test client поверх заглушки Telemost:
+  разбор и повторная сериализация (json, orjson) и передача тела без
+  разбора (MEETINGS_PASSTHROUGH=1). Заглушка работает в том же процессе
+  и делит с приложением GIL, поэтому сравнивать стоит режимы между собой,
+  а не абсолютные значения.
+
+    python -m benchmarks.bench_json --pages 10,50,100 --iterations 300
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List
+
+from benchmarks.bench_clients import run_concurrent
+from benchmarks.report import RESULTS_DIR, compare_results, save_results
+from benchmarks.stubs import StubTelemostServer
+
+ROUTE_MODES = {
+    # название: (JSON_BACKEND, MEETINGS_PASSTHROUGH)
+    'json': ('json', '0'),
+    'orjson': ('orjson', '0'),
+    'passthrough': ('orjson', '1'),
+}
+
+
+def make_conference(i: int, text_size: int) -> Dict[str, Any]:
+    """Встреча «тяжелее» ответа create_conference: текст, соорганизаторы, трансляция"""
+    conference_id = str(7000000000 + i)
+    return {
+        'id': conference_id,
+        'join_url': f"https://telemost.yandex.ru/j/{conference_id}",
+        'waiting_room_level': 'ORGANIZATION',
+        'created_at': '2024-07-01T10:00:00Z',
+        'title': f"Планерка команды {i}",
+        'description': ('Повестка: статус задач, блокеры, планы. ' * (text_size // 40 + 1))[:text_size],
+        'cohosts': [{'id': str(c), 'email': f"cohost{c}@example.com"} for c in range(5)],
+        'live_stream': {
+            'access_level': 'PUBLIC',
+            'title': f"Трансляция {i}",
+            'watch_url': f"https://telemost.yandex.ru/live/{conference_id}",
+        },
+    }
+
+
+def time_operation(operation: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    """Среднее время операции в одном потоке (мкс)"""
+    operation()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    return {'mean_us': round((time.perf_counter() - started) / iterations * 1e6, 1)}
+
+
+def bench_codec(args) -> Dict[str, Any]:
+    """Разбор страницы и сериализация ответа Flask"""
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from src import json_provider
+
+    if json_provider.orjson is None:
+        print("orjson is not installed: codec suite compares json with itself")
+    app = Flask(__name__)
+    providers = {'json': DefaultJSONProvider(app)}
+    if json_provider.orjson is not None:
+        providers['orjson'] = json_provider.FastJSONProvider(app)
+
+    results: Dict[str, Any] = {}
+    for page in args.pages:
+        payload = {'conferences': [make_conference(i, args.text_size) for i in range(page)]}
+        body = json.dumps(payload).encode()
+        entry: Dict[str, Any] = {'bytes': len(body)}
+        for name, provider in providers.items():
+            with app.app_context():
+                entry[f'loads_{name}'] = time_operation(lambda: provider.loads(body), args.iterations)
+                entry[f'response_{name}'] = time_operation(lambda: provider.response(payload), args.iterations)
+        results[f'page_{page}'] = entry
+    return results
+
+
+def bench_routes(args, telemost_stub: StubTelemostServer) -> Dict[str, Any]:
+    """GET /api/meetings: разбор и сериализация против передачи тела как есть"""
+    from src import json_provider
+    from src.main import create_app
+
+    for i in range(max(args.pages)):
+        conference = make_conference(i, args.text_size)
+        telemost_stub.conferences[conference['id']] = conference
+
+    results: Dict[str, Any] = {}
+    for mode, (backend, passthrough) in ROUTE_MODES.items():
+        if backend == 'orjson' and json_provider.orjson is None:
+            continue
+        json_provider.use_backend(backend)
+        os.environ['MEETINGS_PASSTHROUGH'] = passthrough
+        app = create_app()
+        local = threading.local()
+
+        def client():
+            if not hasattr(local, 'client'):
+                local.client = app.test_client()
+            return local.client
+
+        def operation(page: int) -> Callable[[int], None]:
+            def call(i: int):
+                response = client().get(f"/api/meetings?limit={page}")
+                if response.status_code != 200 or len(response.get_json()['conferences']) != page:
+                    raise RuntimeError(f"GET /api/meetings: {response.status_code}")
+            return call
+
+        results[mode] = {f'page_{page}': run_concurrent(operation(page), args.iterations, args.concurrency)
+                         for page in args.pages}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suites', default='codec,routes')
+    parser.add_argument('--pages', default='10,50,100', help='Размеры страниц списка встреч (до 100)')
+    parser.add_argument('--text-size', type=int, default=500, help='Длина описания встречи (символов)')
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка заглушки Telemost (сек)')
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'json.json'))
+    parser.add_argument('--compare', help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args()
+    args.pages = [int(page) for page in args.pages.split(',')]
+
+    results: Dict[str, Any] = {'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}}
+    suites = args.suites.split(',')
+    if 'codec' in suites:
+        results['codec'] = bench_codec(args)
+
+    if 'routes' in suites:
+        with StubTelemostServer(latency=args.latency) as telemost, tempfile.TemporaryDirectory() as tmp:
+            os.environ.update({
+                'TELEMOST_API_URL': f"{telemost.url}/v1/telemost-api",
+                'YANDEX_OAUTH_TOKEN': 'bench-token',
+                'YANDEX_OAUTH_TOKENS': '',
+                'TELEMOST_POOL_MAXSIZE': str(args.concurrency),
+                'TELEGRAM_BOT_TOKEN': '',
+                'BOT_DB_PATH': os.path.join(tmp, 'bot.db'),
+                'WEBAPP_AUTH': '0',
+                'LOG_LEVEL': os.getenv('LOG_LEVEL', 'CRITICAL'),
+            })
+            from src.logging_setup import setup_logging
+            setup_logging()
+            results['routes'] = bench_routes(args, telemost)
+
+    for page, entry in results.get('codec', {}).items():
+        timings = '  '.join(f"{name} {value['mean_us']:>8} us" for name, value in entry.items() if name != 'bytes')
+        print(f"codec  {page:9} {entry['bytes']:>8} B  {timings}")
+    for mode, pages in results.get('routes', {}).items():
+        for page, result in pages.items():
+            print(f"routes {mode:12} {page:9} {result['rps']:>9} req/s  p50 {result['p50_ms']:>8} ms  "
+                  f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}")
+
+    save_results(results, args.output)
+
+    if args.compare:
+        regressions: List[str] = compare_results(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
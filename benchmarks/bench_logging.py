@@ -0,0 +1,114 @@
+"""
+Стоимость записи в лог для потока, обрабатывающего запрос
+
+Сравнивает синхронный StreamHandler (как было с logging.basicConfig) с
+очередью и потоком записи из src.logging_setup, с сэмплированием и без.
+Поток вывода имитирует stderr, который пишет с задержкой (pipe в docker,
+journald под нагрузкой).
+
+    python -m benchmarks.bench_logging --calls 20000 --write-latency-us 50
+"""
+
+import os
+import io
+import json
+import time
+import queue
+import logging
+import argparse
+import statistics
+from logging.handlers import QueueListener
+from typing import Any, Dict, List
+
+from src.logging_setup import DeferredQueueHandler, JsonFormatter, SamplingFilter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SlowStream(io.TextIOBase):
+    """Поток вывода с задержкой на каждую запись"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def write(self, text: str) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _measure(logger: logging.Logger, calls: int) -> Dict[str, Any]:
+    durations: List[float] = []
+    for i in range(calls):
+        started = time.perf_counter()
+        logger.info("Meeting created successfully: %s", i)
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    return {
+        'mean_us': round(statistics.fmean(durations) * 1e6, 2),
+        'p50_us': round(durations[len(durations) // 2] * 1e6, 2),
+        'p99_us': round(durations[int(len(durations) * 0.99)] * 1e6, 2),
+    }
+
+
+def run_scenario(name: str, calls: int, latency: float, sample_rate: float) -> Dict[str, Any]:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    output = logging.StreamHandler(SlowStream(latency))
+    listener = None
+
+    if name == 'sync_text':
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(output)
+    else:
+        output.setFormatter(JsonFormatter())
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=calls)
+        handler = DeferredQueueHandler(log_queue)
+        if sample_rate < 1:
+            handler.addFilter(SamplingFilter(sample_rate))
+        logger.addHandler(handler)
+        listener = QueueListener(log_queue, output)
+        listener.start()
+
+    try:
+        return _measure(logger, calls)
+    finally:
+        if listener:
+            listener.stop()
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--write-latency-us', type=float, default=50)
+    parser.add_argument('--sample-rate', type=float, default=0.1)
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results', 'logging.json'))
+    args = parser.parse_args()
+
+    latency = args.write_latency_us / 1e6
+    scenarios = {
+        'sync_text': 1.0,
+        'queue_json': 1.0,
+        'queue_json_sampled': args.sample_rate,
+    }
+
+    results = {}
+    for name, sample_rate in scenarios.items():
+        results[name] = run_scenario(name, args.calls, latency, sample_rate)
+        print(f"{name:20} mean {results[name]['mean_us']:>8} us  "
+              f"p50 {results[name]['p50_us']:>8} us  p99 {results[name]['p99_us']:>8} us")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'calls': args.calls, 'write_latency_us': args.write_latency_us, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Сравнение dev-сервера Flask и gunicorn (gthread и gevent) под нагрузкой
+
+Запускает приложение в отдельном процессе (Telemost API подменяется
+локальной заглушкой), нагружает /api/health, страницу Web App и POST /api/meetings
+keep-alive клиентами и печатает requests/sec, p50 и p99.
+
+    python -m benchmarks.bench_server --clients 50 --duration 10
+
+Медленный Telemost и 1000 одновременных клиентов:
+
+    python -m benchmarks.bench_server --modes gthread,gevent --clients 1000 --latency 0.5
+
+Конкуренция за SQLite: каждый POST /api/meetings пишет счетчик ограничителя
+частоты (--rate-limit), а фоновый поток держит блокировку записи базы
+--db-contention мс из каждых 100 мс (как другие воркеры и планировщик
+напоминаний):
+
+    python -m benchmarks.bench_server --modes gthread,gevent --rate-limit --db-contention 20
+
+Влияние ожидания базы на запросы, которые ее не используют: /api/health под
+фоновой нагрузкой создания встреч:
+
+    python -m benchmarks.bench_server --scenarios health --background create_meeting --rate-limit --db-contention 50
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from typing import Any, Dict, List, Optional
+
+from benchmarks.report import save_results, summarize
+from benchmarks.stubs import StubTelemostServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'health': ('GET', '/api/health', None),
+    'static': ('GET', '/', None),
+    'create_meeting': ('POST', '/api/meetings', {'waiting_room_level': 'PUBLIC'}),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode: str, port: int, env: Dict[str, str], workers: int) -> subprocess.Popen:
+    """Запустить приложение: dev-сервер или gunicorn с воркерами gthread/gevent"""
+    env = {**os.environ, **env, 'HOST': '127.0.0.1', 'PORT': str(port), 'FLASK_DEBUG': '0'}
+    if mode == 'dev':
+        cmd = [sys.executable, 'src/main.py']
+    else:
+        env['WEB_CONCURRENCY'] = str(workers)
+        env['GUNICORN_WORKER_CLASS'] = mode
+        env['GUNICORN_ACCESS_LOG'] = ''
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'src.main:create_app()']
+
+    process = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/api/health')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError(f"{mode} server did not start in time")
+
+
+def hold_db_lock(db_path: str, hold_ms: float, stop: threading.Event):
+    """Держать блокировку записи SQLite hold_ms из каждых 100 мс"""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    while not stop.is_set():
+        conn.execute('BEGIN IMMEDIATE')
+        time.sleep(hold_ms / 1000)
+        conn.execute('COMMIT')
+        stop.wait(max(0.0, (100 - hold_ms) / 1000))
+    conn.close()
+
+
+def run_load(port: int, method: str, path: str, body: Optional[Dict[str, Any]],
+             clients: int, duration: float) -> Dict[str, Any]:
+    """Нагрузить эндпоинт clients параллельными keep-alive клиентами"""
+    payload = json.dumps(body).encode() if body is not None else None
+    headers = {'Accept-Encoding': 'br, gzip'}
+    if payload:
+        headers['Content-Type'] = 'application/json'
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        local: List[float] = []
+        local_errors = 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    local_errors += 1
+                else:
+                    local.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return summarize(latencies, errors[0], time.monotonic() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', default='dev,gthread,gevent')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--latency', type=float, default=0.02, help='Задержка заглушки Telemost (сек)')
+    parser.add_argument('--rate-limit', action='store_true',
+                        help='Включить ограничение частоты по IP (запись в SQLite на каждое создание встречи)')
+    parser.add_argument('--db-contention', type=float, default=0,
+                        help='Сколько мс из каждых 100 держать блокировку записи базы бота')
+    parser.add_argument('--background', help='Сценарий фоновой нагрузки во время замеров')
+    parser.add_argument('--background-clients', type=int, default=20)
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results', 'server.json'))
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {'clients': args.clients, 'duration': args.duration, 'runs': {}}
+
+    with StubTelemostServer(latency=args.latency) as stub, tempfile.TemporaryDirectory() as tmp:
+        env = {
+            'TELEMOST_API_URL': f"{stub.url}/v1/telemost-api",
+            'YANDEX_OAUTH_TOKEN': 'bench-token',
+            'YANDEX_OAUTH_TOKENS': '',
+            'TELEGRAM_BOT_TOKEN': '',
+            'WEBAPP_AUTH': '0',
+            'BOT_DB_PATH': os.path.join(tmp, 'bot.db'),
+            'TELEMOST_POOL_MAXSIZE': str(args.clients),
+            # Нагрузка идет с одного адреса: лимит либо отключен, либо недостижим
+            'MEETING_RATE_LIMIT_IP': str(10 ** 9) if args.rate_limit else '0',
+            'MEETING_RATE_LIMIT_USER': '0',
+        }
+        results['rate_limit'] = args.rate_limit
+        results['db_contention_ms'] = args.db_contention
+        results['background'] = args.background
+
+        for mode in args.modes.split(','):
+            port = _free_port()
+            process = start_server(mode, port, env, args.workers)
+            stop = threading.Event()
+            if args.db_contention:
+                threading.Thread(target=hold_db_lock, args=(env['BOT_DB_PATH'], args.db_contention, stop),
+                                 daemon=True).start()
+            try:
+                for name in args.scenarios.split(','):
+                    method, path, body = SCENARIOS[name]
+                    background = None
+                    if args.background:
+                        bg_method, bg_path, bg_body = SCENARIOS[args.background]
+                        background = threading.Thread(target=run_load, daemon=True, args=(
+                            port, bg_method, bg_path, bg_body, args.background_clients, args.duration))
+                        background.start()
+                    result = run_load(port, method, path, body, args.clients, args.duration)
+                    if background is not None:
+                        background.join()
+                    results['runs'].setdefault(mode, {})[name] = result
+                    print(f"{mode:10} {name:16} {result['rps']:>9} req/s  "
+                          f"p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  "
+                          f"errors {result['errors']}")
+            finally:
+                stop.set()
+                process.terminate()
+                process.wait(timeout=30)
+
+    save_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
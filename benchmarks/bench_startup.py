@@ -0,0 +1,98 @@
+"""
+Время запуска приложения: импорт модулей и создание приложения
+
+Запускает в отдельном процессе python -X importtime, печатает самые
+медленные импорты и время create_app(). Завершается с кодом 1, если
+суммарное время превышает бюджет.
+
+    python -m benchmarks.bench_startup --budget-ms 450
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import time
+started = time.perf_counter()
+from src.main import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(f"STARTUP {imported - started:.6f} {created - imported:.6f}")
+"""
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure() -> Dict[str, Any]:
+    """Один запуск в чистом процессе"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+        # Без токена бота create_app() требует явно отключенной проверки initData
+        env=os.environ if os.getenv('TELEGRAM_BOT_TOKEN') else {**os.environ, 'WEBAPP_AUTH': '0'}
+    )
+
+    imports: List[Tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, _, module = match.groups()
+            imports.append((module, int(self_us), int(cumulative_us)))
+
+    import_s, create_s = map(float, result.stdout.split('STARTUP', 1)[1].split())
+    return {'import_ms': import_s * 1000, 'create_ms': create_s * 1000, 'imports': imports}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', 450)))
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results', 'startup.json'))
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    import_ms = statistics.median(r['import_ms'] for r in runs)
+    create_ms = statistics.median(r['create_ms'] for r in runs)
+    total_ms = import_ms + create_ms
+
+    # Самые медленные пакеты (по накопленному времени) последнего запуска
+    top_level = {}
+    for module, _, cumulative_us in runs[-1]['imports']:
+        package = module.split('.', 1)[0]
+        top_level[package] = max(top_level.get(package, 0), cumulative_us)
+    slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    print(f"{'package':30} {'cumulative ms':>14}")
+    for package, cumulative_us in slowest:
+        print(f"{package:30} {cumulative_us / 1000:>14.1f}")
+    print()
+    print(f"import src.main  {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"create_app()     {create_ms:8.1f} ms")
+    print(f"total            {total_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'import_ms': round(import_ms, 1),
+            'create_ms': round(create_ms, 1),
+            'budget_ms': args.budget_ms,
+            'slowest': [{'package': p, 'cumulative_ms': round(us / 1000, 1)} for p, us in slowest],
+        }, f, indent=2)
+
+    if total_ms > args.budget_ms:
+        print("Startup budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
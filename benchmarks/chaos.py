@@ -0,0 +1,236 @@
+"""
+Деградация приложения при сбоях Telemost и Telegram (chaos-тест)
+
+Смесь запросов к маршрутам Flask (test client) идет тремя фазами поверх
+заглушек Telemost и Telegram:
+- baseline — сбоев нет;
+- faults — включен сценарий сбоев (src/faults.py);
+- recovery — сбои выключены, circuit breaker'ы должны снова замкнуться.
+
+Для каждой фазы печатаются пропускная способность, p50/p99, ошибки по
+статусам, отказы circuit breaker'а (503), ответы Telegram 429 с повтором и
+недоставленные приглашения. Раздел "expect" сценария задает проверки;
+при нарушении код выхода 1.
+
+    python -m benchmarks.chaos benchmarks/faults/telemost_outage.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.bench_clients import BOT_TOKENS
+from benchmarks.report import RESULTS_DIR, percentile, save_results, summarize
+from benchmarks.stubs import StubTelegramServer, StubTelemostServer
+
+DEFAULT_PHASES = {'baseline': 10, 'faults': 20, 'recovery': 40}
+
+
+def _counter_totals(counter, label: str) -> Dict[str, float]:
+    """Значения счетчика Prometheus, просуммированные по одной метке"""
+    totals: Dict[str, float] = {}
+    for metric in counter.collect():
+        for sample in metric.samples:
+            if sample.name.endswith('_total'):
+                key = sample.labels[label]
+                totals[key] = totals.get(key, 0) + sample.value
+    return totals
+
+
+def _delta(after: Dict[str, float], before: Dict[str, float]) -> Dict[str, int]:
+    return {key: int(value - before.get(key, 0)) for key, value in sorted(after.items()) if value - before.get(key, 0)}
+
+
+def run_phase(operations: List[Tuple[str, int, Callable[[], Any]]], duration: float, concurrency: int,
+              seed: int) -> Dict[str, Any]:
+    """Закрытая нагрузка: concurrency потоков выполняют смесь запросов duration секунд
+
+    Args:
+        operations: (название, вес, вызов) — вызов возвращает ответ test client
+        duration: Длительность фазы (сек)
+        concurrency: Число потоков
+        seed: Зерно выбора запросов
+    """
+    from src import metrics
+
+    samples: List[Tuple[float, float, int]] = []
+    undelivered = [0]
+    lock = threading.Lock()
+    names = [name for name, _, _ in operations]
+    weights = [weight for _, weight, _ in operations]
+    calls = {name: call for name, _, call in operations}
+
+    telemost_before = _counter_totals(metrics.TELEMOST_REQUESTS, 'status_class')
+    telegram_before = _counter_totals(metrics.TELEGRAM_REQUESTS, 'status')
+    started = time.perf_counter()
+    deadline = started + duration
+
+    def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        local: List[Tuple[float, float, int]] = []
+        failed = 0
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            name = rng.choices(names, weights)[0]
+            response = calls[name]()
+            local.append((now - started, time.perf_counter() - now, response.status_code))
+            if name == 'send_meeting' and response.status_code == 200:
+                failed += response.get_json().get('failed_count', 0)
+        with lock:
+            samples.extend(local)
+            undelivered[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    statuses: Dict[str, int] = {}
+    for _, _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(1 for _, _, status in samples if status >= 500)
+    # Доля ошибок во второй половине фазы: после восстановления она должна вернуться к нулю
+    tail = [status for offset, _, status in samples if offset >= duration / 2]
+
+    result = summarize([latency for _, latency, _ in samples], errors, elapsed)
+    result.update({
+        'p90_ms': round(percentile([latency for _, latency, _ in samples], 90) * 1000, 2),
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'tail_error_rate': round(sum(1 for s in tail if s >= 500) / len(tail), 4) if tail else 0.0,
+        'statuses': statuses,
+        'circuit_rejections': statuses.get('503', 0),
+        'invitations_undelivered': undelivered[0],
+        'telemost_upstream': _delta(_counter_totals(metrics.TELEMOST_REQUESTS, 'status_class'), telemost_before),
+        'telegram_upstream': _delta(_counter_totals(metrics.TELEGRAM_REQUESTS, 'status'), telegram_before),
+    })
+    return result
+
+
+def check_expectations(results: Dict[str, Any], expect: Dict[str, Any]) -> List[str]:
+    """Проверки раздела "expect" сценария
+
+    Returns:
+        Описания нарушенных проверок
+    """
+    baseline, faults, recovery = results['baseline'], results['faults'], results['recovery']
+    failures = []
+    if 'max_error_rate' in expect and faults['error_rate'] > expect['max_error_rate']:
+        failures.append(f"faults error rate {faults['error_rate']} > {expect['max_error_rate']}")
+    if 'max_p99_ms' in expect and faults['p99_ms'] > expect['max_p99_ms']:
+        failures.append(f"faults p99 {faults['p99_ms']} ms > {expect['max_p99_ms']} ms")
+    if 'min_throughput_ratio' in expect and baseline['rps']:
+        ratio = faults['rps'] / baseline['rps']
+        if ratio < expect['min_throughput_ratio']:
+            failures.append(f"throughput ratio {ratio:.2f} < {expect['min_throughput_ratio']}")
+    if expect.get('circuit_opens') and not faults['circuit_rejections']:
+        failures.append("circuit breaker never rejected a request")
+    if expect.get('telegram_retries') and not faults['telegram_upstream'].get('429'):
+        failures.append("no Telegram 429 responses were retried")
+    if 'max_undelivered' in expect and faults['invitations_undelivered'] > expect['max_undelivered']:
+        failures.append(f"{faults['invitations_undelivered']} invitations undelivered > {expect['max_undelivered']}")
+    if expect.get('recovers') and recovery['tail_error_rate'] > baseline['error_rate']:
+        failures.append(f"recovery tail error rate {recovery['tail_error_rate']} > baseline {baseline['error_rate']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenario', help='Сценарий сбоев (JSON)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.01, help='Задержка заглушек (сек)')
+    parser.add_argument('--contacts', type=int, default=5, help='Получателей в одной рассылке')
+    parser.add_argument('--duration-scale', type=float, default=1.0, help='Множитель длительности фаз')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='JSON результатов (по умолчанию benchmarks/results/chaos-<сценарий>.json)')
+    args = parser.parse_args()
+
+    with open(args.scenario) as f:
+        scenario = json.load(f)
+    name = scenario.get('name') or os.path.splitext(os.path.basename(args.scenario))[0]
+    phases = {**DEFAULT_PHASES, **scenario.get('phases', {})}
+
+    with StubTelemostServer(latency=args.latency, seed=args.seed) as telemost, \
+            StubTelegramServer(latency=args.latency, seed=args.seed) as telegram, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            'FAULT_SCENARIO': args.scenario,
+            'TELEMOST_API_URL': f"{telemost.url}/v1/telemost-api",
+            'TELEGRAM_API_URL': telegram.url,
+            'YANDEX_OAUTH_TOKEN': 'chaos-token',
+            'YANDEX_OAUTH_TOKENS': '',
+            'TELEGRAM_BOT_TOKEN': BOT_TOKENS[0],
+            'TELEGRAM_BOT_TOKENS': ','.join(BOT_TOKENS[1:]),
+            'TELEGRAM_RATE_LIMIT': '1000',
+            'BOT_DB_PATH': os.path.join(tmp, 'bot.db'),
+            'WEBAPP_AUTH': '0',
+            'MEETING_RATE_LIMIT_IP': '0',
+            'MEETING_RATE_LIMIT_USER': '0',
+            'LOG_LEVEL': os.getenv('LOG_LEVEL', 'CRITICAL'),
+        })
+        from src.logging_setup import setup_logging
+        from src.main import create_app
+        from src.transport import get_fault_injector
+        setup_logging()
+
+        app = create_app()
+        injector = get_fault_injector()
+        local = threading.local()
+
+        def client():
+            if not hasattr(local, 'client'):
+                local.client = app.test_client()
+            return local.client
+
+        meetings = [telemost.create_conference({})['id'] for _ in range(20)]
+        contacts = [{'id': 3000 + i, 'name': f'Contact {i}'} for i in range(args.contacts)]
+        operations = [
+            ('create_meeting', 30, lambda: client().post('/api/meetings', json={'waiting_room_level': 'PUBLIC'})),
+            ('get_meeting', 40, lambda: client().get(f"/api/meetings/{random.choice(meetings)}")),
+            ('list_meetings', 20, lambda: client().get('/api/meetings')),
+            ('send_meeting', 10, lambda: client().post('/api/send-meeting', json={
+                'meeting_data': {'id': meetings[0], 'join_url': f"https://telemost.yandex.ru/j/{meetings[0]}"},
+                'contacts': contacts,
+            })),
+        ]
+
+        results: Dict[str, Any] = {'scenario': name, 'params': vars(args), 'phases': phases}
+        for phase in ('baseline', 'faults', 'recovery'):
+            injector.enabled = phase == 'faults'
+            injector.reset()
+            duration = phases[phase] * args.duration_scale
+            print(f"{phase}: {duration:.0f} s")
+            results[phase] = run_phase(operations, duration, args.concurrency, args.seed)
+            if phase == 'faults':
+                results[phase]['faults_injected'] = injector.stats()
+
+    print(f"\nscenario {name}")
+    for phase in ('baseline', 'faults', 'recovery'):
+        result = results[phase]
+        print(f"{phase:9} {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  "
+              f"errors {result['error_rate']:.2%}  503 {result['circuit_rejections']:>5}  "
+              f"undelivered {result['invitations_undelivered']:>4}  statuses {result['statuses']}")
+    print(f"faults injected: {results['faults'].get('faults_injected')}")
+    print(f"telemost upstream (faults): {results['faults']['telemost_upstream']}")
+    print(f"telegram upstream (faults): {results['faults']['telegram_upstream']}")
+
+    failures = check_expectations(results, scenario.get('expect', {}))
+    results['failures'] = failures
+    save_results(results, args.output or os.path.join(RESULTS_DIR, f'chaos-{name}.json'))
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
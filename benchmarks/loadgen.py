@@ -0,0 +1,401 @@
+"""
+Генератор нагрузки с открытой моделью поступления запросов
+
+Запросы отправляются с заданной частотой независимо от того, успел ли
+сервер ответить на предыдущие (constant arrival rate). Задержка считается
+от запланированного момента отправки, а не от фактического: если сервер
+не справляется и запросы ждут свободного соединения, это ожидание попадает
+в результат (нет coordinated omission, как у замкнутых циклов "запрос —
+ответ — следующий запрос").
+
+Нагрузка описывается файлом сценария (см. benchmarks/scenarios/):
+ступени частоты, набор запросов с весами, подготовительные запросы и SLO.
+По результатам каждой ступени определяется точка насыщения — первая
+ступень, на которой нарушен SLO или сервер не держит заданную частоту.
+
+    python -m benchmarks.loadgen benchmarks/scenarios/api_mix.json --url http://127.0.0.1:5000
+
+Против локальной заглушки Telemost (приложение запускается автоматически):
+
+    python -m benchmarks.loadgen benchmarks/scenarios/api_mix.json --local
+"""
+
+import os
+import sys
+import json
+import time
+import hmac
+import queue
+import random
+import hashlib
+import secrets
+import itertools
+import argparse
+import tempfile
+import threading
+import http.client
+from urllib.parse import urlencode, urlsplit
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.report import RESULTS_DIR, save_results
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с логарифмическими корзинами (по принципу HdrHistogram)
+
+    Значения (мкс) группируются по старшим PRECISION_BITS битам: относительная
+    погрешность не больше 1 / 2^(PRECISION_BITS-1), а число корзин не зависит
+    от числа измерений.
+    """
+
+    PRECISION_BITS = 7
+
+    def __init__(self):
+        self.counts: Dict[Tuple[int, int], int] = {}
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds: float) -> None:
+        value = max(0, int(seconds * 1_000_000))
+        shift = max(0, value.bit_length() - self.PRECISION_BITS)
+        key = (shift, value >> shift)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Значение перцентиля (мс): середина корзины, в которую он попал"""
+        if not self.total:
+            return 0.0
+        rank = max(1, int(round(self.total * pct / 100)))
+        seen = 0
+        for shift, sub in sorted(self.counts, key=lambda k: k[1] << k[0]):
+            seen += self.counts[(shift, sub)]
+            if seen >= rank:
+                value = (sub << shift) + ((1 << shift) >> 1)
+                return min(value, self.max) / 1000
+        return self.max / 1000
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'p50_ms': round(self.percentile(50), 2),
+            'p90_ms': round(self.percentile(90), 2),
+            'p99_ms': round(self.percentile(99), 2),
+            'p999_ms': round(self.percentile(99.9), 2),
+            'max_ms': round(self.max / 1000, 2),
+        }
+
+
+def sign_init_data(bot_token: str, user_id: int) -> str:
+    """Подписанный initData синтетического пользователя (для API с проверкой Web App)"""
+    fields = {
+        'auth_date': str(int(time.time())),
+        'query_id': f'loadgen-{user_id}',
+        'user': json.dumps({'id': user_id, 'first_name': f'Load {user_id}'}, separators=(',', ':')),
+    }
+    data_check_string = '\n'.join(f"{key}={fields[key]}" for key in sorted(fields))
+    secret_key = hmac.new(b'WebAppData', bot_token.encode(), hashlib.sha256).digest()
+    fields['hash'] = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+class Stats:
+    """Результаты одной ступени по именам запросов
+
+    Запросы, не завершившиеся к концу ступени (в работе или в очереди),
+    учитываются в close() со временем ожидания на этот момент. После close()
+    ответы потоков, которые еще работают, в результаты ступени не попадают.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.unfinished = 0
+        self.lock = threading.Lock()
+        self._in_flight: Dict[int, Tuple[float, str]] = {}
+        self._closed = False
+
+    def start(self, worker: int, intended: float, name: str) -> None:
+        with self.lock:
+            self._in_flight[worker] = (intended, name)
+
+    def record(self, worker: int, status: str, latency: float) -> None:
+        with self.lock:
+            request = self._in_flight.pop(worker, None)
+            if self._closed or request is None:
+                return
+            name = request[1]
+            statuses = self.statuses.setdefault(name, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            self.histograms.setdefault(name, LatencyHistogram()).record(latency)
+
+    def close(self, now: float, queued: List[Tuple[float, str]]) -> None:
+        """Завершить ступень: незавершенные запросы — со временем ожидания до now"""
+        with self.lock:
+            for intended, name in list(self._in_flight.values()) + queued:
+                self.histograms.setdefault(name, LatencyHistogram()).record(now - intended)
+                self.unfinished += 1
+            self._in_flight.clear()
+            self._closed = True
+
+
+class LoadGenerator:
+    """Планировщик отправок с постоянной частотой и пул соединений-исполнителей"""
+
+    def __init__(self, scenario: Dict[str, Any], base_url: str, bot_token: Optional[str] = None):
+        self.scenario = scenario
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == 'https' else 80)
+        self.https = url.scheme == 'https'
+        self.timeout = scenario.get('timeout', 30)
+        self.max_concurrency = scenario.get('max_concurrency', 256)
+        self.headers = {'Accept-Encoding': 'br, gzip', **scenario.get('headers', {})}
+        self.variables: Dict[str, List[Any]] = {}
+        self.requests = scenario['requests']
+        self.weights = [r.get('weight', 1) for r in self.requests]
+        self._random = random.Random(scenario.get('seed', 1))
+        self._seq = itertools.count()
+        self.run_id = secrets.token_hex(4)
+
+        users = scenario.get('users', 1)
+        self.init_data = [sign_init_data(bot_token, 10_000_000 + i) for i in range(users)] if bot_token else []
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _render(self, spec: Dict[str, Any], rnd: random.Random) -> Tuple[str, str, Optional[bytes], Dict[str, str]]:
+        # {run} и {seq} — id прогона и номер запроса (уникальные значения), остальные — из переменных setup
+        values = {name: rnd.choice(items) for name, items in self.variables.items() if items}
+        values['run'] = self.run_id
+        values['seq'] = next(self._seq)
+        path = spec['path'].format(**values)
+        body = None
+        headers = dict(self.headers)
+        if 'json' in spec:
+            body = json.dumps(spec['json']).replace('{run}', self.run_id).replace('{seq}', str(values['seq'])).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.init_data:
+            headers['X-Telegram-Init-Data'] = rnd.choice(self.init_data)
+        return spec.get('method', 'GET'), path, body, headers
+
+    def _send(self, conn: http.client.HTTPConnection, spec: Dict[str, Any], rnd: random.Random) -> Tuple[int, bytes]:
+        method, path, body, headers = self._render(spec, rnd)
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+
+    def setup(self) -> None:
+        """Подготовительные запросы: сохраняют поля ответа в переменные ({meeting_id} в путях)"""
+        conn = self._connection()
+        rnd = random.Random(0)
+        for spec in self.scenario.get('setup', []):
+            for _ in range(spec.get('repeat', 1)):
+                status, data = self._send(conn, spec, rnd)
+                if status >= 400:
+                    raise RuntimeError(f"Setup request {spec['method']} {spec['path']} failed: {status} {data[:200]!r}")
+                payload = json.loads(data) if data else {}
+                for variable, field in spec.get('capture', {}).items():
+                    self.variables.setdefault(variable, []).append(payload[field])
+        conn.close()
+
+    def run_stage(self, rate: float, duration: float) -> Dict[str, Any]:
+        """Отправлять запросы с частотой rate в течение duration секунд"""
+        stats = Stats()
+        pending: "queue.Queue[Optional[Tuple[float, Dict[str, Any]]]]" = queue.Queue()
+
+        def worker(seed: int):
+            rnd = random.Random(seed)
+            conn = self._connection()
+            while True:
+                item = pending.get()
+                if item is None:
+                    break
+                intended, spec = item
+                stats.start(seed, intended, spec['name'])
+                try:
+                    status, _ = self._send(conn, spec, rnd)
+                    # Время ответа — от запланированного момента отправки
+                    stats.record(seed, str(status), time.perf_counter() - intended)
+                except (OSError, http.client.HTTPException) as e:
+                    # Таймауты и ошибки соединения тоже ответ: без них перцентили занижены
+                    stats.record(seed, type(e).__name__, time.perf_counter() - intended)
+                    conn.close()
+                    conn = self._connection()
+            conn.close()
+
+        workers = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(self.max_concurrency)]
+        for thread in workers:
+            thread.start()
+
+        poisson = self.scenario.get('arrival', 'constant') == 'poisson'
+        started = time.perf_counter()
+        intended = started
+        sent = 0
+        max_backlog = 0
+        while intended < started + duration:
+            now = time.perf_counter()
+            if intended > now:
+                time.sleep(intended - now)
+            pending.put((intended, self._random.choices(self.requests, self.weights)[0]))
+            sent += 1
+            max_backlog = max(max_backlog, pending.qsize())
+            intended += self._random.expovariate(rate) if poisson else 1 / rate
+
+        for _ in workers:
+            pending.put(None)
+        drain_deadline = time.perf_counter() + self.timeout
+        for thread in workers:
+            thread.join(max(0.0, drain_deadline - time.perf_counter()))
+        elapsed = time.perf_counter() - started
+
+        queued = []
+        while True:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                queued.append((item[0], item[1]['name']))
+        stats.close(time.perf_counter(), queued)
+
+        overall = LatencyHistogram()
+        per_request = {}
+        ok = errors = limited = 0
+        for name, histogram in stats.histograms.items():
+            statuses = stats.statuses.get(name, {})
+            overall.merge(histogram)
+            per_request[name] = {'statuses': statuses, **histogram.summary()}
+            for status, count in statuses.items():
+                if status == '429':
+                    limited += count
+                elif status.isdigit() and int(status) < 500:
+                    ok += count
+                else:
+                    errors += count
+
+        completed = ok + errors + limited
+        return {
+            'target_rps': rate,
+            'sent': sent,
+            'completed': completed,
+            'unfinished': sent - completed,
+            'achieved_rps': round(completed / elapsed, 1),
+            'ok': ok,
+            'errors': errors,
+            'rate_limited': limited,
+            'max_backlog': max_backlog,
+            **overall.summary(),
+            'requests': per_request,
+        }
+
+
+def _stage_ok(result: Dict[str, Any], slo: Dict[str, Any]) -> bool:
+    if result['p99_ms'] > slo.get('p99_ms', float('inf')):
+        return False
+    if result['sent'] and (result['errors'] + result['unfinished']) / result['sent'] > slo.get('error_rate', 0.01):
+        return False
+    return result['achieved_rps'] >= result['target_rps'] * slo.get('min_throughput_ratio', 0.95)
+
+
+def run_scenario(scenario: Dict[str, Any], base_url: str, bot_token: Optional[str] = None) -> Dict[str, Any]:
+    """Выполнить сценарий и определить точку насыщения"""
+    generator = LoadGenerator(scenario, base_url, bot_token)
+    generator.setup()
+
+    slo = scenario.get('slo', {})
+    results: Dict[str, Any] = {'scenario': scenario.get('name'), 'url': base_url, 'slo': slo, 'stages': []}
+    saturation = None
+    for stage in scenario['stages']:
+        result = generator.run_stage(stage['rate'], stage['duration'])
+        healthy = _stage_ok(result, slo)
+        results['stages'].append({**result, 'within_slo': healthy})
+        print(f"{stage['rate']:>8} req/s target  {result['achieved_rps']:>8} achieved  "
+              f"p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  p99.9 {result['p999_ms']:>8} ms  "
+              f"errors {result['errors']:>5}  429 {result['rate_limited']:>5}  {'ok' if healthy else 'SLO VIOLATED'}")
+        if not healthy:
+            saturation = stage['rate']
+            if scenario.get('stop_on_violation', True):
+                break
+
+    last_good = [s['target_rps'] for s in results['stages'] if s['within_slo']]
+    results['max_rps_within_slo'] = max(last_good) if last_good else None
+    results['saturated_at_rps'] = saturation
+    if saturation:
+        print(f"Saturation: SLO violated at {saturation} req/s, "
+              f"last healthy stage {results['max_rps_within_slo']} req/s")
+    else:
+        print("All stages within SLO")
+    return results
+
+
+def _local_server(args) -> Tuple[Any, Any, str]:
+    """Заглушка Telemost и приложение под gunicorn (как в bench_server)"""
+    from benchmarks.bench_server import _free_port, start_server
+    from benchmarks.stubs import StubTelemostServer
+
+    stub = StubTelemostServer(latency=args.stub_latency).start()
+    tmp = tempfile.mkdtemp()
+    port = _free_port()
+    env = {
+        'TELEMOST_API_URL': f"{stub.url}/v1/telemost-api",
+        'YANDEX_OAUTH_TOKEN': 'loadgen-token',
+        'YANDEX_OAUTH_TOKENS': '',
+        'TELEGRAM_BOT_TOKEN': '',
+        'WEBAPP_AUTH': '0',
+        'BOT_DB_PATH': os.path.join(tmp, 'bot.db'),
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'app.db')}",
+        'MEETING_RATE_LIMIT_IP': '0',
+        'MEETING_RATE_LIMIT_USER': '0',
+    }
+    process = start_server(args.mode, port, env, args.workers)
+    return stub, process, f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenario', help='JSON-файл сценария')
+    parser.add_argument('--url', help='Адрес приложения (например, http://127.0.0.1:5000)')
+    parser.add_argument('--local', action='store_true', help='Запустить приложение на заглушке Telemost')
+    parser.add_argument('--mode', default='gevent', help='Воркеры gunicorn для --local')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--stub-latency', type=float, default=0.05)
+    parser.add_argument('--bot-token', default=os.getenv('LOADGEN_BOT_TOKEN'),
+                        help='Токен бота для подписи initData (если API проверяет Web App)')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    with open(args.scenario) as f:
+        scenario = json.load(f)
+
+    stub = process = None
+    if args.local:
+        stub, process, url = _local_server(args)
+    elif args.url:
+        url = args.url
+    else:
+        parser.error('--url or --local is required')
+
+    try:
+        results = run_scenario(scenario, url, args.bot_token)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if stub is not None:
+            stub.stop()
+
+    name = os.path.splitext(os.path.basename(args.scenario))[0]
+    save_results(results, args.output or os.path.join(RESULTS_DIR, f'loadgen-{name}.json'))
+    sys.exit(0 if results['saturated_at_rps'] is None or scenario.get('expect_saturation') else 1)
+
+
+if __name__ == '__main__':
+    main()
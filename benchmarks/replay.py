@@ -0,0 +1,125 @@
+"""
+Воспроизведение записанного трафика Telemost и Telegram с исходными интервалами
+
+Кассеты пишутся приложением с HTTP_CASSETTE_MODE=record (см. src/cassette.py).
+Запросы кассеты отправляются через TelemostAPI._make_request и
+TelegramBot._make_request в те же моменты относительно начала записи
+(--speed ускоряет или замедляет), а отвечает им заглушка с записанными
+ответами и задержками. Так нагрузка из production повторяется без
+обращения к Яндексу и Telegram.
+
+    python -m benchmarks.replay cassettes/telemost-*.jsonl.gz --speed 2
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from urllib.parse import parse_qsl
+
+from benchmarks.report import RESULTS_DIR, save_results, summarize
+from benchmarks.stubs import CassetteStubServer
+from src.cassette import Cassette, read_cassette
+
+TELEMOST_BASE_PATH = '/v1/telemost-api'
+
+
+def _endpoint_name(record: Dict[str, Any]) -> str:
+    from src import metrics
+    if record['service'] == 'telegram':
+        return f"telegram {record['path'].rsplit('/', 1)[-1]}"
+    return f"telemost {record['method']} {metrics.telemost_endpoint(record['path'][len(TELEMOST_BASE_PATH):])}"
+
+
+def replay(records: List[Dict[str, Any]], stub_url: str, speed: float, concurrency: int) -> Dict[str, Any]:
+    """Отправить запросы кассеты через клиенты приложения по исходному расписанию"""
+    os.environ['TELEMOST_API_URL'] = stub_url + TELEMOST_BASE_PATH
+    os.environ['TELEGRAM_API_URL'] = stub_url
+
+    from src.telegram_bot import TelegramBot, TelegramBotError
+    from src.telemost_api import TelemostAPI, TelemostAPIError
+    from src.transport import build_session
+
+    session = build_session(pool_maxsize=concurrency)
+    telemost = TelemostAPI(oauth_token='replay-token', session=session)
+    # Токены в кассете заменены на <id>:REDACTED — такие же "токены" у ботов воспроизведения
+    bot_tokens = list(dict.fromkeys(r['path'].split('/')[1][3:] for r in records if r['service'] == 'telegram'))
+    telegram = TelegramBot(bot_token=bot_tokens[0], bot_tokens=bot_tokens[1:], rate_limit=1e6,
+                           session=session) if bot_tokens else None
+
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def send(record: Dict[str, Any], scheduled: float):
+        name = _endpoint_name(record)
+        body = json.loads(record['request']) if record.get('request') else None
+        ok = True
+        try:
+            if record['service'] == 'telegram':
+                token, _, method = record['path'][4:].partition('/')
+                telegram._make_request(method, body, bot_token=token)
+            else:
+                params = dict(parse_qsl(record['query'])) or None
+                telemost._make_request(record['method'], record['path'][len(TELEMOST_BASE_PATH):], body, params)
+        except (TelemostAPIError, TelegramBotError):
+            # Ошибка, записанная в кассете, — ожидаемый результат
+            ok = record['status'] >= 400
+        elapsed = time.perf_counter() - scheduled
+        with lock:
+            latencies.setdefault(name, []).append(elapsed)
+            if not ok:
+                errors[name] = errors.get(name, 0) + 1
+
+    first = records[0]['ts']
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for record in records:
+            scheduled = started + (record['ts'] - first) / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, record, scheduled)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'records': len(records),
+        'recorded_duration_s': round(records[-1]['ts'] - first, 3),
+        'replay_duration_s': round(elapsed, 3),
+        'endpoints': {name: summarize(values, errors.get(name, 0), elapsed) for name, values in sorted(latencies.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('cassettes', nargs='+', help='Файлы кассет (.jsonl.gz)')
+    parser.add_argument('--speed', type=float, default=1.0, help='Ускорение относительно записи')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--no-latency', action='store_true', help='Заглушка отвечает без записанной задержки')
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'replay.json'))
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+    from src.logging_setup import setup_logging
+    setup_logging()
+
+    records = read_cassette(*args.cassettes)
+    if not records:
+        parser.error('cassettes are empty')
+
+    with CassetteStubServer(Cassette(records), replay_latency=not args.no_latency) as stub:
+        results = replay(records, stub.url, args.speed, args.concurrency)
+
+    print(f"{results['records']} requests, recorded over {results['recorded_duration_s']} s, "
+          f"replayed in {results['replay_duration_s']} s")
+    for name, result in results['endpoints'].items():
+        print(f"{name:45} {result['requests']:>6}  p50 {result['p50_ms']:>8} ms  "
+              f"p99 {result['p99_ms']:>8} ms  unexpected errors {result['errors']}")
+    save_results({'params': vars(args), **results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Общие функции бенчмарков: перцентили, сохранение результатов и сравнение с прошлым прогоном
+"""
+
+import os
+import json
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Метрики, у которых рост — это ухудшение
+_LOWER_IS_BETTER = ('_ms', '_us', 'errors')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Перцентиль (ближайший ранг) списка значений"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Сводка прогона: число запросов, ошибок, пропускная способность, p50/p99 (мс)"""
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    """Записать результаты в JSON"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Results saved to {path}")
+
+
+def _flatten(data: Any, prefix: str = '') -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix] = float(data)
+    return flat
+
+
+def compare_results(current: Dict[str, Any], baseline_path: str, threshold: float = 10.0) -> List[str]:
+    """Напечатать изменения относительно сохраненного прогона
+
+    Args:
+        current: Результаты текущего прогона
+        baseline_path: JSON прошлого прогона
+        threshold: Изменение (%), начиная с которого метрика считается ухудшенной
+
+    Returns:
+        Ключи метрик, ухудшившихся больше чем на threshold процентов
+    """
+    with open(baseline_path) as f:
+        baseline = _flatten(json.load(f))
+
+    regressions = []
+    for key, value in _flatten(current).items():
+        if key.startswith('params.'):
+            continue
+        old: Optional[float] = baseline.get(key)
+        if old is None or old == value:
+            continue
+        change = (value - old) / old * 100 if old else float('inf')
+        worse = change > 0 if key.endswith(_LOWER_IS_BETTER) else change < 0
+        marker = ''
+        if worse and abs(change) >= threshold:
+            regressions.append(key)
+            marker = '  <-- regression'
+        print(f"{key:55} {old:>12.2f} -> {value:>12.2f}  {change:+7.1f}%{marker}")
+    return regressions
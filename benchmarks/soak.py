@@ -0,0 +1,258 @@
+"""
+Длительный прогон (soak) на заглушках с контролем роста памяти
+
+Смесь запросов к маршрутам Flask (test client), webhook с inline-запросами
+и массовая рассылка идут с постоянной частотой часами. Каждый inline-запрос
+— от нового пользователя: структуры, растущие с числом пользователей, не
+упираются в фиксированный набор id. Раз в --sample-interval секунд
+записываются RSS, объем памяти под tracemalloc и размеры внутренних
+структур (src/memory.py). После прогрева
+по точкам строится линейная регрессия: устойчивый рост (наклон больше
+--max-growth МБ/ч при R² не ниже --min-r2) — ошибка, код выхода 1. С
+--tracemalloc печатаются места, где память выросла сильнее всего.
+
+    python -m benchmarks.soak --duration 4h --rate 100
+"""
+
+import os
+import gc
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.bench_clients import BOT_TOKENS
+from benchmarks.report import RESULTS_DIR, save_results
+from benchmarks.stubs import StubTelegramServer, StubTelemostServer
+
+WEBHOOK_SECRET = 'soak-secret'
+
+
+def parse_duration(value: str) -> float:
+    """Длительность: секунды или число с суффиксом s, m, h"""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def linear_growth(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """Наклон (единиц в час) и R² линейной регрессии по точкам (сек, значение)"""
+    n = len(points)
+    if n < 3:
+        return 0.0, 0.0
+    mean_t = sum(t for t, _ in points) / n
+    mean_v = sum(v for _, v in points) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in points)
+    var_v = sum((v - mean_v) ** 2 for _, v in points)
+    if not var_t or not var_v:
+        return 0.0, 0.0
+    cov = sum((t - mean_t) * (v - mean_v) for t, v in points)
+    slope = cov / var_t
+    return slope * 3600, cov * cov / (var_t * var_v)
+
+
+def sample_memory(started: float) -> Dict[str, Any]:
+    """Точка временного ряда памяти (после полной сборки мусора)"""
+    from src import memory
+    gc.collect()
+    process = memory.process_memory()
+    point = {
+        't': round(time.monotonic() - started, 1),
+        'rss_mb': round(process.get('rss_bytes', 0) / 2 ** 20, 2),
+        'gc_objects': process['gc_objects'],
+        'structures': {name: size.get('items', 0) for name, size in memory.structure_sizes().items()},
+    }
+    if 'traced_bytes' in process:
+        point['traced_mb'] = round(process['traced_bytes'] / 2 ** 20, 2)
+    return point
+
+
+def analyze(samples: List[Dict[str, Any]], warmup: float, max_growth: float, min_r2: float) -> Dict[str, Any]:
+    """Рост памяти после прогрева по RSS, tracemalloc, числу объектов и структурам"""
+    steady = [s for s in samples if s['t'] >= warmup]
+    series = {
+        'rss_mb': ('MB/h', max_growth),
+        'traced_mb': ('MB/h', max_growth),
+    }
+    report: Dict[str, Any] = {'samples': len(steady), 'growth': {}, 'failures': []}
+    for key, (unit, limit) in series.items():
+        points = [(s['t'], s[key]) for s in steady if key in s]
+        if not points:
+            continue
+        slope, r2 = linear_growth(points)
+        report['growth'][key] = {'per_hour': round(slope, 3), 'unit': unit, 'r2': round(r2, 3),
+                                 'first': points[0][1], 'last': points[-1][1]}
+        if slope > limit and r2 >= min_r2:
+            report['failures'].append(f"{key} grows {slope:.2f} {unit} (R² {r2:.2f})")
+
+    # Кэши и очереди ограничены по размеру: устойчивый рост числа элементов — утечка
+    names = sorted({name for s in steady for name in s['structures']})
+    for name in names:
+        points = [(s['t'], s['structures'].get(name, 0)) for s in steady]
+        slope, r2 = linear_growth(points)
+        first, last = points[0][1], points[-1][1]
+        report['growth'][f"structures.{name}"] = {'per_hour': round(slope, 1), 'unit': 'items/h', 'r2': round(r2, 3),
+                                                  'first': first, 'last': last}
+        if slope > 0 and r2 >= max(min_r2, 0.9) and last > max(first * 1.5, first + 100):
+            report['failures'].append(f"structure {name} grows {slope:.0f} items/h (R² {r2:.2f}): {first} -> {last}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', default='1h', help='Длительность: 3600, 90m, 4h')
+    parser.add_argument('--warmup', default='5m', help='Прогрев, не участвующий в анализе')
+    parser.add_argument('--rate', type=float, default=100, help='Запросов в секунду (всего)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--sample-interval', type=float, default=30, help='Период замера памяти (сек)')
+    parser.add_argument('--max-growth', type=float, default=10.0, help='Допустимый рост памяти (МБ/ч)')
+    parser.add_argument('--min-r2', type=float, default=0.8, help='R², начиная с которого рост считается устойчивым')
+    parser.add_argument('--tracemalloc', action='store_true', help='Включить tracemalloc (медленнее, но с местами роста)')
+    parser.add_argument('--latency', type=float, default=0.005, help='Задержка заглушек (сек)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'soak.json'))
+    args = parser.parse_args()
+
+    duration, warmup = parse_duration(args.duration), parse_duration(args.warmup)
+
+    with StubTelemostServer(latency=args.latency, seed=args.seed) as telemost, \
+            StubTelegramServer(latency=args.latency, seed=args.seed) as telegram, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            'TELEMOST_API_URL': f"{telemost.url}/v1/telemost-api",
+            'TELEGRAM_API_URL': telegram.url,
+            'YANDEX_OAUTH_TOKEN': 'soak-token',
+            'YANDEX_OAUTH_TOKENS': '',
+            'TELEGRAM_BOT_TOKEN': BOT_TOKENS[0],
+            'TELEGRAM_BOT_TOKENS': '',
+            'TELEGRAM_RATE_LIMIT': '1000',
+            'TELEGRAM_WEBHOOK_SECRET': WEBHOOK_SECRET,
+            'BOT_DB_PATH': os.path.join(tmp, 'bot.db'),
+            'WEBAPP_AUTH': '0',
+            # Предложения комнат истекают задолго до конца прогрева
+            'INLINE_OFFER_TTL': '60',
+            'MEETING_RATE_LIMIT_IP': '0',
+            'MEETING_RATE_LIMIT_USER': '0',
+            'LOG_LEVEL': os.getenv('LOG_LEVEL', 'CRITICAL'),
+        })
+        from src import memory
+        from src.logging_setup import setup_logging
+        from src.main import create_app
+        setup_logging()
+
+        tracer = memory.get_memory_tracer()
+        if args.tracemalloc:
+            tracer.start(frames=10)
+
+        app = create_app()
+        local = threading.local()
+
+        def client():
+            if not hasattr(local, 'client'):
+                local.client = app.test_client()
+            return local.client
+
+        meetings = [telemost.create_conference({})['id'] for _ in range(50)]
+        update_ids = iter(range(1, 10 ** 12))
+        ids_lock = threading.Lock()
+
+        def inline_query(rng: random.Random):
+            with ids_lock:
+                update_id = next(update_ids)
+            # Пользователь каждый раз новый (id совпадает с update_id)
+            return client().post('/api/telegram/webhook', headers={'X-Telegram-Bot-Api-Secret-Token': WEBHOOK_SECRET},
+                                 json={'update_id': update_id, 'inline_query': {
+                                     'id': str(update_id), 'from': {'id': update_id}, 'query': ''}})
+
+        operations = [
+            (30, lambda rng: client().get(f"/api/meetings/{rng.choice(meetings)}")),
+            (15, lambda rng: client().post('/api/meetings', json={'waiting_room_level': 'PUBLIC'})),
+            (10, lambda rng: client().get('/api/meetings')),
+            (20, lambda rng: client().get('/', headers={'Accept-Encoding': rng.choice(['gzip', 'br, gzip', 'identity'])})),
+            (20, inline_query),
+            (5, lambda rng: client().post('/api/send-meeting', json={
+                'meeting_data': {'id': meetings[0], 'join_url': f"https://telemost.yandex.ru/j/{meetings[0]}"},
+                'contacts': [{'id': 4000 + i, 'name': f'Contact {i}'} for i in range(3)],
+            })),
+        ]
+        weights = [weight for weight, _ in operations]
+        calls = [call for _, call in operations]
+
+        started = time.monotonic()
+        deadline = started + duration
+        errors = [0]
+        requests_done = [0]
+        lock = threading.Lock()
+
+        def worker(index: int):
+            rng = random.Random(args.seed * 1000 + index)
+            interval = args.concurrency / args.rate
+            next_at = time.monotonic() + rng.random() * interval
+            done = failed = 0
+            while next_at < deadline and time.monotonic() < deadline:
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                response = rng.choices(calls, weights)[0](rng)
+                done += 1
+                failed += response.status_code >= 500
+                next_at += interval
+            with lock:
+                requests_done[0] += done
+                errors[0] += failed
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+
+        def trim_stubs():
+            # Заглушки живут в этом же процессе: их состояние не должно расти вместе с прогоном
+            seeded = set(meetings)
+            for conference_id in list(telemost.conferences):
+                if conference_id not in seeded:
+                    telemost.conferences.pop(conference_id, None)
+            del telegram.sent[:]
+
+        samples = [sample_memory(started)]
+        baseline_snapshot = None
+        print(f"soak: {duration:.0f} s at {args.rate} req/s, warmup {warmup:.0f} s")
+        while time.monotonic() < deadline:
+            time.sleep(min(args.sample_interval, max(0.0, deadline - time.monotonic())))
+            trim_stubs()
+            point = sample_memory(started)
+            samples.append(point)
+            print(f"{point['t']:>8.0f} s  rss {point['rss_mb']:>8} MB  "
+                  f"{'traced ' + str(point['traced_mb']) + ' MB  ' if 'traced_mb' in point else ''}"
+                  f"objects {point['gc_objects']:>8}  {point['structures']}", flush=True)
+            if args.tracemalloc and baseline_snapshot is None and point['t'] >= warmup:
+                baseline_snapshot = tracer.take()['id']
+
+        for thread in threads:
+            thread.join()
+
+        report = analyze(samples, warmup, args.max_growth, args.min_r2)
+        report['requests'] = requests_done[0]
+        report['errors'] = errors[0]
+        if args.tracemalloc and baseline_snapshot is not None:
+            report['top_growth'] = tracer.diff(baseline_snapshot, tracer.take()['id'], limit=15)
+
+    print(f"\n{report['requests']} requests, {report['errors']} errors")
+    for key, growth in report['growth'].items():
+        print(f"{key:40} {growth['first']:>10} -> {growth['last']:>10}  {growth['per_hour']:>10} {growth['unit']}  "
+              f"R² {growth['r2']}")
+    for entry in report.get('top_growth', [])[:10]:
+        print(f"{entry['size_diff_bytes'] / 1024:>10.1f} KiB  {entry['count_diff']:>+8}  {entry['traceback'][0]}")
+
+    save_results({'params': vars(args), 'report': report, 'samples': samples}, args.output)
+    for failure in report['failures']:
+        print(f"FAILED: {failure}")
+    if report['failures']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""
+Локальные заглушки внешних API для бенчмарков (без обращения к Яндексу и Telegram)
+
+Заглушки отвечают с заданной задержкой и могут отдавать долю ошибок 5xx
+и ответов 429 с retry_after — так проверяется поведение повторов, circuit
+breaker и ограничителей под нагрузкой.
+"""
+
+import json
+import time
+import uuid
+import random
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from typing import Any, Dict, List, Optional
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело уходят разными write(): без TCP_NODELAY каждый ответ ждет delayed ACK (~40 мс)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _send_json(self, status: int, payload: Any = None, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer:
+    """Базовый класс заглушки: HTTP-сервер в фоновом потоке"""
+
+    handler_class = _StubHandler
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            latency: Искусственная задержка ответа (сек)
+            error_rate: Доля ответов 500
+            rate_limit_rate: Доля ответов 429
+            retry_after: Значение retry_after в ответах 429 (сек)
+            host: Адрес
+            port: Порт (0 — любой свободный)
+            seed: Зерно генератора ошибок (для воспроизводимых прогонов)
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        handler = type('Handler', (self.handler_class,), {'stub': self})
+        # Большая очередь accept: бенчмарки открывают сотни соединений разом
+        server_class = type('Server', (ThreadingHTTPServer,), {'request_queue_size': 1024})
+        self.server = server_class((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def fault(self) -> Optional[str]:
+        """Учесть запрос и решить, отвечать ли ошибкой: 'error', 'rate_limit' или None"""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return 'error'
+        if roll < self.error_rate + self.rate_limit_rate:
+            return 'rate_limit'
+        return None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _TelemostHandler(_StubHandler):
+    stub: 'StubTelemostServer'
+
+    def _route(self, method: str):
+        time.sleep(self.stub.latency)
+        path = self.path.split('?', 1)[0].rstrip('/')
+        prefix = '/v1/telemost-api'
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+        parts = [p for p in path.split('/') if p]
+        body = self._read_json()
+
+        fault = self.stub.fault()
+        if fault == 'error':
+            return self._send_json(500, {'message': 'Internal server error'})
+        if fault == 'rate_limit':
+            return self._send_json(429, {'message': 'Too many requests'},
+                                   headers={'Retry-After': str(self.stub.retry_after)})
+
+        if parts == ['conferences']:
+            if method == 'POST':
+                return self._send_json(201, self.stub.create_conference(body or {}))
+            if method == 'GET':
+                query = parse_qs(urlsplit(self.path).query)
+                limit = int(query.get('limit', ['50'])[0])
+                offset = int(query.get('offset', ['0'])[0])
+                return self._send_json(200, {'conferences': list(self.stub.conferences.values())[offset:offset + limit]})
+
+        if len(parts) == 2 and parts[0] == 'conferences':
+            conference = self.stub.conferences.get(parts[1])
+            if conference is None:
+                return self._send_json(404, {'message': 'Conference not found'})
+            if method == 'GET':
+                return self._send_json(200, conference)
+            if method == 'PATCH':
+                conference.update(body or {})
+                return self._send_json(200, conference)
+            if method == 'DELETE':
+                self.stub.conferences.pop(parts[1], None)
+                return self._send_json(204)
+
+        if len(parts) >= 3 and parts[0] == 'conferences' and parts[2] == 'cohosts':
+            conference = self.stub.conferences.get(parts[1])
+            if conference is None:
+                return self._send_json(404, {'message': 'Conference not found'})
+            cohosts = conference.setdefault('cohosts', [])
+            if len(parts) == 4 and method == 'DELETE':
+                conference['cohosts'] = [c for c in cohosts if c['id'] != parts[3]]
+                return self._send_json(204)
+            if method == 'GET':
+                return self._send_json(200, {'cohosts': cohosts})
+            if method == 'PUT':
+                conference['cohosts'] = [{'id': str(i), **c} for i, c in enumerate((body or {}).get('cohosts', []))]
+                return self._send_json(200, {'cohosts': conference['cohosts']})
+            if method == 'POST':
+                cohost = {'id': str(len(cohosts)), 'email': (body or {}).get('email')}
+                cohosts.append(cohost)
+                return self._send_json(201, cohost)
+
+        if parts == ['default-settings']:
+            if method == 'PATCH':
+                self.stub.default_settings.update(body or {})
+            return self._send_json(200, self.stub.default_settings)
+
+        return self._send_json(404, {'message': 'Not found'})
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_PATCH(self):
+        self._route('PATCH')
+
+    def do_PUT(self):
+        self._route('PUT')
+
+    def do_DELETE(self):
+        self._route('DELETE')
+
+
+class StubTelemostServer(StubServer):
+    """Заглушка Telemost API: conferences, cohosts и default-settings"""
+
+    handler_class = _TelemostHandler
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.conferences: Dict[str, Dict[str, Any]] = {}
+        self.default_settings: Dict[str, Any] = {'waiting_room_level': 'PUBLIC'}
+
+    def create_conference(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        conference_id = str(uuid.uuid4().int)[:10]
+        conference = {
+            'id': conference_id,
+            'join_url': f"https://telemost.yandex.ru/j/{conference_id}",
+            'waiting_room_level': data.get('waiting_room_level', 'PUBLIC'),
+        }
+        if data.get('live_stream'):
+            conference['live_stream'] = {
+                **data['live_stream'],
+                'watch_url': f"https://telemost.yandex.ru/live/{conference_id}"
+            }
+        self.conferences[conference_id] = conference
+        return conference
+
+
+class _TelegramHandler(_StubHandler):
+    stub: 'StubTelegramServer'
+
+    def do_POST(self):
+        time.sleep(self.stub.latency)
+        # /bot<token>/<method>
+        _, _, rest = self.path.partition('/bot')
+        token, _, method = rest.partition('/')
+        body = self._read_json() or {}
+
+        fault = self.stub.fault()
+        if fault == 'error':
+            return self._send_json(500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'})
+        if fault == 'rate_limit':
+            return self._send_json(429, {
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.stub.retry_after}',
+                'parameters': {'retry_after': self.stub.retry_after}
+            })
+
+        result = self.stub.handle(token, method, body)
+        if result is None:
+            return self._send_json(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+        return self._send_json(200, {'ok': True, 'result': result})
+
+
+class StubTelegramServer(StubServer):
+    """Заглушка Telegram Bot API: getMe, sendMessage, editMessageText и служебные методы"""
+
+    handler_class = _TelegramHandler
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent: List[Dict[str, Any]] = []
+        self._message_ids = itertools.count(1)
+
+    def handle(self, token: str, method: str, data: Dict[str, Any]) -> Any:
+        bot_id = token.split(':', 1)[0]
+        if method == 'getMe':
+            return {'id': int(bot_id) if bot_id.isdigit() else 1, 'is_bot': True,
+                    'first_name': 'Stub', 'username': f'stub_{bot_id}_bot'}
+        if method in ('sendMessage', 'editMessageText'):
+            message = {
+                'message_id': data.get('message_id') or next(self._message_ids),
+                'chat': {'id': data.get('chat_id')},
+                'date': int(time.time()),
+                'text': data.get('text', ''),
+            }
+            if method == 'sendMessage':
+                self.sent.append(message)
+            return message
+        if method in ('answerCallbackQuery', 'answerInlineQuery', 'setWebhook', 'deleteWebhook'):
+            return True
+        if method == 'getUpdates':
+            return []
+        return None
+
+
+class _CassetteHandler(_StubHandler):
+    stub: 'CassetteStubServer'
+
+    def _replay(self):
+        self._read_json()
+        path, _, query = self.path.partition('?')
+        record = self.stub.cassette.match(self.command, path, query)
+        if record is None:
+            return self._send_json(404, {'message': 'No recorded response', 'ok': False})
+        if self.stub.replay_latency:
+            time.sleep(record['elapsed'])
+        body = record['body'].encode('utf-8')
+        self.send_response(record['status'])
+        for name, value in (record.get('headers') or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _replay
+
+
+class CassetteStubServer(StubServer):
+    """Заглушка, отвечающая записанными ответами кассеты (src.cassette) с записанной задержкой"""
+
+    handler_class = _CassetteHandler
+
+    def __init__(self, cassette, replay_latency: bool = True, *args, **kwargs):
+        """
+        Args:
+            cassette: src.cassette.Cassette
+            replay_latency: Выдерживать записанное время ответа
+        """
+        super().__init__(*args, **kwargs)
+        self.cassette = cassette
+        self.replay_latency = replay_latency
@@ -0,0 +1,73 @@
+"""
+Конфигурация gunicorn для production
+
+Запуск: gunicorn -c gunicorn.conf.py "src.main:create_app()"
+Плавный перезапуск воркеров: kill -HUP <pid мастера>
+"""
+
+import os
+import shutil
+import tempfile
+import multiprocessing
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+
+if worker_class == 'gevent':
+    # Патчим стандартную библиотеку до импорта приложения (preload_app):
+    # блокирующие сокеты requests, time.sleep, потоки и блокировки становятся
+    # кооперативными, и ожидание Telemost/Telegram не занимает воркер
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+# Процессы. Запросы в основном ждут Telemost/Telegram, поэтому в gevent-воркере
+# одновременно обслуживаются до worker_connections запросов; для gthread
+# параллелизм ограничен числом потоков
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+# Приложение импортируется один раз в мастере, воркеры стартуют форком.
+# С preload код не перечитывается по HUP — для выката новой версии нужен
+# полный перезапуск (или GUNICORN_PRELOAD=0)
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+# Таймауты и keep-alive
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Периодический перезапуск воркеров защищает от медленных утечек памяти
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+# Метрики Prometheus всех воркеров: каждый процесс пишет значения в свои файлы
+# в этом каталоге, /metrics в любом воркере суммирует их. Каталог задается до
+# импорта prometheus_client (то есть до загрузки приложения) и очищается только
+# при первом чтении конфигурации, а не при перезагрузке по HUP
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    metrics_dir = os.path.join(tempfile.gettempdir(), 'telemost-metrics')
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = metrics_dir
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+
+def child_exit(server, worker):
+    """Gauge завершившегося воркера больше не учитываются"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    """Соединения, открытые в мастере до fork, нельзя использовать в воркерах"""
+    from src.models.user import db
+
+    # Приложение уже создано в мастере (preload) или создается здесь, в воркере
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose()
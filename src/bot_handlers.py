@@ -0,0 +1,396 @@
+"""
+Обработка входящих обновлений Telegram: реестр команд и callback-кнопок
+"""
+
+import html
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from src import memory
+from src.metrics import QUEUE_DEPTH
+from src.storage import BotStateStore, MeetingStore
+from src.telegram_bot import TelegramBot, TelegramBotError
+from src.telemost_api import TelemostAPI, TelemostAPIError, TelemostValidationError
+from src.telemost_pool import get_telemost_pool
+
+logger = logging.getLogger(__name__)
+
+CommandHandler = Callable[[TelegramBot, Dict[str, Any], str], None]
+CallbackHandler = Callable[[TelegramBot, Dict[str, Any], str], None]
+UpdateHandler = Callable[[TelegramBot, Dict[str, Any]], None]
+
+
+class UpdateDispatcher:
+    """Реестр обработчиков и маршрутизация обновлений Telegram
+
+    Команды регистрируются по имени (без "/"), callback-кнопки — по префиксу
+    данных до двоеточия: кнопка с callback_data "meet:PUBLIC" попадет в
+    обработчик префикса "meet" с аргументом "PUBLIC". Остальные типы
+    обновлений (inline_query, chosen_inline_result и т.д.) регистрируются
+    по имени поля в объекте Update.
+    """
+
+    def __init__(self, bot: TelegramBot):
+        self.bot = bot
+        self._commands: Dict[str, CommandHandler] = {}
+        self._callbacks: Dict[str, CallbackHandler] = {}
+        self._update_handlers: Dict[str, UpdateHandler] = {}
+
+    def command(self, name: str) -> Callable[[CommandHandler], CommandHandler]:
+        """Декоратор регистрации обработчика команды"""
+        def decorator(func: CommandHandler) -> CommandHandler:
+            self._commands[name.lstrip('/').lower()] = func
+            return func
+        return decorator
+
+    def callback(self, prefix: str) -> Callable[[CallbackHandler], CallbackHandler]:
+        """Декоратор регистрации обработчика callback-кнопки"""
+        def decorator(func: CallbackHandler) -> CallbackHandler:
+            self._callbacks[prefix] = func
+            return func
+        return decorator
+
+    def on(self, update_type: str) -> Callable[[UpdateHandler], UpdateHandler]:
+        """Декоратор регистрации обработчика типа обновления"""
+        def decorator(func: UpdateHandler) -> UpdateHandler:
+            self._update_handlers[update_type] = func
+            return func
+        return decorator
+
+    @property
+    def update_types(self) -> List[str]:
+        """Типы обновлений, которые нужно запрашивать у Telegram"""
+        return ['message', 'callback_query'] + list(self._update_handlers)
+
+    def dispatch(self, update: Dict[str, Any]) -> bool:
+        """Передать обновление подходящему обработчику
+
+        Args:
+            update: Объект Update из Telegram
+
+        Returns:
+            True, если обработчик был найден и вызван
+        """
+        try:
+            if 'message' in update:
+                return self._dispatch_message(update['message'])
+            if 'callback_query' in update:
+                return self._dispatch_callback(update['callback_query'])
+            for update_type, handler in self._update_handlers.items():
+                if update_type in update:
+                    handler(self.bot, update[update_type])
+                    return True
+        except Exception:
+            logger.exception("Failed to handle update %s", update.get('update_id'))
+        return False
+
+    def _dispatch_message(self, message: Dict[str, Any]) -> bool:
+        text = message.get('text') or ''
+        if not text.startswith('/'):
+            return False
+
+        command, _, args = text[1:].partition(' ')
+        # Команды в группах приходят в виде /meet@botname
+        command = command.split('@', 1)[0].lower()
+
+        handler = self._commands.get(command)
+        if not handler:
+            return False
+
+        handler(self.bot, message, args.strip())
+        return True
+
+    def _dispatch_callback(self, callback_query: Dict[str, Any]) -> bool:
+        prefix, _, payload = (callback_query.get('data') or '').partition(':')
+
+        handler = self._callbacks.get(prefix)
+        if not handler:
+            try:
+                self.bot.answer_callback_query(callback_query['id'])
+            except TelegramBotError as e:
+                logger.warning("Failed to answer callback query: %s", e)
+            return False
+
+        handler(self.bot, callback_query, payload)
+        return True
+
+
+class UpdateWorkerPool:
+    """Очередь обновлений и пул потоков, которые передают их диспетчеру
+
+    Используется webhook-приемником: HTTP-обработчик только кладет обновление
+    в очередь, а медленные вызовы Telemost и Telegram выполняются в фоне.
+    Потоки запускаются при первой постановке в очередь, поэтому пул безопасно
+    создавать до fork() воркеров WSGI-сервера.
+
+    С state_store обновление до ответа Telegram сохраняется в базу
+    (pending_updates, как при long polling) и удаляется из нее после
+    обработки. Обновления процесса, завершившегося до обработки (перезапуск
+    воркера gunicorn по max_requests, падение), любой воркер забирает из базы
+    через lease секунд. Повторная доставка отбрасывается во всех процессах.
+    Обработка — «хотя бы один раз»: обновление, обрабатывавшееся дольше
+    lease, может быть обработано повторно.
+    """
+
+    def __init__(
+        self,
+        dispatcher: UpdateDispatcher,
+        workers: int = 8,
+        max_queue: int = 1000,
+        state_store: Optional[BotStateStore] = None,
+        lease: float = 120
+    ):
+        """
+        Args:
+            dispatcher: Реестр обработчиков
+            workers: Количество потоков-обработчиков
+            max_queue: Максимальная длина очереди
+            state_store: Хранилище необработанных обновлений (без него очередь только в памяти)
+            lease: Через сколько секунд необработанное обновление забирает другой процесс
+        """
+        self.dispatcher = dispatcher
+        self.workers = workers
+        self.state_store = state_store
+        self.lease = lease
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # Telegram повторяет доставку при таймаутах — отбрасываем дубликаты
+        self._recent_ids: Deque[int] = deque(maxlen=max_queue * 2)
+        self._recent_set: Set[int] = set()
+        self._depth = QUEUE_DEPTH.labels('telegram_updates')
+        memory.track('telegram_update_queue', self,
+                     lambda pool: {'items': pool.qsize(), 'recent_update_ids': len(pool._recent_set)})
+
+    def submit(self, update: Dict[str, Any]) -> bool:
+        """Поставить обновление в очередь
+
+        Returns:
+            False, если обновление не принято (очередь переполнена, а базы нет)
+
+        Raises:
+            sqlite3.Error: Если обновление не удалось сохранить в базу
+        """
+        self._ensure_started()
+
+        update_id = update.get('update_id')
+        with self._lock:
+            if update_id in self._recent_set:
+                return True
+            if len(self._recent_ids) == self._recent_ids.maxlen:
+                self._recent_set.discard(self._recent_ids[0])
+            self._recent_ids.append(update_id)
+            self._recent_set.add(update_id)
+
+        if self.state_store is not None:
+            try:
+                stored = self.state_store.add_update(update)
+            except Exception:
+                # Не сохранено: повторная доставка должна быть принята
+                with self._lock:
+                    self._recent_set.discard(update_id)
+                raise
+            if not stored:
+                # Уже принято этим или другим процессом
+                return True
+
+        try:
+            self._queue.put_nowait(update)
+            self._depth.inc()
+            return True
+        except queue.Full:
+            if self.state_store is not None:
+                logger.warning("Update queue is full, update %s will be resumed from the database", update_id)
+                return True
+            logger.warning("Update queue is full, dropping update %s", update_id)
+            with self._lock:
+                self._recent_set.discard(update_id)
+            return False
+
+    def qsize(self) -> int:
+        """Текущая длина очереди"""
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'tg-webhook-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.state_store is not None:
+                thread = threading.Thread(target=self._resume_loop, name='tg-webhook-resume', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            update = self._queue.get()
+            self._depth.dec()
+            try:
+                self.dispatcher.dispatch(update)
+                if self.state_store is not None:
+                    self.state_store.remove_pending(update['update_id'])
+            except Exception:
+                logger.exception("Failed to complete update %s", update.get('update_id'))
+            finally:
+                self._queue.task_done()
+
+    def _resume_loop(self):
+        while True:
+            try:
+                for update in self.state_store.claim_stale(time.time() - self.lease):
+                    logger.info("Resuming update %s left by another process", update['update_id'])
+                    self._queue.put(update)
+                    self._depth.inc()
+            except Exception as e:
+                logger.error("Failed to resume pending updates: %s", e)
+            time.sleep(self.lease / 2)
+
+
+# ===========================================
+# Обработчики по умолчанию
+# ===========================================
+
+_meeting_store: Optional[MeetingStore] = None
+_meeting_store_lock = threading.Lock()
+
+
+def get_telemost_client(user_id: Optional[int] = None) -> TelemostAPI:
+    """Получить клиент Telemost API организации пользователя
+
+    Пул клиентов создается при первом обращении; при нескольких токенах
+    выбирается наименее загруженный.
+
+    Args:
+        user_id: Пользователь Telegram (без него — организация по умолчанию)
+
+    Raises:
+        TelemostValidationError: Если организация пользователя не определена
+    """
+    telemost_pool = get_telemost_pool()
+    return telemost_pool.client(telemost_pool.tenant_for(user_id))
+
+
+def get_meeting_store() -> MeetingStore:
+    """Получить общее хранилище встреч"""
+    global _meeting_store
+    if _meeting_store is None:
+        with _meeting_store_lock:
+            if _meeting_store is None:
+                _meeting_store = MeetingStore()
+    return _meeting_store
+
+
+WAITING_ROOM_KEYBOARD = {
+    'inline_keyboard': [
+        [{'text': '🌍 Для всех', 'callback_data': 'meet:PUBLIC'}],
+        [{'text': '🏢 Для организации', 'callback_data': 'meet:ORGANIZATION'}],
+        [{'text': '🔒 Только администраторы', 'callback_data': 'meet:ADMINS'}],
+    ]
+}
+
+HELP_TEXT = (
+    "🎥 <b>Встречи в Яндекс Телемост</b>\n\n"
+    "/meet — создать встречу\n"
+    "/stream &lt;название&gt; — создать встречу с трансляцией\n"
+    "/help — эта справка"
+)
+
+
+def format_meeting_message(meeting: Dict[str, Any], title: Optional[str] = None) -> str:
+    """Сформировать текст сообщения о созданной встрече"""
+    message = "✅ <b>Встреча создана</b>\n\n"
+
+    if title:
+        message += f"📋 <b>Название:</b> {html.escape(title)}\n"
+
+    message += f"🔗 <b>Ссылка для подключения:</b>\n{meeting.get('join_url', '')}\n"
+
+    watch_url = (meeting.get('live_stream') or {}).get('watch_url')
+    if watch_url:
+        message += f"\n👀 <b>Трансляция:</b>\n{watch_url}\n"
+
+    return message
+
+
+def _reply_with_meeting(
+    bot: TelegramBot,
+    chat_id: Any,
+    owner_id: Optional[int],
+    create: Callable[[], Dict[str, Any]],
+    title: str = None
+):
+    """Создать встречу, сохранить ее за пользователем и ответить в чат"""
+    try:
+        meeting = create()
+        if owner_id and meeting.get('id'):
+            get_meeting_store().add(meeting, owner_id=owner_id, title=title)
+        bot.send_message(chat_id, format_meeting_message(meeting, title))
+        logger.info("Meeting %s created from chat %s", meeting.get('id'), chat_id)
+    except TelemostValidationError as e:
+        bot.send_message(chat_id, f"⚠️ {html.escape(str(e))}")
+    except TelemostAPIError as e:
+        logger.error("Failed to create meeting from chat %s: %s", chat_id, e)
+        bot.send_message(chat_id, "🚫 Не удалось создать встречу, попробуйте позже")
+
+
+def register_default_handlers(dispatcher: UpdateDispatcher) -> UpdateDispatcher:
+    """Зарегистрировать стандартные команды бота"""
+
+    @dispatcher.command('start')
+    @dispatcher.command('help')
+    def handle_help(bot: TelegramBot, message: Dict[str, Any], args: str):
+        bot.send_message(message['chat']['id'], HELP_TEXT, reply_markup=WAITING_ROOM_KEYBOARD)
+
+    @dispatcher.command('meet')
+    def handle_meet(bot: TelegramBot, message: Dict[str, Any], args: str):
+        chat_id = message['chat']['id']
+        user_id = message.get('from', {}).get('id')
+        level = args.upper()
+
+        if not level:
+            bot.send_message(chat_id, "Кого пускать во встречу без ожидания?", reply_markup=WAITING_ROOM_KEYBOARD)
+            return
+
+        _reply_with_meeting(
+            bot, chat_id, user_id,
+            lambda: get_telemost_client(user_id).create_meeting(waiting_room_level=level)
+        )
+
+    @dispatcher.command('stream')
+    def handle_stream(bot: TelegramBot, message: Dict[str, Any], args: str):
+        chat_id = message['chat']['id']
+        user_id = message.get('from', {}).get('id')
+
+        if not args:
+            bot.send_message(chat_id, "Укажите название трансляции: /stream &lt;название&gt;")
+            return
+
+        _reply_with_meeting(
+            bot, chat_id, user_id,
+            lambda: get_telemost_client(user_id).create_meeting_with_stream(stream_title=args),
+            title=args
+        )
+
+    @dispatcher.callback('meet')
+    def handle_meet_callback(bot: TelegramBot, callback_query: Dict[str, Any], payload: str):
+        bot.answer_callback_query(callback_query['id'], text="Создаю встречу…")
+
+        message = callback_query.get('message')
+        user_id = callback_query['from']['id']
+        chat_id = message['chat']['id'] if message else user_id
+
+        _reply_with_meeting(
+            bot, chat_id, user_id,
+            lambda: get_telemost_client(user_id).create_meeting(waiting_room_level=payload or 'PUBLIC')
+        )
+
+    return dispatcher
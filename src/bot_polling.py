@@ -0,0 +1,179 @@
+"""
+Получение обновлений Telegram через long polling (getUpdates)
+
+Запуск: python -m src.bot_polling
+"""
+
+import os
+import sys
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+# Позволяет запускать модуль как скрипт из корня проекта
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.bot_handlers import UpdateDispatcher, register_default_handlers
+from src.inline_mode import register_inline_handlers
+from src.reminders import get_reminder_scheduler
+from src.storage import BotStateStore
+from src.config import load_env
+from src.logging_setup import setup_logging
+from src.telegram_bot import TelegramBot, TelegramBotError, get_telegram_bot
+
+logger = logging.getLogger(__name__)
+
+OFFSET_KEY = 'updates_offset'
+
+
+class LongPollingRunner:
+    """Цикл getUpdates с сохранением offset и параллельной обработкой
+
+    Пачка обновлений раздается пулу потоков, поэтому медленные вызовы Telemost
+    не задерживают следующий getUpdates. Следующий getUpdates с большим offset
+    подтверждает Telegram всю пачку, в том числе еще не обработанные
+    обновления, — Telegram их больше не отдаст. Поэтому пачка до передачи в
+    обработку сохраняется в базу (таблица pending_updates) вместе с новым
+    offset, а обработанное обновление из нее удаляется. После перезапуска
+    необработанные обновления берутся из базы, завершенные повторно не
+    обрабатываются. Обновление, чья обработка завершилась, но не успела
+    отметиться в базе, будет обработано еще раз.
+    """
+
+    def __init__(
+        self,
+        bot: TelegramBot,
+        dispatcher: UpdateDispatcher,
+        state_store: Optional[BotStateStore] = None,
+        workers: int = 8,
+        poll_timeout: int = 30,
+        batch_limit: int = 100,
+        max_in_flight: int = 200
+    ):
+        """
+        Args:
+            bot: Клиент Telegram Bot API
+            dispatcher: Реестр обработчиков
+            state_store: Хранилище для offset и необработанных обновлений
+            workers: Количество потоков-обработчиков
+            poll_timeout: Время ожидания long polling (сек)
+            batch_limit: Максимум обновлений за один getUpdates
+            max_in_flight: Максимум обновлений в обработке одновременно
+        """
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.state_store = state_store or BotStateStore()
+        self.poll_timeout = poll_timeout
+        self.batch_limit = batch_limit
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tg-update')
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._stop = threading.Event()
+
+        stored = self.state_store.get(OFFSET_KEY)
+        self._next_offset: Optional[int] = int(stored) if stored else None
+
+    def poll_once(self) -> int:
+        """Получить одну пачку обновлений и поставить ее в обработку
+
+        Returns:
+            Количество полученных обновлений
+        """
+        updates = self.bot.get_updates(
+            offset=self._next_offset,
+            timeout=self.poll_timeout,
+            limit=self.batch_limit,
+            allowed_updates=self.dispatcher.update_types
+        )
+        if not updates:
+            return 0
+
+        # До следующего getUpdates: он подтвердит Telegram всю пачку
+        self._next_offset = max(update['update_id'] for update in updates) + 1
+        self.state_store.add_pending(updates, OFFSET_KEY, self._next_offset)
+
+        for update in updates:
+            self._submit(update)
+        return len(updates)
+
+    def resume_pending(self) -> int:
+        """Поставить в обработку обновления, не обработанные до перезапуска
+
+        Returns:
+            Количество обновлений
+        """
+        pending = self.state_store.pending()
+        if pending:
+            logger.info("Resuming %s unprocessed updates", len(pending))
+        for update in pending:
+            self._submit(update)
+        return len(pending)
+
+    def _submit(self, update: Dict[str, Any]):
+        # Ограничиваем число обновлений в работе, чтобы не копить очередь в памяти
+        self._slots.acquire()
+        self._executor.submit(self._process, update)
+
+    def _process(self, update: Dict[str, Any]):
+        try:
+            self.dispatcher.dispatch(update)
+            self.state_store.remove_pending(update['update_id'])
+        except Exception:
+            logger.exception("Failed to complete update %s", update.get('update_id'))
+        finally:
+            self._slots.release()
+
+    def run_forever(self):
+        """Основной цикл получения обновлений"""
+        self.bot.delete_webhook()
+        self.resume_pending()
+        logger.info("Long polling started (offset=%s)", self._next_offset)
+
+        backoff = 1
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.poll_once()
+                    backoff = 1
+                except TelegramBotError as e:
+                    logger.error("getUpdates failed: %s, retrying in %ss", e, backoff)
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, 60)
+        finally:
+            self._executor.shutdown(wait=True)
+            logger.info("Long polling stopped")
+
+    def stop(self):
+        """Остановить цикл после текущего запроса getUpdates"""
+        self._stop.set()
+
+
+def main():
+    """Запуск бота в режиме long polling"""
+    load_env()
+    setup_logging()
+
+    # Общий экземпляр: ответы и напоминания делят один лимит отправки
+    bot = get_telegram_bot()
+    if not bot.bot_token:
+        logger.error("TELEGRAM_BOT_TOKEN is required for polling")
+        sys.exit(1)
+
+    get_reminder_scheduler().start()
+    dispatcher = register_inline_handlers(register_default_handlers(UpdateDispatcher(bot)))
+    runner = LongPollingRunner(
+        bot,
+        dispatcher,
+        workers=int(os.getenv('BOT_WORKERS', 8)),
+        poll_timeout=int(os.getenv('BOT_POLL_TIMEOUT', 30))
+    )
+
+    try:
+        runner.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Interrupted")
+
+
+if __name__ == '__main__':
+    main()
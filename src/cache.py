@@ -0,0 +1,167 @@
+"""
+Кэширование результатов медленных вызовов (TTL, фоновое обновление, stale-while-revalidate)
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+from src import tracing
+from src.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class CachedValue(Generic[T]):
+    """Одно закэшированное значение с фоновым обновлением
+
+    - Пока значение моложе ttl, оно отдается без обращения к источнику.
+    - После refresh_after (доля ttl) значение еще отдается, но в фоне
+      запускается обновление — частые запросы никогда не ждут источник.
+    - Если источник недоступен, отдается последнее удачное значение, пока оно
+      моложе max_stale (stale-while-revalidate / stale-if-error).
+    - Одновременно выполняется не более одного обращения к источнику.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], T],
+        ttl: float = 60,
+        max_stale: float = 3600,
+        refresh_after: float = 0.8,
+        error_ttl: float = 5,
+        name: Optional[str] = None
+    ):
+        """
+        Args:
+            loader: Функция получения значения из источника
+            ttl: Время жизни значения в секундах
+            max_stale: Сколько секунд можно отдавать устаревшее значение при ошибках
+            refresh_after: Доля ttl, после которой запускается фоновое обновление
+            error_ttl: Сколько секунд повторять последнюю ошибку без обращения к источнику
+            name: Имя кэша для логов и статистики
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.refresh_after = refresh_after
+        self.error_ttl = error_ttl
+        self.name = name or getattr(loader, '__name__', 'cached_value')
+
+        self._value: Optional[T] = None
+        self._loaded_at: Optional[float] = None
+        self._last_error: Optional[Exception] = None
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._hit_counter = CACHE_REQUESTS.labels(self.name, 'hit')
+        self._stale_counter = CACHE_REQUESTS.labels(self.name, 'stale')
+        self._miss_counter = CACHE_REQUESTS.labels(self.name, 'miss')
+
+    @property
+    def age(self) -> Optional[float]:
+        """Возраст значения в секундах (None, если значения нет)"""
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    @property
+    def last_error(self) -> Optional[Exception]:
+        """Последняя ошибка обновления (None после удачного обновления)"""
+        return self._last_error
+
+    def get(self) -> T:
+        """Получить значение
+
+        Raises:
+            Exception: Ошибка источника, если отдать нечего
+        """
+        age = self.age
+
+        if age is not None and age < self.ttl:
+            self.hits += 1
+            self._hit_counter.inc()
+            tracing.add_event('cache.hit', cache=self.name)
+            if age >= self.ttl * self.refresh_after:
+                self._refresh_in_background()
+            return self._value
+
+        if age is not None and age < self.ttl + self.max_stale:
+            # Значение устарело: отдаем его сразу и обновляем в фоне
+            self.stale_hits += 1
+            self._stale_counter.inc()
+            tracing.add_event('cache.stale', cache=self.name)
+            self._refresh_in_background()
+            return self._value
+
+        self.misses += 1
+        self._miss_counter.inc()
+        tracing.add_event('cache.miss', cache=self.name)
+        with self._lock:
+            # Пока ждали блокировку, значение мог загрузить другой поток
+            age = self.age
+            if age is not None and age < self.ttl:
+                return self._value
+            # Не долбим недоступный источник на каждый запрос
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.error_ttl:
+                raise self._last_error
+            return self._load()
+
+    def is_stale(self) -> bool:
+        """Значение старше ttl (обновление не удалось или еще идет)"""
+        age = self.age
+        return age is None or age >= self.ttl
+
+    def invalidate(self) -> None:
+        """Сбросить значение"""
+        with self._lock:
+            self._value = None
+            self._loaded_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика использования кэша"""
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'age': round(self.age, 1) if self.age is not None else None
+        }
+
+    def _load(self) -> T:
+        try:
+            value = self.loader()
+        except Exception as e:
+            self._last_error = e
+            self._failed_at = time.monotonic()
+            raise
+        self._value = value
+        self._loaded_at = time.monotonic()
+        self._last_error = None
+        self._failed_at = None
+        return value
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.error_ttl:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                with self._lock:
+                    self._load()
+            except Exception as e:
+                logger.warning("Background refresh of %s failed: %s", self.name, e)
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name=f'refresh-{self.name}', daemon=True).start()
@@ -0,0 +1,250 @@
+"""
+Запись и воспроизведение HTTP-обмена с Telemost и Telegram (кассеты)
+
+Кассета — JSONL, сжатый gzip: одна строка на запрос с временем отправки,
+методом, путем, телом запроса, статусом, заголовками и телом ответа и
+временем ответа. Заголовки запроса (Authorization) не сохраняются, токен
+бота в пути /bot<token>/ заменяется на <id бота>:REDACTED, а значения
+секретных полей (secret_token, *token*, authorization, password) в query,
+JSON и form-теле запроса — на REDACTED. Остальные данные (имена, chat_id,
+тексты сообщений, ссылки на встречи) записываются как есть: кассета
+содержит персональные данные.
+
+RecordingAdapter пишет кассету, ReplayAdapter отвечает из нее без
+обращения к сети. Обмен записанного сервиса воспроизводится детерминированно:
+ответы на одинаковые запросы выдаются в порядке записи.
+"""
+
+import os
+import re
+import json
+import gzip
+import time
+import threading
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+_BOT_TOKEN = re.compile(r'/bot(\d+):[^/]+')
+_SECRET_KEY = re.compile(r'token|secret|password|authorization|api_key', re.IGNORECASE)
+_ID_SEGMENT = re.compile(r'(conferences|cohosts)/[^/]+')
+
+# Заголовки ответа, влияющие на поведение клиентов
+_KEPT_HEADERS = ('Content-Type', 'Retry-After')
+
+
+def redact_path(path: str) -> str:
+    """Путь без токена бота"""
+    return _BOT_TOKEN.sub(r'/bot\1:REDACTED', path)
+
+
+def _redact_query(query: str) -> str:
+    if not query:
+        return ''
+    return urlencode([(k, 'REDACTED' if _SECRET_KEY.search(k) else v) for k, v in parse_qsl(query, keep_blank_values=True)])
+
+
+def _redact_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: 'REDACTED' if _SECRET_KEY.search(str(k)) else _redact_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_value(item) for item in value]
+    return value
+
+
+def redact_body(body: Optional[str], content_type: str = '') -> Optional[str]:
+    """Тело запроса без значений секретных полей (JSON и form)"""
+    if not body:
+        return body
+    if 'application/x-www-form-urlencoded' in content_type:
+        return _redact_query(body)
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    return json.dumps(_redact_value(data), ensure_ascii=False)
+
+
+def service_of(path: str) -> str:
+    """Сервис записи по пути: telegram (/bot...) или telemost"""
+    return 'telegram' if path.startswith('/bot') else 'telemost'
+
+
+def read_cassette(*paths: str) -> List[Dict[str, Any]]:
+    """Прочитать одну или несколько кассет (например, по файлу на воркер) в порядке времени"""
+    records = []
+    for path in paths:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+    records.sort(key=lambda r: r['ts'])
+    return records
+
+
+class CassetteRecorder:
+    """Запись обмена в кассету из всех сессий процесса
+
+    В пути можно указать {pid}: у каждого воркера gunicorn будет свой файл.
+    Файл открывается при первой записи (после fork) и сбрасывается на диск
+    не чаще раза в секунду.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._pid: Optional[int] = None
+        self._flushed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response, started: float, elapsed: float) -> None:
+        url = urlsplit(request.url)
+        body = request.body
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', 'replace')
+        entry = {
+            'ts': round(started, 6),
+            'service': service_of(url.path),
+            'method': request.method,
+            'path': redact_path(url.path),
+            'query': _redact_query(url.query),
+            'request': redact_body(body, request.headers.get('Content-Type', '')),
+            'status': response.status_code,
+            'headers': {k: response.headers[k] for k in _KEPT_HEADERS if k in response.headers},
+            'body': response.content.decode('utf-8', 'replace'),
+            'elapsed': round(elapsed, 6),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+
+        with self._lock:
+            if self._file is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                path = self.path.format(pid=self._pid)
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Дописывание создает новый gzip-member — читается как один поток
+                self._file = gzip.open(path, 'at', encoding='utf-8')
+            self._file.write(line)
+            if time.monotonic() - self._flushed > 1:
+                self._file.flush()
+                self._flushed = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._file.close()
+            self._file = None
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter, который записывает каждый запрос и ответ в кассету"""
+
+    def __init__(self, recorder: CassetteRecorder, **kwargs):
+        self.recorder = recorder
+        super().__init__(**kwargs)
+
+    def send(self, request, *args, **kwargs):
+        started = time.time()
+        timer = time.perf_counter()
+        response = super().send(request, *args, **kwargs)
+        # Тело нужно целиком; потоковое чтение (список встреч без разбора) получит его из памяти
+        response.content
+        self.recorder.record(request, response, started, time.perf_counter() - timer)
+        return response
+
+
+class Cassette:
+    """Записанные ответы, сгруппированные по запросу
+
+    Ответы выдаются по ключу (метод, путь, query) в порядке записи; если
+    точного совпадения нет (другой id встречи), — по шаблону пути.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], loop: bool = True):
+        """
+        Args:
+            records: Записи кассеты
+            loop: Начинать очередь ответа заново, когда записи закончились
+        """
+        self.records = records
+        self.loop = loop
+        self._exact: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._template: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        for record in records:
+            self._exact[self._key(record['method'], record['path'], record['query'])].append(record)
+            self._template[self._template_key(record['method'], record['path'])].append(record)
+        self._used: Set[int] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(method: str, path: str, query: str) -> Tuple[str, str, str]:
+        return method, redact_path(path), query
+
+    @staticmethod
+    def _template_key(method: str, path: str) -> Tuple[str, str]:
+        return method, _ID_SEGMENT.sub(r'\1/{id}', redact_path(path))
+
+    def match(self, method: str, path: str, query: str = '') -> Optional[Dict[str, Any]]:
+        """Следующий записанный ответ на запрос (None, если такого не записано)"""
+        with self._lock:
+            for queue in (self._exact.get(self._key(method, path, _redact_query(query))),
+                          self._template.get(self._template_key(method, path))):
+                while queue:
+                    record = queue.popleft()
+                    if self.loop:
+                        queue.append(record)
+                    elif id(record) in self._used:
+                        # Запись уже выдана из другой очереди (точной или по шаблону)
+                        continue
+                    else:
+                        self._used.add(id(record))
+                    return record
+        return None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.records)
+
+
+def build_response(request: requests.PreparedRequest, record: Dict[str, Any]) -> requests.Response:
+    """Ответ requests из записи кассеты"""
+    response = requests.Response()
+    response.status_code = record['status']
+    response.headers = CaseInsensitiveDict(record.get('headers') or {})
+    response._content = record['body'].encode('utf-8')
+    # Тело уже в памяти: iter_content() и close() не обращаются к raw
+    response._content_consumed = True
+    response.encoding = 'utf-8'
+    response.url = request.url
+    response.request = request
+    response.reason = ''
+    return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """HTTPAdapter, который отвечает из кассеты, не обращаясь к сети"""
+
+    def __init__(self, cassette: Cassette, replay_latency: bool = False, **kwargs):
+        """
+        Args:
+            cassette: Кассета с ответами
+            replay_latency: Выдерживать записанное время ответа
+        """
+        self.cassette = cassette
+        self.replay_latency = replay_latency
+        super().__init__(**kwargs)
+
+    def send(self, request, *args, **kwargs):
+        url = urlsplit(request.url)
+        record = self.cassette.match(request.method, url.path, url.query)
+        if record is None:
+            raise requests.exceptions.ConnectionError(
+                f"No recorded response for {request.method} {redact_path(url.path)}", request=request
+            )
+        if self.replay_latency:
+            time.sleep(record['elapsed'])
+        return build_response(request, record)
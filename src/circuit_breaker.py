@@ -0,0 +1,85 @@
+"""
+Circuit breaker для вызовов внешних API
+"""
+
+import time
+import threading
+from typing import Any, Dict
+
+
+class CircuitBreaker:
+    """Простой circuit breaker: closed → open → half-open
+
+    После failure_threshold ошибок подряд цепь размыкается, и запросы
+    отклоняются без обращения к API в течение reset_timeout секунд. Затем
+    пропускается один пробный запрос: успех замыкает цепь, ошибка снова
+    размыкает ее.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Args:
+            failure_threshold: Количество ошибок подряд до размыкания
+            reset_timeout: Через сколько секунд пробовать снова
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние цепи"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def retry_after(self) -> float:
+        """Через сколько секунд цепь разрешит пробный запрос"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Можно ли выполнить запрос"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            # half-open: пропускаем только один пробный запрос
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """Учесть успешный запрос"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Учесть неудачный запрос"""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние для мониторинга"""
+        return {'state': self.state, 'failures': self._failures}
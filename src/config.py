@@ -0,0 +1,38 @@
+"""
+Загрузка конфигурации приложения
+"""
+
+import os
+import threading
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env() -> None:
+    """Загрузить .env в окружение процесса (один раз; уже заданные переменные не перезаписываются)"""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            load_dotenv()
+            _loaded = True
+
+
+def load_config() -> Dict[str, Any]:
+    """Конфигурация Flask-приложения из переменных окружения
+
+    Клиенты внешних API конфигурацию здесь не получают: они читают свои
+    переменные окружения при создании, то есть при первом использовании.
+    """
+    load_env()
+    database_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+    return {
+        'SECRET_KEY': os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT'),
+        'SQLALCHEMY_DATABASE_URI': os.getenv('DATABASE_URL', f"sqlite:///{database_path}"),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+    }
@@ -0,0 +1,199 @@
+"""
+Внедрение сбоев в обмен с Telemost и Telegram (chaos-тестирование)
+
+Сценарий — JSON-файл (FAULT_SCENARIO) со списком правил:
+
+    {
+      "seed": 1,
+      "faults": [
+        {"service": "telemost", "method": "POST", "path": "*/conferences",
+         "type": "status", "status": 503, "probability": 0.2, "start": 10, "end": 40},
+        {"service": "telegram", "path": "*/sendMessage", "type": "rate_limit",
+         "retry_after": 1, "probability": 0.05}
+      ]
+    }
+
+Типы сбоев:
+- latency — задержка delay (± jitter) секунд перед настоящим запросом;
+- timeout — ожидание delay секунд (по умолчанию таймаут запроса) и ReadTimeout;
+- status — ответ status (по умолчанию 503) без обращения к API;
+- rate_limit — ответ 429 с Retry-After (и parameters.retry_after у Telegram);
+- malformed_json — настоящий ответ с обрезанным телом;
+- reset — ConnectionError "Connection reset by peer".
+
+service, method и path (шаблон fnmatch по пути URL) ограничивают правило,
+start/end — окно в секундах от включения сценария. Для каждого запроса
+срабатывает первое правило, выпавшее с вероятностью probability.
+"""
+
+import json
+import time
+import random
+import fnmatch
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from src import metrics, tracing
+from src.cassette import build_response, service_of
+
+logger = logging.getLogger(__name__)
+
+FAULT_TYPES = ('latency', 'timeout', 'status', 'rate_limit', 'malformed_json', 'reset')
+
+
+class FaultRule:
+    """Правило сценария: какие запросы и какой сбой"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.type = spec['type']
+        if self.type not in FAULT_TYPES:
+            raise ValueError(f"Unknown fault type: {self.type}")
+        self.service = spec.get('service')
+        self.method = (spec.get('method') or '').upper() or None
+        self.path = spec.get('path')
+        self.probability = float(spec.get('probability', 1.0))
+        self.start = float(spec.get('start', 0))
+        self.end = float(spec['end']) if spec.get('end') is not None else None
+        self.delay = spec.get('delay')
+        self.jitter = float(spec.get('jitter', 0))
+        self.status = int(spec.get('status', 503))
+        self.retry_after = int(spec.get('retry_after', 1))
+
+    def matches(self, service: str, method: str, path: str, elapsed: float) -> bool:
+        if elapsed < self.start or (self.end is not None and elapsed >= self.end):
+            return False
+        if self.service and self.service != service:
+            return False
+        if self.method and self.method != method:
+            return False
+        return not self.path or fnmatch.fnmatchcase(path, self.path)
+
+
+class FaultInjector:
+    """Выбор сбоя для запроса по сценарию и учет внедренных сбоев"""
+
+    def __init__(self, rules: List[FaultRule], seed: Optional[int] = None, name: str = 'faults'):
+        """
+        Args:
+            rules: Правила в порядке приоритета
+            seed: Зерно генератора (воспроизводимые прогоны)
+            name: Название сценария для логов
+        """
+        self.rules = rules
+        self.name = name
+        self.enabled = True
+        self._random = random.Random(seed)
+        self._started = time.monotonic()
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> 'FaultInjector':
+        """Загрузить сценарий из JSON-файла"""
+        with open(path) as f:
+            scenario = json.load(f)
+        return cls(
+            [FaultRule(spec) for spec in scenario.get('faults', [])],
+            seed=scenario.get('seed'),
+            name=scenario.get('name', path)
+        )
+
+    def reset(self) -> None:
+        """Начать окна правил (start/end) заново и обнулить счетчики"""
+        with self._lock:
+            self._started = time.monotonic()
+            self._counts = {}
+
+    def choose(self, service: str, method: str, path: str) -> Optional[FaultRule]:
+        """Сбой для запроса (None — выполнить запрос как есть)"""
+        if not self.enabled:
+            return None
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            for rule in self.rules:
+                if rule.matches(service, method, path, elapsed) and self._random.random() < rule.probability:
+                    key = f"{service} {rule.type}"
+                    self._counts[key] = self._counts.get(key, 0) + 1
+                    return rule
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Число внедренных сбоев по сервису и типу"""
+        with self._lock:
+            return dict(self._counts)
+
+
+def _error_body(service: str, status: int, message: str, retry_after: Optional[int] = None) -> str:
+    if service == 'telegram':
+        body: Dict[str, Any] = {'ok': False, 'error_code': status, 'description': message}
+        if retry_after:
+            body['parameters'] = {'retry_after': retry_after}
+    else:
+        body = {'error': 'InjectedFault', 'message': message}
+    return json.dumps(body)
+
+
+class FaultInjectingAdapter(BaseAdapter):
+    """Адаптер requests, который внедряет сбои перед обычным адаптером"""
+
+    def __init__(self, adapter: BaseAdapter, injector: FaultInjector):
+        """
+        Args:
+            adapter: Адаптер, выполняющий запросы
+            injector: Сценарий сбоев
+        """
+        super().__init__()
+        self.adapter = adapter
+        self.injector = injector
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        path = urlsplit(request.url).path
+        service = service_of(path)
+        rule = self.injector.choose(service, request.method, path)
+
+        def forward():
+            return self.adapter.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+        if rule is None:
+            return forward()
+
+        metrics.FAULTS_INJECTED.labels(service, rule.type).inc()
+        tracing.add_event('fault_injected', fault=rule.type)
+        logger.debug("Injecting %s into %s %s", rule.type, request.method, path)
+
+        if rule.type == 'latency':
+            time.sleep(max(0.0, float(rule.delay or 1) + random.uniform(-rule.jitter, rule.jitter)))
+            return forward()
+        if rule.type == 'timeout':
+            read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+            time.sleep(float(rule.delay if rule.delay is not None else read_timeout or 30))
+            raise requests.exceptions.ReadTimeout(f"Injected read timeout ({rule.delay or read_timeout}s)", request=request)
+        if rule.type == 'reset':
+            raise requests.exceptions.ConnectionError(
+                ConnectionResetError(104, 'Connection reset by peer (injected)'), request=request
+            )
+        if rule.type == 'malformed_json':
+            response = forward()
+            response._content = response.content[:len(response.content) // 2] or b'{'
+            return response
+
+        if rule.type == 'rate_limit':
+            status, retry_after, headers = 429, rule.retry_after, {'Retry-After': str(rule.retry_after)}
+            message = f"Too Many Requests: retry after {rule.retry_after}"
+        else:
+            status, retry_after, headers = rule.status, None, {}
+            message = f"Injected error {rule.status}"
+        headers['Content-Type'] = 'application/json'
+        return build_response(request, {
+            'status': status,
+            'headers': headers,
+            'body': _error_body(service, status, message, retry_after),
+        })
+
+    def close(self):
+        self.adapter.close()
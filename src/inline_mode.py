@@ -0,0 +1,306 @@
+"""
+Inline-режим бота: «@bot» в любом чате предлагает новую встречу и последние встречи пользователя
+"""
+
+import os
+import html
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src import memory
+from src.bot_handlers import UpdateDispatcher, get_meeting_store, get_telemost_client
+from src.metrics import CACHE_REQUESTS, INLINE_QUERY_LATENCY
+from src.storage import MeetingStore
+from src.telegram_bot import TelegramBot, TelegramBotError
+from src.telemost_pool import get_telemost_pool
+from src.telemost_api import TelemostAPIError
+
+logger = logging.getLogger(__name__)
+
+NEW_MEETING_PREFIX = 'new:'
+RECENT_MEETING_PREFIX = 'recent:'
+
+
+class RecentMeetingsCache:
+    """Кэш последних встреч пользователей поверх MeetingStore (LRU + TTL)"""
+
+    def __init__(self, store: MeetingStore, ttl: float = 60, max_users: int = 10000, limit: int = 10):
+        self.store = store
+        self.ttl = ttl
+        self.max_users = max_users
+        self.limit = limit
+        self._entries: "OrderedDict[int, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hit_counter = CACHE_REQUESTS.labels('recent_meetings', 'hit')
+        self._miss_counter = CACHE_REQUESTS.labels('recent_meetings', 'miss')
+        memory.track('recent_meetings_cache', self)
+
+    def get(self, user_id: int) -> List[Dict[str, Any]]:
+        """Последние встречи пользователя"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self._hit_counter.inc()
+                return entry[1]
+
+        self._miss_counter.inc()
+        meetings = self.store.recent(user_id, self.limit)
+
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, meetings)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+        return meetings
+
+    def invalidate(self, user_id: int) -> None:
+        """Сбросить кэш пользователя (после создания новой встречи)"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Число пользователей в кэше и оценка памяти"""
+        with self._lock:
+            entries = list(self._entries.items())
+        return {'items': len(entries), 'bytes': memory.deep_sizeof(entries)}
+
+
+class RoomPool:
+    """«Теплый» пул заранее созданных комнат Telemost
+
+    Свободные комнаты хранятся в MeetingStore без владельца, поэтому переживают
+    перезапуск и общие для всех процессов. Фоновый поток пополняет пул до
+    target_size; если пул пуст, комната создается синхронно. Комнаты пула
+    создаются токеном организации по умолчанию, пользователям других
+    организаций комната создается их токеном.
+    """
+
+    def __init__(self, store: MeetingStore, target_size: int = 5):
+        self.store = store
+        self.target_size = target_size
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Комнаты хранятся в MeetingStore (общем для воркеров): учитывается их число, а не память процесса
+        memory.track('room_pool', self, lambda pool: {'items': pool.store.count_unclaimed()})
+
+    def take(self, owner_id: int, title: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Выдать комнату пользователю
+
+        Returns:
+            Данные встречи или None, если создать комнату не удалось
+        """
+        try:
+            telemost_pool = get_telemost_pool()
+            tenant = telemost_pool.tenant_for(owner_id)
+            if tenant is not None and tenant == telemost_pool.default_tenant:
+                self._ensure_started()
+                meeting = self.store.claim(owner_id, title)
+                self._wakeup.set()
+                if meeting:
+                    return meeting
+                logger.warning("Room pool is empty, creating meeting synchronously")
+
+            meeting = get_telemost_client(owner_id).create_meeting()
+        except TelemostAPIError as e:
+            logger.error("Failed to create meeting for inline query: %s", e)
+            return None
+
+        self.store.add(meeting, owner_id=owner_id, title=title)
+        return meeting
+
+    def _ensure_started(self):
+        if self._thread is not None or self.target_size <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refill_loop, name='room-pool', daemon=True)
+                self._thread.start()
+
+    def _refill_loop(self):
+        while True:
+            try:
+                missing = self.target_size - self.store.count_unclaimed()
+                for _ in range(max(missing, 0)):
+                    meeting = get_telemost_client().create_meeting()
+                    self.store.add(meeting)
+                    logger.info("Room %s added to pool", meeting.get('id'))
+            except Exception as e:
+                logger.error("Failed to refill room pool: %s", e)
+                time.sleep(30)
+
+            self._wakeup.wait(timeout=300)
+            self._wakeup.clear()
+
+
+class InlineQueryHandler:
+    """Ответ на inline-запросы из кэша и пула комнат
+
+    Комната, предложенная пользователю, хранится в MeetingStore (общем для
+    воркеров) offer_ttl секунд: пока пользователь набирает запрос, ему
+    предлагается та же комната. Истекшие предложения удаляются; с включенным
+    inline feedback (INLINE_FEEDBACK=1, /setinlinefeedback) отправленная
+    комната снимает предложение сразу, поэтому комнаты истекших предложений
+    не использованы и возвращаются в пул. Без feedback неизвестно, отправил
+    ли пользователь комнату, и она остается у него (в списке последних встреч).
+    """
+
+    # Как часто процесс удаляет истекшие предложения (сек)
+    EXPIRE_INTERVAL = 60
+
+    def __init__(
+        self,
+        store: Optional[MeetingStore] = None,
+        pool_size: Optional[int] = None,
+        cache_time: Optional[int] = None,
+        offer_ttl: Optional[float] = None,
+        feedback: Optional[bool] = None
+    ):
+        """
+        Args:
+            store: Хранилище встреч
+            pool_size: Размер пула комнат (INLINE_POOL_SIZE)
+            cache_time: Время кэширования ответа на стороне Telegram (INLINE_CACHE_TIME)
+            offer_ttl: Сколько предлагать пользователю одну комнату, сек (INLINE_OFFER_TTL)
+            feedback: Включен ли inline feedback в BotFather (INLINE_FEEDBACK)
+        """
+        self.store = store or get_meeting_store()
+        self.recent = RecentMeetingsCache(self.store)
+        self.pool = RoomPool(self.store, pool_size if pool_size is not None else int(os.getenv('INLINE_POOL_SIZE', 5)))
+        # Результаты персональные и включают свежую комнату, поэтому кэшируем ненадолго
+        self.cache_time = cache_time if cache_time is not None else int(os.getenv('INLINE_CACHE_TIME', 10))
+        self.offer_ttl = offer_ttl if offer_ttl is not None else float(os.getenv('INLINE_OFFER_TTL', 300))
+        self.feedback = feedback if feedback is not None else os.getenv('INLINE_FEEDBACK', '0') == '1'
+        self._next_expiry = 0.0
+        self._lock = threading.Lock()
+        memory.track('inline_offers', self, lambda handler: {'items': handler.store.count_offers()})
+
+    def handle_inline_query(self, bot: TelegramBot, inline_query: Dict[str, Any]):
+        """Обработка update.inline_query"""
+        started = time.perf_counter()
+        user_id = inline_query['from']['id']
+        query = inline_query.get('query', '').strip()
+
+        self._expire_offers()
+        results = []
+
+        meeting = self.store.offered(user_id)
+        if meeting is None:
+            meeting = self.pool.take(user_id)
+            if meeting:
+                self.store.set_offer(user_id, meeting['id'], self.offer_ttl)
+                self.recent.invalidate(user_id)
+
+        if meeting:
+            results.append(self._new_meeting_result(meeting, query))
+
+        for recent in self.recent.get(user_id):
+            if meeting and recent['id'] == meeting.get('id'):
+                continue
+            if query and query.lower() not in (recent.get('title') or '').lower():
+                continue
+            results.append(self._recent_meeting_result(recent))
+
+        try:
+            bot.answer_inline_query(
+                inline_query['id'],
+                results[:50],
+                cache_time=self.cache_time,
+                is_personal=True
+            )
+        except TelegramBotError as e:
+            logger.error("Failed to answer inline query: %s", e)
+        finally:
+            INLINE_QUERY_LATENCY.observe(time.perf_counter() - started)
+
+    def handle_chosen_result(self, bot: TelegramBot, chosen: Dict[str, Any]):
+        """Обработка update.chosen_inline_result (нужен /setinlinefeedback в BotFather)"""
+        if not chosen.get('result_id', '').startswith(NEW_MEETING_PREFIX):
+            return
+
+        user_id = chosen['from']['id']
+        self.store.clear_offer(user_id)
+        self.recent.invalidate(user_id)
+
+    def _expire_offers(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_expiry:
+                return
+            self._next_expiry = now + self.EXPIRE_INTERVAL
+        try:
+            expired = self.store.expire_offers(release=self.feedback)
+        except Exception as e:
+            logger.error("Failed to expire inline offers: %s", e)
+            return
+        if expired:
+            logger.info("Expired %s inline offers (returned to pool: %s)", expired, self.feedback)
+
+    @staticmethod
+    def _article(result_id: str, title: str, description: str, join_url: str, text: str) -> Dict[str, Any]:
+        return {
+            'type': 'article',
+            'id': result_id[:64],
+            'title': title,
+            'description': description,
+            'input_message_content': {
+                'message_text': text,
+                'parse_mode': 'HTML',
+                'disable_web_page_preview': True
+            },
+            'reply_markup': {
+                'inline_keyboard': [[{'text': '🎥 Присоединиться', 'url': join_url}]]
+            }
+        }
+
+    def _new_meeting_result(self, meeting: Dict[str, Any], query: str) -> Dict[str, Any]:
+        join_url = meeting.get('join_url', '')
+        title = query or 'Встреча в Telemost'
+        text = f"🎥 <b>{html.escape(title)}</b>\n\n🔗 {join_url}"
+        return self._article(
+            NEW_MEETING_PREFIX + str(meeting.get('id')),
+            '➕ Создать встречу Telemost',
+            title,
+            join_url,
+            text
+        )
+
+    def _recent_meeting_result(self, meeting: Dict[str, Any]) -> Dict[str, Any]:
+        title = meeting.get('title') or 'Встреча в Telemost'
+        created = time.strftime('%d.%m %H:%M', time.localtime(meeting['created_at']))
+        text = f"🎥 <b>{html.escape(title)}</b>\n\n🔗 {meeting['join_url']}"
+        return self._article(
+            RECENT_MEETING_PREFIX + str(meeting['id']),
+            f"🕘 {title}",
+            f"Создана {created}",
+            meeting['join_url'],
+            text
+        )
+
+
+_inline_handler: Optional[InlineQueryHandler] = None
+_inline_handler_lock = threading.Lock()
+
+
+def get_inline_handler() -> InlineQueryHandler:
+    """Общий обработчик inline-запросов процесса"""
+    global _inline_handler
+    if _inline_handler is None:
+        with _inline_handler_lock:
+            if _inline_handler is None:
+                _inline_handler = InlineQueryHandler()
+    return _inline_handler
+
+
+def register_inline_handlers(dispatcher: UpdateDispatcher) -> UpdateDispatcher:
+    """Зарегистрировать обработчики inline-режима"""
+    handler = get_inline_handler()
+    dispatcher.on('inline_query')(handler.handle_inline_query)
+    dispatcher.on('chosen_inline_result')(handler.handle_chosen_result)
+    return dispatcher
@@ -0,0 +1,134 @@
+"""
+Быстрая сериализация JSON: ответы Flask и разбор ответов внешних API
+
+Бэкенд выбирается переменной JSON_BACKEND:
+- auto (по умолчанию) — orjson, если установлен, иначе стандартный json;
+- orjson — orjson (без пакета — стандартный json с предупреждением в логе);
+- json — стандартный json.
+
+Вывод orjson совпадает с DefaultJSONProvider Flask по смыслу (ключи
+отсортированы, даты — в формате HTTP, dataclass и UUID поддерживаются),
+но не экранирует не-ASCII символы: тело ответа — UTF-8. Объекты, которые
+orjson не умеет сериализовать (например, целые больше 64 бит),
+сериализуются стандартным json.
+"""
+
+import os
+import json
+import logging
+from typing import Any, Optional, Union
+
+import requests
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'orjson', 'json')
+
+_backend: Optional[str] = None
+
+
+def resolve_backend(name: str) -> str:
+    """Бэкенд по названию из JSON_BACKEND: 'orjson' или 'json'
+
+    Raises:
+        ValueError: При неизвестном названии
+    """
+    name = (name or 'auto').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"JSON_BACKEND must be one of {', '.join(BACKENDS)}")
+    if name == 'json':
+        return 'json'
+    if orjson is None:
+        if name == 'orjson':
+            logger.warning("JSON_BACKEND=orjson, but orjson is not installed; using json")
+        return 'json'
+    return 'orjson'
+
+
+def get_backend() -> str:
+    """Бэкенд процесса (JSON_BACKEND читается при первом вызове)"""
+    global _backend
+    if _backend is None:
+        _backend = resolve_backend(os.getenv('JSON_BACKEND', 'auto'))
+    return _backend
+
+
+def use_backend(name: str) -> str:
+    """Сменить бэкенд процесса (бенчмарки); уже созданные приложения Flask не меняются"""
+    global _backend
+    _backend = resolve_backend(name)
+    return _backend
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Разобрать JSON из строки или байтов UTF-8"""
+    if get_backend() == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def loads_response(response: requests.Response) -> Any:
+    """Тело ответа requests как JSON (замена response.json())
+
+    Raises:
+        requests.exceptions.JSONDecodeError: Если тело — не JSON (как response.json())
+    """
+    try:
+        return loads(response.content)
+    except ValueError as e:
+        raise requests.exceptions.JSONDecodeError(
+            getattr(e, 'msg', str(e)), response.text, getattr(e, 'pos', 0)
+        ) from e
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON-провайдер Flask на orjson
+
+    Настройки DefaultJSONProvider (sort_keys, compact, default) сохраняют
+    смысл; ensure_ascii не поддерживается — orjson всегда пишет UTF-8.
+    """
+
+    def _options(self, indent: bool = False) -> int:
+        # Даты передаются в default: Flask пишет их в формате HTTP, а не ISO 8601
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options(indent))
+        except TypeError:
+            # Целые больше 64 бит и другие случаи, которые orjson не поддерживает
+            kwargs = {'indent': 2} if indent else {'separators': (',', ':')}
+            return super().dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def init_app(app: Flask) -> None:
+    """Подключить orjson к jsonify и request.get_json(), если выбран этот бэкенд"""
+    if get_backend() == 'orjson':
+        app.json = FastJSONProvider(app)
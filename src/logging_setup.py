@@ -0,0 +1,206 @@
+"""
+Настройка логирования: неблокирующая запись через очередь, JSON, сэмплирование
+
+Обработчик на корневом логгере только кладет запись в очередь; форматирование
+и запись в stderr выполняет отдельный поток QueueListener, поэтому медленный
+stderr (pipe в docker, journald) не задерживает обработку запросов.
+
+Под gevent (monkey.patch_all в gunicorn.conf.py) QueueListener — гринлет
+в том же потоке ОС: запись в stderr по-прежнему блокирует цикл событий
+воркера. Очередь лишь переносит ее за пределы обработки запроса и
+сглаживает всплески.
+
+После fork (gunicorn с preload) поток записи в дочернем процессе не существует
+— он перезапускается при первой записи в лог с новой очередью: очередь
+родителя может содержать его записи (они попали бы в лог повторно), а ее
+блокировка — оказаться захваченной потоком, которого в дочернем процессе нет.
+"""
+
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from src import memory
+
+# Стандартные атрибуты LogRecord — все остальные попали в запись через extra=
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+_restart_in_child = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON: время, уровень, логгер, сообщение, extra и трассировка"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только долю записей уровня INFO и ниже; WARNING и выше — всегда"""
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate: Доля сохраняемых записей (0..1)
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler, который оставляет форматирование записи потоку записи
+
+    Как и стандартный QueueHandler.prepare(), в вызывающем потоке
+    подставляются аргументы (msg % args) — изменяемые объекты в args могут
+    измениться до записи — и отрисовывается трассировка исключения (фреймы
+    нельзя держать в очереди). Сборку строки JSON или текста выполняет
+    поток записи.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if _restart_in_child:
+            _restart_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Поток записи не успевает: теряем запись, а не блокируем запрос
+            pass
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    sample_rate: Optional[float] = None,
+    stream=None
+) -> None:
+    """Настроить логирование процесса (повторный вызов ничего не делает)
+
+    Args:
+        level: Уровень (по умолчанию LOG_LEVEL или INFO)
+        fmt: Формат вывода: json или text (по умолчанию LOG_FORMAT или json)
+        sample_rate: Доля сохраняемых INFO-записей (по умолчанию LOG_SAMPLE_RATE или 1)
+        stream: Куда писать (по умолчанию stderr)
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+        fmt = fmt or os.getenv('LOG_FORMAT', 'json')
+        sample_rate = sample_rate if sample_rate is not None else float(os.getenv('LOG_SAMPLE_RATE', 1))
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        if fmt == 'json':
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', 10000)))
+        handler = DeferredQueueHandler(log_queue)
+        # Учитывается очередь обработчика, а не объект: после fork она заменяется
+        memory.track('log_queue', handler, lambda h: {'items': h.queue.qsize()})
+        if sample_rate < 1:
+            handler.addFilter(SamplingFilter(sample_rate))
+
+        root = logging.getLogger()
+        for existing in root.handlers[:]:
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        os.register_at_fork(
+            before=_before_fork,
+            after_in_parent=_after_fork_in_parent,
+            after_in_child=_after_fork_in_child
+        )
+
+
+def _before_fork() -> None:
+    # fork посреди записи оставил бы в дочернем процессе захваченный буфер потока вывода
+    if _listener is not None:
+        for handler in _listener.handlers:
+            handler.acquire()
+
+
+def _after_fork_in_parent() -> None:
+    if _listener is not None:
+        for handler in _listener.handlers:
+            handler.release()
+
+
+def _after_fork_in_child() -> None:
+    global _lock, _restart_in_child
+    # Блокировка могла быть захвачена другим потоком родителя в момент fork
+    _lock = threading.Lock()
+    _restart_in_child = True
+    if _listener is not None:
+        for handler in _listener.handlers:
+            handler.createLock()
+        # Под gevent гринлет записи родителя продолжает работать и в дочернем
+        # процессе: без очистки он повторно записал бы оставшиеся в очереди записи.
+        # Блокировку очереди не берем — ее мог держать поток, которого больше нет
+        _listener.queue.queue.clear()
+
+
+def _restart_listener() -> None:
+    global _listener, _restart_in_child
+    with _lock:
+        if not _restart_in_child:
+            return
+        _restart_in_child = False
+        if _listener is not None:
+            log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=_listener.queue.maxsize)
+            for handler in logging.getLogger().handlers:
+                if isinstance(handler, DeferredQueueHandler):
+                    handler.queue = log_queue
+            _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+            _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Дописать записи из очереди и остановить поток записи"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
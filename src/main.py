@@ -3,52 +3,94 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-# Отключаем resource tracker для предотвращения предупреждений о leaked semaphore objects
-# Это безопасно для development среды, но в production лучше использовать gunicorn
-os.environ['PYTHONWARNINGS'] = 'ignore::UserWarning:multiprocessing.resource_tracker'
-
-# Альтернативное решение: отключение multiprocessing resource tracker полностью
-import multiprocessing
-multiprocessing.set_start_method('spawn', force=True)
-
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from src.config import load_config
+from src.logging_setup import setup_logging
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.meetings import meetings_bp
+from src.routes.webhook import webhook_bp
+from src.routes.metrics import metrics_bp
+from src.routes.admin import admin_bp
+from src.static_assets import StaticAssets
+from src import json_provider, profiling, tracing, webapp_auth
+
+
+def create_app() -> Flask:
+    """Создание приложения
+
+    Конфигурация загружается один раз здесь. Клиенты Telemost и Telegram,
+    таблицы базы и фоновые потоки создаются при первом использовании,
+    поэтому создание приложения не обращается к сети.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config.update(load_config())
+    setup_logging()
+    json_provider.init_app(app)
+
+    # За reverse proxy (nginx) адрес клиента берется из X-Forwarded-For
+    trusted_proxies = int(os.getenv('TRUSTED_PROXIES', 0))
+    if trusted_proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies)
+
+    # Первым: профиль охватывает все остальные обработчики запроса
+    profiling.init_app(app)
+    # До проверки initData: отклоненные запросы (401) тоже попадают в метрики
+    app.register_blueprint(metrics_bp)
+
+    # Web App открывается с того же домена; другие источники — только из CORS_ORIGINS
+    cors_origins = [o.strip() for o in os.getenv('CORS_ORIGINS', '').split(',') if o.strip()]
+    if cors_origins:
+        CORS(app, resources={r'/api/*': {'origins': cors_origins}},
+             allow_headers=['Content-Type', webapp_auth.INIT_DATA_HEADER, 'X-Tenant'])
+    tracing.init_app(app)
+    webapp_auth.init_app(app)
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Включаем CORS для всех доменов
-CORS(app)
-
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(meetings_bp, url_prefix='/api')
-
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(meetings_bp, url_prefix='/api')
+    app.register_blueprint(webhook_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+
+    db.init_app(app)
+
+    # Собранная статика (python -m src.static_assets) загружается в память один раз при старте
+    static_assets = StaticAssets(app.static_folder)
+    app.extensions['static_assets'] = static_assets
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        response = static_assets.response(path) if path else None
+        if response is None:
+            # Неизвестные пути отдают страницу Web App
+            response = static_assets.response('index.html')
+        if response is None:
             return "index.html not found", 404
+        return response
+
+    return app
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Сервер разработки. В production приложение запускается через gunicorn (см. gunicorn.conf.py)
+
+    # Отключаем resource tracker для предотвращения предупреждений о leaked semaphore objects
+    os.environ['PYTHONWARNINGS'] = 'ignore::UserWarning:multiprocessing.resource_tracker'
+
+    import multiprocessing
+    multiprocessing.set_start_method('spawn', force=True)
+
+    app = create_app()
+    debug = os.getenv('FLASK_DEBUG', '1') == '1'
+    if debug and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # Правки в src/static подхватываются без перезапуска. Reloader запускает
+        # приложение в дочернем процессе: следить за файлами нужно только в нем
+        app.extensions['static_assets'].watch()
+
+    app.run(
+        host=os.getenv('HOST', '0.0.0.0'),
+        port=int(os.getenv('PORT', 5001)),
+        debug=debug
+    )
@@ -0,0 +1,215 @@
+"""
+Диагностика памяти: снимки tracemalloc и размеры внутренних структур
+
+Кэши, очереди и пулы регистрируются через track() при создании (по слабой
+ссылке — регистрация не продлевает им жизнь), structure_sizes() сообщает
+число элементов и оценку занимаемой памяти по каждой структуре.
+
+tracemalloc включается по требованию (он замедляет выделение памяти в
+несколько раз); снимки хранятся в процессе и сравниваются между собой.
+Все данные относятся к одному процессу: под gunicorn каждый воркер
+отвечает за себя (pid есть в ответах).
+"""
+
+import os
+import gc
+import sys
+import time
+import itertools
+import threading
+import tracemalloc
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+# Файлы, чьи выделения не интересны: сам tracemalloc и загрузчик модулей
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+GROUP_BY = ('lineno', 'filename', 'traceback')
+
+_structures: Dict[str, "weakref.WeakKeyDictionary[Any, Callable[[Any], Dict[str, int]]]"] = {}
+_structures_lock = threading.Lock()
+
+
+def track(name: str, obj: Any, sizer: Optional[Callable[[Any], Dict[str, int]]] = None) -> None:
+    """Учитывать структуру в structure_sizes()
+
+    Args:
+        name: Название (экземпляры с одним названием суммируются)
+        obj: Объект структуры
+        sizer: Функция obj -> {'items': ..., 'bytes': ...}; по умолчанию obj.memory_usage()
+    """
+    with _structures_lock:
+        _structures.setdefault(name, weakref.WeakKeyDictionary())[obj] = sizer or type(obj).memory_usage
+
+
+def structure_sizes() -> Dict[str, Dict[str, int]]:
+    """Размеры зарегистрированных структур: экземпляры, элементы и байты (оценка)"""
+    with _structures_lock:
+        registered = {name: list(instances.items()) for name, instances in _structures.items()}
+    sizes = {}
+    for name, instances in sorted(registered.items()):
+        total: Dict[str, int] = {'instances': len(instances)}
+        for obj, sizer in instances:
+            for key, value in sizer(obj).items():
+                total[key] = total.get(key, 0) + value
+        sizes[name] = total
+    return sizes
+
+
+def deep_sizeof(obj: Any, limit: int = 100000) -> int:
+    """Оценка памяти объекта вместе с вложенными контейнерами
+
+    Общие объекты считаются один раз; обход ограничен limit объектами.
+    """
+    seen = set()
+    stack = [obj]
+    size = 0
+    while stack and len(seen) < limit:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return size
+
+
+def process_memory() -> Dict[str, Any]:
+    """Память процесса: RSS, пик RSS, объекты под управлением gc"""
+    result: Dict[str, Any] = {'pid': os.getpid(), 'gc_objects': len(gc.get_objects()), 'gc_counts': gc.get_count()}
+    try:
+        with open('/proc/self/statm') as f:
+            result['rss_bytes'] = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+        # ru_maxrss — килобайты в Linux, байты в macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        result['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    except ImportError:
+        pass
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        result['traced_bytes'] = current
+        result['traced_peak_bytes'] = peak
+    return result
+
+
+def _statistic(stat: Any) -> Dict[str, Any]:
+    entry = {
+        'size_bytes': stat.size,
+        'count': stat.count,
+        'traceback': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+    }
+    if hasattr(stat, 'size_diff'):
+        entry['size_diff_bytes'] = stat.size_diff
+        entry['count_diff'] = stat.count_diff
+    return entry
+
+
+class MemoryTracer:
+    """Управление tracemalloc и хранение последних снимков процесса"""
+
+    def __init__(self, max_snapshots: int = 10):
+        """
+        Args:
+            max_snapshots: Сколько снимков хранить (старые вытесняются)
+        """
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 25) -> None:
+        """Включить tracemalloc (frames — глубина сохраняемого стека)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Выключить tracemalloc и удалить снимки"""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def take(self) -> Dict[str, Any]:
+        """Снять снимок
+
+        Raises:
+            RuntimeError: Если tracemalloc не включен
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing, start it first")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            snapshot_id = next(self._ids)
+            self._snapshots[snapshot_id] = {'snapshot': snapshot, 'time': time.time(), 'traced_bytes': current}
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return {'id': snapshot_id, 'pid': os.getpid(), 'traced_bytes': current, 'traced_peak_bytes': peak}
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """Сохраненные снимки (без данных)"""
+        with self._lock:
+            return [
+                {'id': snapshot_id, 'time': entry['time'], 'traced_bytes': entry['traced_bytes']}
+                for snapshot_id, entry in self._snapshots.items()
+            ]
+
+    def _get(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        with self._lock:
+            entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise KeyError(f"Snapshot {snapshot_id} not found in process {os.getpid()}")
+        return entry['snapshot']
+
+    def top(self, snapshot_id: int, group_by: str = 'lineno', limit: int = 20) -> List[Dict[str, Any]]:
+        """Места с наибольшим объемом выделенной памяти
+
+        Raises:
+            KeyError: Если снимка нет
+            ValueError: При неверном group_by
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        return [_statistic(stat) for stat in self._get(snapshot_id).statistics(group_by)[:limit]]
+
+    def diff(self, from_id: int, to_id: int, group_by: str = 'lineno', limit: int = 20) -> List[Dict[str, Any]]:
+        """Места, где объем памяти сильнее всего изменился между снимками
+
+        Raises:
+            KeyError: Если снимка нет
+            ValueError: При неверном group_by
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        stats = self._get(to_id).compare_to(self._get(from_id), group_by)
+        return [_statistic(stat) for stat in stats[:limit]]
+
+
+_tracer: Optional[MemoryTracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_memory_tracer() -> MemoryTracer:
+    """Снимки tracemalloc процесса"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = MemoryTracer(max_snapshots=int(os.getenv('MEMORY_MAX_SNAPSHOTS', 10)))
+    return _tracer
@@ -0,0 +1,107 @@
+"""
+Метрики Prometheus: запросы к приложению, Telemost и Telegram, кэши и очереди
+
+Под gunicorn с несколькими воркерами задается PROMETHEUS_MULTIPROC_DIR
+(см. gunicorn.conf.py): каждый процесс пишет значения в свой mmap-файл без
+межпроцессных блокировок, а /metrics суммирует файлы всех процессов.
+"""
+
+import os
+import re
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Границы корзин гистограмм задержек (сек): от быстрых ответов из кэша до таймаутов API
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'Запросы к приложению',
+    ['method', 'route', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Время обработки запроса',
+    ['method', 'route'], buckets=LATENCY_BUCKETS
+)
+
+TELEMOST_REQUESTS = Counter(
+    'telemost_requests_total', 'Запросы к Telemost API',
+    ['method', 'endpoint', 'status_class']
+)
+TELEMOST_LATENCY = Histogram(
+    'telemost_request_duration_seconds', 'Время ответа Telemost API',
+    ['method', 'endpoint'], buckets=LATENCY_BUCKETS
+)
+TELEMOST_IN_FLIGHT = Gauge(
+    'telemost_requests_in_flight', 'Запросы к Telemost API в работе',
+    multiprocess_mode='livesum'
+)
+
+TELEGRAM_REQUESTS = Counter(
+    'telegram_requests_total', 'Запросы к Telegram Bot API',
+    ['method', 'status']
+)
+TELEGRAM_LATENCY = Histogram(
+    'telegram_request_duration_seconds', 'Время ответа Telegram Bot API',
+    ['method'], buckets=LATENCY_BUCKETS
+)
+
+INLINE_QUERY_LATENCY = Histogram(
+    'inline_query_duration_seconds', 'Время ответа на inline-запрос (вместе с answerInlineQuery)',
+    buckets=LATENCY_BUCKETS
+)
+
+RATE_LIMITED = Counter(
+    'rate_limited_requests_total', 'Запросы, отклоненные ограничением частоты (429)',
+    ['route', 'scope']
+)
+
+FAULTS_INJECTED = Counter(
+    'upstream_faults_injected_total', 'Сбои, внедренные в запросы к внешним API (FAULT_SCENARIO)',
+    ['service', 'fault']
+)
+
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Обращения к кэшам (hit, stale, miss)',
+    ['cache', 'result']
+)
+
+QUEUE_DEPTH = Gauge(
+    'queue_depth', 'Длина внутренних очередей',
+    ['queue'], multiprocess_mode='livesum'
+)
+
+_ID_SEGMENT = re.compile(r'(conferences|cohosts)/[^/]+')
+
+
+def status_class(status_code: int) -> str:
+    """Класс HTTP-статуса: 2xx, 4xx, 5xx"""
+    return f"{status_code // 100}xx"
+
+
+def telemost_endpoint(endpoint: str) -> str:
+    """Шаблон конечной точки Telemost без идентификаторов (ограничивает число серий)"""
+    return _ID_SEGMENT.sub(r'\1/{id}', endpoint.strip('/'))
+
+
+def render() -> Tuple[bytes, str]:
+    """Текущие значения метрик в текстовом формате Prometheus
+
+    Returns:
+        Кортеж (тело ответа, Content-Type)
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,438 @@
+"""
+Профилирование запросов по требованию
+
+Профиль снимается для одного запроса (заголовок X-Profile с токеном
+администратора) или для доли запросов, включенной через POST /admin/profiling.
+Настройка хранится в файле каталога PROFILE_DIR, который все воркеры
+перечитывают не чаще раза в секунду, — перезапуск не нужен.
+
+Режимы:
+- sample — статистический: отдельный поток ОС раз в PROFILE_INTERVAL_MS
+  снимает стек потока (или гринлета gevent) запроса. Считается время по
+  часам, включая ожидание Telemost и Telegram. Результат — .collapsed
+  (строка "кадр;кадр;... число", формат flamegraph.pl и speedscope);
+- cprofile — детерминированный cProfile, результат — .prof (pstats). Под
+  gevent одновременно профилируется только один запрос процесса.
+
+Время запроса разбивается на обработчик, _make_request Telemost и Telegram,
+сериализацию JSON и логирование; разбивка пишется в лог и, для запросов с
+заголовком, в ответ (Server-Timing).
+"""
+
+import os
+import sys
+import json
+import time
+import hmac
+import random
+import itertools
+import _thread
+import cProfile
+import fnmatch
+import logging
+import pstats
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, g, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+MODES = ('sample', 'cprofile')
+
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+_CONTROL_FILE = 'control.json'
+
+
+def profile_dir() -> str:
+    """Каталог профилей и файла настройки"""
+    return os.getenv('PROFILE_DIR') or os.path.join('/tmp', 'telemost-profiles')
+
+
+def check_admin_token(token: Optional[str]) -> bool:
+    """Совпадает ли токен с ADMIN_TOKEN (без ADMIN_TOKEN доступ закрыт)"""
+    expected = os.getenv('ADMIN_TOKEN', '')
+    return bool(expected) and bool(token) and hmac.compare_digest(token, expected)
+
+
+# ===========================================
+# Разбивка времени
+# ===========================================
+
+def _short_filename(filename: str) -> str:
+    if filename.startswith(_SRC_DIR):
+        return 'src' + filename[len(_SRC_DIR):]
+    for marker in ('site-packages/', 'dist-packages/'):
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + len(marker):]
+    parts = filename.replace('\\', '/').split('/')
+    return '/'.join(parts[-2:])
+
+
+def _category(filename: str, function: str) -> Optional[str]:
+    """Категория кадра или None, если кадр сам по себе ничего не говорит"""
+    short = _short_filename(filename)
+    if short.startswith('logging/') or short == 'src/logging_setup.py':
+        return 'logging'
+    if short.startswith(('json/', 'flask/json/')) or short == 'src/json_provider.py':
+        return 'json'
+    # Функции orjson написаны на C: cProfile показывает их как <built-in method orjson.loads>
+    if 'orjson.' in function:
+        return 'json'
+    if function == '_make_request':
+        if short == 'src/telemost_api.py':
+            return 'telemost'
+        if short == 'src/telegram_bot.py':
+            return 'telegram'
+    return None
+
+
+def classify_stack(frames: List[Tuple[str, str]]) -> str:
+    """Категория стека (кадры от корня к листу): ближайший к листу значимый кадр
+
+    JSON, закодированный внутри _make_request, относится к json, а не к
+    вызову API. Остальное время внутри кода приложения — handler, вне его
+    (Flask, werkzeug, WSGI) — framework.
+    """
+    for filename, function in reversed(frames):
+        category = _category(filename, function)
+        if category:
+            return category
+    if any(filename.startswith(_SRC_DIR) for filename, _ in frames):
+        return 'handler'
+    return 'framework'
+
+
+# ===========================================
+# Профилировщики
+# ===========================================
+
+def _gevent_patched() -> bool:
+    """Пропатчены ли потоки gevent (gunicorn с gevent-воркерами)"""
+    if 'gevent' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('threading')
+
+
+def _original(module: str, name: str, default: Callable) -> Callable:
+    """Функция стандартной библиотеки до monkey-патча gevent"""
+    if _gevent_patched():
+        from gevent import monkey
+        return monkey.get_original(module, name)
+    return default
+
+
+class StackSampler:
+    """Статистический профилировщик одного запроса
+
+    Выборку делает настоящий поток ОС (даже под gevent), поэтому запрос,
+    ожидающий ответа API, тоже попадает в выборку: у приостановленного
+    гринлета стек берется из gr_frame.
+    """
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.samples = 0
+        self._running = False
+        self._finished = False
+        self._ident = _original('_thread', 'get_ident', _thread.get_ident)()
+        self._greenlet = None
+        if _gevent_patched():
+            import greenlet
+            self._greenlet = greenlet.getcurrent()
+
+    def start(self) -> None:
+        self._running = True
+        self._started = time.perf_counter()
+        _original('_thread', 'start_new_thread', _thread.start_new_thread)(self._run, ())
+
+    def stop(self) -> float:
+        """Остановить выборку; возвращает длительность профиля (сек)"""
+        self._running = False
+        duration = time.perf_counter() - self._started
+        # Дожидаемся последней выборки, чтобы счетчики больше не менялись
+        while not self._finished:
+            time.sleep(self.interval / 2)
+        return duration
+
+    def _frame(self):
+        if self._greenlet is not None and self._greenlet.gr_frame is not None:
+            return self._greenlet.gr_frame
+        return sys._current_frames().get(self._ident)
+
+    def _run(self) -> None:
+        sleep = _original('time', 'sleep', time.sleep)
+        while self._running:
+            frame = self._frame()
+            frames: List[Tuple[str, str]] = []
+            while frame is not None:
+                frames.append((frame.f_code.co_filename, frame.f_code.co_name))
+                frame = frame.f_back
+            if frames and self._running:
+                frames.reverse()
+                self.stacks[';'.join(f"{_short_filename(f)}:{name}" for f, name in frames)] += 1
+                self.categories[classify_stack(frames)] += 1
+                self.samples += 1
+            sleep(self.interval)
+        self._finished = True
+
+    def breakdown(self, duration: float) -> Dict[str, float]:
+        """Время по категориям (мс) пропорционально числу выборок"""
+        if not self.samples:
+            return {}
+        return {name: round(duration * 1000 * count / self.samples, 2) for name, count in self.categories.most_common()}
+
+    def save(self, path: str) -> str:
+        path += '.collapsed'
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class CProfileProfiler:
+    """cProfile одного запроса
+
+    Разбивка по времени функций: json и logging — собственное время функций
+    этих модулей, telemost и telegram — полное время _make_request (вместе с
+    JSON внутри него), handler — остаток. Под gevent в профиль попадают и
+    гринлеты других запросов, переключившиеся во время этого.
+
+    Под gevent гринлеты делят поток ОС и его sys.setprofile: второй enable()
+    подменил бы профиль первого запроса. Поэтому там сессия cProfile одна на
+    процесс — профилировщик создается через acquire().
+    """
+
+    _session = threading.Lock()
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self._release: Optional[Callable[[], None]] = None
+
+    @classmethod
+    def acquire(cls) -> Optional['CProfileProfiler']:
+        """Профилировщик, если сессию можно начать (None — под gevent уже идет другая)"""
+        if not _gevent_patched():
+            return cls()
+        if not cls._session.acquire(blocking=False):
+            return None
+        profiler = cls()
+        profiler._release = cls._session.release
+        return profiler
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self) -> float:
+        self.profile.disable()
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+        return time.perf_counter() - self._started
+
+    def breakdown(self, duration: float) -> Dict[str, float]:
+        stats = pstats.Stats(self.profile).stats
+        totals: Counter = Counter()
+        for (filename, _, function), (_, _, tottime, cumtime, _) in stats.items():
+            category = _category(filename, function)
+            if category in ('telemost', 'telegram'):
+                totals[category] += cumtime
+            elif category:
+                totals[category] += tottime
+        result = {name: round(value * 1000, 2) for name, value in totals.most_common()}
+        result['handler'] = round(max(0.0, duration * 1000 - sum(result.values())), 2)
+        return result
+
+    def save(self, path: str) -> str:
+        path += '.prof'
+        self.profile.dump_stats(path)
+        return path
+
+
+# ===========================================
+# Настройка (общая для воркеров)
+# ===========================================
+
+class ProfilingControl:
+    """Доля профилируемых запросов, хранящаяся в файле PROFILE_DIR/control.json"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, _CONTROL_FILE)
+        self._settings: Dict[str, Any] = {}
+        self._mtime = 0.0
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def settings(self) -> Dict[str, Any]:
+        """Действующая настройка ({} — выборочное профилирование выключено)"""
+        now = time.monotonic()
+        if now - self._checked >= 1:
+            with self._lock:
+                self._checked = now
+                try:
+                    mtime = os.path.getmtime(self.path)
+                    if mtime != self._mtime:
+                        with open(self.path) as f:
+                            self._settings = json.load(f)
+                        self._mtime = mtime
+                except (OSError, ValueError):
+                    self._settings, self._mtime = {}, 0.0
+        settings = self._settings
+        if settings and settings.get('until', 0) < time.time():
+            return {}
+        return settings
+
+    def update(self, mode: str = 'sample', sample_rate: float = 0.01, duration: float = 300,
+               route: Optional[str] = None) -> Dict[str, Any]:
+        """Включить профилирование доли запросов во всех воркерах
+
+        Args:
+            mode: sample или cprofile
+            sample_rate: Доля профилируемых запросов
+            duration: Через сколько секунд выключить
+            route: Шаблон пути (fnmatch), например /api/meetings*
+
+        Raises:
+            ValueError: При неверных параметрах
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        settings = {'mode': mode, 'sample_rate': sample_rate, 'route': route, 'until': time.time() + duration}
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump(settings, f)
+        os.replace(tmp, self.path)
+        self._checked = 0.0
+        return settings
+
+    def disable(self) -> None:
+        """Выключить выборочное профилирование"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self._checked = 0.0
+
+    def profiles(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Последние сохраненные профили"""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(('.collapsed', '.prof'))]
+        except FileNotFoundError:
+            return []
+        names.sort(reverse=True)
+        return [{'name': n, 'size': os.path.getsize(os.path.join(self.directory, n))} for n in names[:limit]]
+
+    def prune(self, keep: int) -> None:
+        """Удалить старые профили сверх keep"""
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(('.collapsed', '.prof')))
+        for name in names[:max(0, len(names) - keep)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+_control: Optional[ProfilingControl] = None
+_control_lock = threading.Lock()
+_profile_counter = itertools.count()
+
+
+def get_profiling_control() -> ProfilingControl:
+    """Настройка профилирования процесса"""
+    global _control
+    if _control is None:
+        with _control_lock:
+            if _control is None:
+                _control = ProfilingControl(profile_dir())
+    return _control
+
+
+def _profile_name(route: str) -> str:
+    safe = ''.join(c if c.isalnum() else '_' for c in route).strip('_') or 'root'
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}.{int(now * 1000) % 1000:03d}"
+    return f"{stamp}-{os.getpid()}-{next(_profile_counter)}-{request.method}-{safe[:60]}"
+
+
+def init_app(app: Flask) -> None:
+    """Профилирование запросов приложения
+
+    Регистрируется первым: before_request запускает профиль раньше
+    остальных обработчиков, after_request останавливает его последним.
+    """
+    interval = float(os.getenv('PROFILE_INTERVAL_MS', 2)) / 1000
+    max_files = int(os.getenv('PROFILE_MAX_FILES', 500))
+
+    @app.before_request
+    def start_profile():
+        requested = request.headers.get(PROFILE_HEADER)
+        if requested:
+            if not check_admin_token(request.headers.get(ADMIN_TOKEN_HEADER)):
+                return
+            mode = requested if requested in MODES else 'sample'
+        else:
+            settings = get_profiling_control().settings()
+            if not settings or random.random() >= settings['sample_rate']:
+                return
+            if settings.get('route') and not fnmatch.fnmatchcase(request.path, settings['route']):
+                return
+            mode = settings['mode']
+
+        profiler = StackSampler(interval) if mode == 'sample' else CProfileProfiler.acquire()
+        if profiler is None:
+            # cProfile уже снимается в другом гринлете: выборка пропускает запрос,
+            # запрос с заголовком получает статистический профиль
+            if not requested:
+                return
+            profiler = StackSampler(interval)
+        g.profiler = profiler
+        g.profile_requested = bool(requested)
+        profiler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        duration = profiler.stop()
+        breakdown = profiler.breakdown(duration)
+        route = request.url_rule.rule if request.url_rule else request.path
+
+        control = get_profiling_control()
+        try:
+            os.makedirs(control.directory, exist_ok=True)
+            path = profiler.save(os.path.join(control.directory, _profile_name(route)))
+            control.prune(max_files)
+        except OSError as e:
+            logger.warning("Failed to save profile: %s", e)
+            path = None
+
+        logger.info("Profiled %s %s in %.1f ms: %s", request.method, route, duration * 1000,
+                    ', '.join(f"{name} {value} ms" for name, value in breakdown.items()))
+        if g.pop('profile_requested', False):
+            response.headers['Server-Timing'] = ', '.join(
+                [f"{name};dur={value}" for name, value in breakdown.items()] + [f"total;dur={duration * 1000:.2f}"]
+            )
+            if path:
+                response.headers['X-Profile-File'] = os.path.basename(path)
+        return response
+
+    @app.teardown_request
+    def stop_abandoned_profile(exc):
+        # after_request не вызван (ошибка до ответа): профиль не сохраняется,
+        # но профилировщик нужно остановить и освободить сессию cProfile
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
@@ -0,0 +1,171 @@
+"""
+Ограничение частоты запросов: к внешним API и от клиентов приложения
+"""
+
+import time
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from src import memory
+
+
+class TokenBucket:
+    """Потокобезопасный token bucket
+
+    Пополняется со скоростью rate токенов в секунду, вмещает не более burst
+    токенов. acquire() блокирует вызывающий поток, пока токен не появится.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate: Средняя скорость (запросов в секунду)
+            burst: Максимальный всплеск (по умолчанию равен rate)
+        """
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Попробовать взять токены без ожидания
+
+        Returns:
+            0, если токены получены, иначе сколько секунд нужно подождать
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Дождаться и взять токены
+
+        Args:
+            tokens: Количество токенов
+            timeout: Максимальное время ожидания (None — без ограничения)
+
+        Returns:
+            True, если токены получены до истечения timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Заблокировать выдачу токенов на время (например, после ответа 429)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class MemoryWindowStore:
+    """Счетчики окон в памяти процесса (интерфейс как у storage.RateLimitStore)"""
+
+    def __init__(self):
+        self._counts: Dict[Tuple[str, int], int] = {}
+        self._cleaned_window = 0
+        self._lock = threading.Lock()
+        memory.track('rate_limit_windows', self, lambda store: {'items': len(store._counts)})
+
+    def hit(self, key: str, window_start: int, window: int, allow: Callable[[int, int], bool]) -> Tuple[bool, int, int]:
+        with self._lock:
+            if window_start > self._cleaned_window:
+                # Раз за окно: счетчики старше прошлого окна больше не нужны
+                self._cleaned_window = window_start
+                self._counts = {k: count for k, count in self._counts.items() if k[1] >= window_start - window}
+            previous = self._counts.get((key, window_start - window), 0)
+            current = self._counts.get((key, window_start), 0) + 1
+            allowed = allow(previous, current)
+            if allowed:
+                self._counts[(key, window_start)] = current
+            else:
+                current -= 1
+            return allowed, previous, current
+
+
+class SlidingWindowLimiter:
+    """Ограничение числа запросов на ключ (пользователь, IP) за скользящее окно
+
+    Скользящее окно приближается двумя фиксированными: запросы прошлого окна
+    учитываются с весом, равным доле, которую оно еще перекрывает. Счетчики
+    хранятся в store — в памяти или в SQLite, общей для всех воркеров.
+    Отказы запоминаются локально до истечения Retry-After, поэтому повторные
+    запросы заблокированного клиента не обращаются к store. Разрешенный
+    запрос — всегда запись в store: иначе воркеры вместе превысили бы лимит.
+    В SQLite это короткая транзакция, которая под gevent выполняется в пуле
+    потоков (storage.blocking) и не останавливает другие запросы.
+    """
+
+    def __init__(self, limit: int, window: int = 60, store=None, name: str = 'default'):
+        """
+        Args:
+            limit: Максимум запросов за окно
+            window: Длина окна (сек)
+            store: Хранилище счетчиков (по умолчанию — в памяти процесса)
+            name: Префикс ключей (разные ограничители в одном store)
+        """
+        self.limit = limit
+        self.window = window
+        self.store = store or MemoryWindowStore()
+        self.name = name
+        self._blocked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        memory.track('rate_limit_blocked', self, lambda limiter: {'items': len(limiter._blocked_until)})
+
+    def hit(self, key: str) -> float:
+        """Учесть запрос
+
+        Returns:
+            0, если запрос разрешен, иначе через сколько секунд повторить
+        """
+        now = time.time()
+        with self._lock:
+            blocked_until = self._blocked_until.get(key)
+        if blocked_until is not None and blocked_until > now:
+            return blocked_until - now
+
+        window_start = int(now // self.window) * self.window
+        elapsed = (now - window_start) / self.window
+
+        def allow(previous: int, current: int) -> bool:
+            return previous * (1 - elapsed) + current <= self.limit
+
+        allowed, previous, current = self.store.hit(f"{self.name}:{key}", window_start, self.window, allow)
+        if allowed:
+            return 0.0
+
+        retry_after = self._retry_after(now, window_start, previous, current)
+        with self._lock:
+            if len(self._blocked_until) > 10000:
+                self._blocked_until = {k: t for k, t in self._blocked_until.items() if t > now}
+            self._blocked_until[key] = now + retry_after
+        return retry_after
+
+    def _retry_after(self, now: float, window_start: int, previous: int, current: int) -> float:
+        # Момент, когда оценка previous * (1 - доля окна) + current + 1 перестанет превышать limit
+        allowed = self.limit - 1
+        if current > allowed:
+            # Ждем следующего окна, в котором текущие запросы станут "прошлыми"
+            fraction = max(0.0, 1 - allowed / current) if current else 0.0
+            target = window_start + self.window * (1 + fraction)
+        else:
+            fraction = max(0.0, 1 - (allowed - current) / previous) if previous else 0.0
+            target = window_start + self.window * fraction
+        return max(1.0, target - now)
@@ -0,0 +1,267 @@
+"""
+Планировщик напоминаний о предстоящих встречах
+"""
+
+import os
+import heapq
+import html
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src import memory
+from src.metrics import QUEUE_DEPTH
+from src.storage import ReminderStore
+from src.telegram_bot import TelegramBot, TelegramBotError, get_telegram_bot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REMIND_BEFORE = [15]
+
+
+def parse_start_time(value: Any) -> float:
+    """Преобразовать время начала встречи в unix timestamp
+
+    Args:
+        value: ISO 8601 строка (без зоны считается UTC) или число секунд
+
+    Raises:
+        ValueError: При некорректном формате
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_reminder(meeting_data: Dict[str, Any], minutes: int) -> str:
+    """Текст напоминания"""
+    title = meeting_data.get('title') or 'Встреча в Telemost'
+    message = f"⏰ <b>Напоминание</b>\n\n📋 {html.escape(title)}\n"
+
+    if minutes > 0:
+        message += f"🕒 Начало через {minutes} мин.\n"
+    else:
+        message += "🕒 Встреча начинается\n"
+
+    message += f"\n🔗 <b>Ссылка для подключения:</b>\n{meeting_data.get('join_url', '')}"
+    return message
+
+
+class ReminderScheduler:
+    """Планировщик напоминаний на куче (heap) с хранением в SQLite
+
+    В памяти держится куча (fire_at, id) только для ближайших напоминаний
+    (горизонт horizon секунд); поток спит до ближайшего срабатывания и
+    отправляет все наступившие напоминания пачкой. Раз в sync_interval секунд
+    куча дополняется из базы, поэтому напоминания переживают перезапуск и
+    видны всем процессам. Перед отправкой напоминание атомарно «забирается»
+    в базе — несколько процессов с планировщиками не дублируют сообщения.
+    """
+
+    def __init__(
+        self,
+        bot: TelegramBot,
+        store: Optional[ReminderStore] = None,
+        horizon: float = 600,
+        sync_interval: float = 60,
+        workers: int = 4
+    ):
+        """
+        Args:
+            bot: Клиент Telegram (отправка идет через его rate limiter)
+            store: Хранилище напоминаний
+            horizon: На сколько секунд вперед держать напоминания в памяти
+            sync_interval: Период синхронизации с базой (сек)
+            workers: Количество потоков отправки
+        """
+        self.bot = bot
+        self.store = store or ReminderStore()
+        self.horizon = horizon
+        self.sync_interval = sync_interval
+        self.workers = workers
+
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._known: Set[int] = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stop = False
+        self._last_sync = 0.0
+        self._depth = QUEUE_DEPTH.labels('reminders')
+        memory.track('reminder_heap', self)
+
+    def start(self) -> 'ReminderScheduler':
+        """Запустить поток планировщика (повторный вызов ничего не делает)"""
+        with self._cond:
+            if self._thread is not None:
+                return self
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reminder-send')
+            self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+            self._thread.start()
+        logger.info("Reminder scheduler started")
+        return self
+
+    def stop(self):
+        """Остановить планировщик"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Напоминания в куче и оценка памяти"""
+        with self._cond:
+            heap = list(self._heap)
+            known = len(self._known)
+        return {'items': len(heap), 'bytes': memory.deep_sizeof(heap), 'known_ids': known}
+
+    def schedule(
+        self,
+        meeting_data: Dict[str, Any],
+        chat_ids: Iterable[Any],
+        start_time: Any,
+        remind_before: Optional[List[int]] = None
+    ) -> int:
+        """Запланировать напоминания получателям приглашения
+
+        Args:
+            meeting_data: Данные встречи
+            chat_ids: Чаты, получившие приглашение
+            start_time: Время начала встречи (ISO 8601 или unix timestamp)
+            remind_before: За сколько минут напоминать (по умолчанию за 15)
+
+        Returns:
+            Количество запланированных напоминаний
+        """
+        meeting_start = parse_start_time(start_time)
+        now = time.time()
+
+        reminders = []
+        for minutes in remind_before or DEFAULT_REMIND_BEFORE:
+            fire_at = meeting_start - int(minutes) * 60
+            if fire_at <= now:
+                continue
+            text = format_reminder(meeting_data, int(minutes))
+            for chat_id in chat_ids:
+                reminders.append({
+                    'meeting_id': meeting_data.get('id'),
+                    'chat_id': chat_id,
+                    'fire_at': fire_at,
+                    'meeting_start': meeting_start,
+                    'text': text
+                })
+
+        if not reminders:
+            return 0
+
+        self.store.add_many(reminders)
+        self._push(r for r in reminders if r['fire_at'] <= now + self.horizon)
+        self.start()
+
+        logger.info("Scheduled %s reminders for meeting %s", len(reminders), meeting_data.get('id'))
+        return len(reminders)
+
+    def pending_count(self) -> int:
+        """Количество напоминаний в памяти"""
+        with self._cond:
+            return len(self._heap)
+
+    def _push(self, reminders: Iterable[Dict[str, Any]]):
+        with self._cond:
+            earliest = self._heap[0][0] if self._heap else None
+            for reminder in reminders:
+                if reminder['id'] in self._known:
+                    continue
+                self._known.add(reminder['id'])
+                heapq.heappush(self._heap, (reminder['fire_at'], reminder['id'], reminder))
+            self._depth.set(len(self._heap))
+            # Будим поток, только если появилось более раннее напоминание
+            if self._heap and (earliest is None or self._heap[0][0] < earliest):
+                self._cond.notify()
+
+    def _sync(self):
+        """Подтянуть из базы напоминания, которые сработают в пределах горизонта"""
+        now = time.time()
+        self.store.reset_stuck(older_than=now - self.horizon)
+        self._push(self.store.pending(until=now + self.horizon))
+        self._last_sync = now
+
+    def _run(self):
+        while True:
+            try:
+                if time.time() - self._last_sync >= self.sync_interval:
+                    self._sync()
+            except Exception as e:
+                logger.error("Failed to sync reminders: %s", e)
+                self._last_sync = time.time()
+
+            due = []
+            with self._cond:
+                if self._stop:
+                    return
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, reminder_id, reminder = heapq.heappop(self._heap)
+                    self._known.discard(reminder_id)
+                    due.append(reminder)
+                self._depth.set(len(self._heap))
+
+                if not due:
+                    next_sync = self._last_sync + self.sync_interval
+                    next_fire = self._heap[0][0] if self._heap else next_sync
+                    self._cond.wait(timeout=max(0.0, min(next_fire, next_sync) - now))
+                    continue
+
+            for reminder in due:
+                self._executor.submit(self._fire, reminder)
+
+    def _bot_token_for(self, reminder: Dict[str, Any]) -> Optional[str]:
+        """Напоминание приходит от того же бота пула, что и приглашение"""
+        if len(self.bot.bot_tokens) <= 1:
+            return None
+        bot_id = self.bot.message_store.bot_id_for(reminder['meeting_id'], reminder['chat_id'])
+        return self.bot.token_by_bot_id(bot_id) or self.bot.token_for_chat(reminder['chat_id'])
+
+    def _fire(self, reminder: Dict[str, Any]):
+        reminder_id = reminder['id']
+        try:
+            if not self.store.claim(reminder_id):
+                return
+
+            if time.time() > reminder['meeting_start']:
+                # Процесс был остановлен слишком долго — встреча уже началась
+                self.store.set_status(reminder_id, 'expired')
+                return
+
+            self.bot.send_message(reminder['chat_id'], reminder['text'], bot_token=self._bot_token_for(reminder))
+            self.store.set_status(reminder_id, 'sent')
+        except TelegramBotError as e:
+            logger.error("Failed to send reminder %s to %s: %s", reminder_id, reminder['chat_id'], e)
+            self.store.set_status(reminder_id, 'failed')
+        except Exception:
+            logger.exception("Unexpected error sending reminder %s", reminder_id)
+
+
+_scheduler: Optional[ReminderScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_reminder_scheduler() -> ReminderScheduler:
+    """Общий планировщик процесса (поток запускается при первом использовании)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = ReminderScheduler(
+                    get_telegram_bot(),
+                    workers=int(os.getenv('REMINDER_WORKERS', 4))
+                )
+    return _scheduler
@@ -0,0 +1,208 @@
+import os
+import logging
+from collections import Counter
+
+from flask import Blueprint, Response, abort, jsonify, request, send_from_directory
+
+from src import memory
+from src.profiling import ADMIN_TOKEN_HEADER, check_admin_token, get_profiling_control
+from src.telemost_pool import get_telemost_pool
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__)
+
+
+def _int_param(value, name: str, default: int, minimum: int = 0) -> int:
+    """Целочисленный параметр запроса (query или JSON)
+
+    Raises:
+        ValueError: Если значение не целое или меньше minimum
+    """
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if number < minimum:
+        raise ValueError(f"{name} must be >= {minimum}")
+    return number
+
+
+@admin_bp.before_request
+def require_admin_token():
+    """Служебные маршруты доступны только с X-Admin-Token; без ADMIN_TOKEN их нет"""
+    if not os.getenv('ADMIN_TOKEN'):
+        abort(404)
+    if not check_admin_token(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+
+@admin_bp.route('/profiling', methods=['GET'])
+def profiling_status():
+    """Настройка выборочного профилирования и последние профили"""
+    try:
+        limit = _int_param(request.args.get('limit'), 'limit', 100)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    control = get_profiling_control()
+    return jsonify({
+        'settings': control.settings() or None,
+        'profiles': control.profiles(limit)
+    }), 200
+
+
+@admin_bp.route('/profiling', methods=['POST'])
+def enable_profiling():
+    """Включить профилирование доли запросов во всех воркерах
+
+    JSON: mode (sample|cprofile), sample_rate, duration (сек), route (шаблон пути)
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        settings = get_profiling_control().update(
+            mode=data.get('mode', 'sample'),
+            sample_rate=float(data.get('sample_rate', 0.01)),
+            duration=float(data.get('duration', 300)),
+            route=data.get('route')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    logger.warning("Request profiling enabled: %s", settings)
+    return jsonify({'settings': settings}), 200
+
+
+@admin_bp.route('/profiling', methods=['DELETE'])
+def disable_profiling():
+    """Выключить выборочное профилирование"""
+    get_profiling_control().disable()
+    logger.warning("Request profiling disabled")
+    return jsonify({'settings': None}), 200
+
+
+@admin_bp.route('/profiling/flamegraph', methods=['GET'])
+def profiling_flamegraph():
+    """Стеки всех сохраненных профилей (.collapsed) одним файлом для flamegraph.pl / speedscope
+
+    Параметр route отбирает профили по подстроке имени (маршрут в имени файла
+    записан с заменой символов на "_").
+    """
+    control = get_profiling_control()
+    route = request.args.get('route', '')
+    stacks: Counter = Counter()
+    for profile in control.profiles(limit=100000):
+        name = profile['name']
+        if not name.endswith('.collapsed') or route not in name:
+            continue
+        with open(os.path.join(control.directory, name)) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack:
+                    stacks[stack] += int(count)
+    body = ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    return Response(body, content_type='text/plain; charset=utf-8')
+
+
+@admin_bp.route('/profiling/<name>', methods=['GET'])
+def profiling_file(name):
+    """Скачать профиль (.collapsed или .prof)"""
+    if not name.endswith(('.collapsed', '.prof')):
+        abort(404)
+    return send_from_directory(get_profiling_control().directory, name, as_attachment=True)
+
+
+@admin_bp.route('/telemost', methods=['GET'])
+def telemost_status():
+    """Токены Telemost по организациям: запросы в работе и состояние цепи"""
+    try:
+        pool = get_telemost_pool()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({'tenants': pool.stats()}), 200
+
+
+@admin_bp.route('/memory', methods=['GET'])
+def memory_status():
+    """Память процесса, размеры внутренних структур и снимки tracemalloc"""
+    tracer = memory.get_memory_tracer()
+    return jsonify({
+        'process': memory.process_memory(),
+        'structures': memory.structure_sizes(),
+        'tracemalloc': tracer.tracing,
+        'snapshots': tracer.snapshots()
+    }), 200
+
+
+@admin_bp.route('/memory/tracemalloc', methods=['POST'])
+def start_tracemalloc():
+    """Включить tracemalloc в процессе (JSON: frames — глубина стека)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        memory.get_memory_tracer().start(_int_param(data.get('frames'), 'frames', 25, minimum=1))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    logger.warning("tracemalloc started in process %s", os.getpid())
+    return jsonify({'tracemalloc': True, 'pid': os.getpid()}), 200
+
+
+@admin_bp.route('/memory/tracemalloc', methods=['DELETE'])
+def stop_tracemalloc():
+    """Выключить tracemalloc и удалить снимки"""
+    memory.get_memory_tracer().stop()
+    logger.warning("tracemalloc stopped in process %s", os.getpid())
+    return jsonify({'tracemalloc': False, 'pid': os.getpid()}), 200
+
+
+@admin_bp.route('/memory/snapshots', methods=['POST'])
+def take_memory_snapshot():
+    """Снять снимок tracemalloc"""
+    try:
+        return jsonify(memory.get_memory_tracer().take()), 201
+    except RuntimeError as e:
+        return jsonify({'error': str(e), 'pid': os.getpid()}), 409
+
+
+@admin_bp.route('/memory/snapshots/<int:snapshot_id>', methods=['GET'])
+def memory_snapshot_top(snapshot_id):
+    """Места наибольших выделений памяти в снимке (group_by, limit)"""
+    try:
+        top = memory.get_memory_tracer().top(
+            snapshot_id,
+            group_by=request.args.get('group_by', 'lineno'),
+            limit=_int_param(request.args.get('limit'), 'limit', 20)
+        )
+    except KeyError as e:
+        return jsonify({'error': e.args[0], 'pid': os.getpid()}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'id': snapshot_id, 'pid': os.getpid(), 'top': top}), 200
+
+
+@admin_bp.route('/memory/diff', methods=['GET'])
+def memory_snapshot_diff():
+    """Изменение памяти между снимками from и to (без to — новый снимок)"""
+    tracer = memory.get_memory_tracer()
+    if 'from' not in request.args:
+        return jsonify({'error': 'from is required'}), 400
+    try:
+        from_id = _int_param(request.args['from'], 'from', 0)
+        to_id = _int_param(request.args['to'], 'to', 0) if 'to' in request.args else None
+        limit = _int_param(request.args.get('limit'), 'limit', 20)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        if to_id is None:
+            to_id = tracer.take()['id']
+        diff = tracer.diff(
+            from_id, to_id,
+            group_by=request.args.get('group_by', 'lineno'),
+            limit=limit
+        )
+    except KeyError as e:
+        return jsonify({'error': e.args[0], 'pid': os.getpid()}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e), 'pid': os.getpid()}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'from': from_id, 'to': to_id, 'pid': os.getpid(), 'diff': diff}), 200
@@ -1,26 +1,144 @@
-from flask import Blueprint, request, jsonify
-from src.telemost_api import TelemostAPI, TelemostAPIError, TelemostAuthError, TelemostValidationError
+from flask import Blueprint, Response, g, request, jsonify
+from src.metrics import RATE_LIMITED
+from src.rate_limit import SlidingWindowLimiter
+from src.telemost_api import TelemostAPIError, TelemostAuthError, TelemostValidationError, TelemostUnavailableError
+from src.telemost_pool import TelemostClientPool, get_telemost_pool
+import os
 import logging
+import math
+import threading
+import contextvars
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import List, Optional
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Размер блока при передаче тела ответа Telemost клиенту
+PASSTHROUGH_CHUNK_SIZE = 64 * 1024
+
 meetings_bp = Blueprint('meetings', __name__)
 
-# Инициализация API клиента
-try:
-    telemost_client = TelemostAPI()
-    logger.info("Telemost API client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Telemost API client: {e}")
-    telemost_client = None
+
+_pool_error: Optional[Exception] = None
+
+
+def _get_pool() -> Optional[TelemostClientPool]:
+    """Пул API клиентов (создается при первом запросе; None, если токены не заданы)
+
+    Ошибка создания запоминается: окружение процесса не меняется, и повторять
+    попытку (и запись в лог) на каждом запросе бессмысленно.
+    """
+    global _pool_error
+    if _pool_error is not None:
+        return None
+    try:
+        return get_telemost_pool()
+    except Exception as e:
+        _pool_error = e
+        logger.error("Failed to initialize Telemost API client: %s", e)
+        return None
+
+
+def _get_client():
+    """Клиент Telemost для текущего запроса
+
+    Организация определяется по проверенному пользователю Web App
+    (g.telegram_user, TELEMOST_TENANT_USERS); без пользователя — организация
+    по умолчанию. Заголовок X-Tenant, не совпадающий с ней, отклоняется.
+
+    Returns:
+        Кортеж (клиент, ответ с ошибкой)
+    """
+    telemost_pool = _get_pool()
+    if not telemost_pool:
+        return None, (jsonify({'error': 'Telemost API client not available'}), 500)
+    
+    user_id = (g.get('telegram_user') or {}).get('id')
+    tenant = telemost_pool.tenant_for(user_id)
+    requested = request.headers.get('X-Tenant')
+    if requested and requested != tenant:
+        logger.warning("Tenant %s denied for user %s", requested, user_id)
+        return None, (jsonify({'error': 'Tenant is not allowed for this user'}), 403)
+    
+    try:
+        return telemost_pool.client(tenant), None
+    except TelemostValidationError as e:
+        return None, (jsonify({'error': str(e)}), 403)
+
+
+_limiters: Optional[List[SlidingWindowLimiter]] = None
+_limiters_lock = threading.Lock()
+
+
+def _get_limiters() -> List[SlidingWindowLimiter]:
+    """Ограничители создания встреч и рассылок: по пользователю Telegram и по IP
+
+    Счетчики хранятся в SQLite (BOT_DB_PATH) и общие для всех воркеров.
+    Лимит 0 отключает соответствующее ограничение.
+    """
+    global _limiters
+    if _limiters is None:
+        with _limiters_lock:
+            if _limiters is None:
+                from src.storage import RateLimitStore
+                store = RateLimitStore()
+                window = int(os.getenv('MEETING_RATE_WINDOW', 60))
+                _limiters = [
+                    SlidingWindowLimiter(int(os.getenv(f'MEETING_RATE_LIMIT_{scope.upper()}', default)), window, store, scope)
+                    for scope, default in (('user', 10), ('ip', 30))
+                ]
+    return _limiters
+
+
+def rate_limited(view):
+    """Вернуть 429 с Retry-After, если пользователь или IP превысили лимит запросов
+
+    Пользователь берется из g.telegram_user (проверенные данные Web App);
+    без них действует только ограничение по IP.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user = g.get('telegram_user') or {}
+        keys = {'user': user.get('id'), 'ip': request.remote_addr}
+        for limiter in _get_limiters():
+            key = keys.get(limiter.name)
+            if not limiter.limit or key is None:
+                continue
+            retry_after = limiter.hit(str(key))
+            if retry_after:
+                RATE_LIMITED.labels(request.endpoint, limiter.name).inc()
+                logger.warning("Rate limit exceeded for %s %s on %s", limiter.name, key, request.path)
+                response = jsonify({'error': 'Too many requests', 'retry_after': math.ceil(retry_after)})
+                response.headers['Retry-After'] = str(math.ceil(retry_after))
+                return response, 429
+        return view(*args, **kwargs)
+    return wrapper
+
+
+_reminders_started = False
+
+@meetings_bp.before_app_request
+def start_reminder_scheduler():
+    """Запуск планировщика напоминаний в процессе-воркере (после fork)"""
+    global _reminders_started
+    if _reminders_started:
+        return
+    _reminders_started = True
+    
+    from src.telegram_bot import get_telegram_bot
+    if get_telegram_bot().bot_token:
+        from src.reminders import get_reminder_scheduler
+        get_reminder_scheduler().start()
 
 @meetings_bp.route('/meetings', methods=['POST'])
+@rate_limited
 def create_meeting():
     """Создание новой встречи"""
-    if not telemost_client:
-        return jsonify({'error': 'Telemost API client not available'}), 500
+    telemost_client, error = _get_client()
+    if error:
+        return error
     
     try:
         data = request.get_json()
@@ -33,7 +151,7 @@ def create_meeting():
         description = data.get('description', '')
         live_stream = data.get('live_stream')
         
-        logger.info(f"Creating meeting with params: waiting_room_level={waiting_room_level}, title={title}")
+        logger.info("Creating meeting with params: waiting_room_level=%s, title=%s", waiting_room_level, title)
         
         # Создаем встречу
         result = telemost_client.create_meeting(
@@ -54,72 +172,106 @@ def create_meeting():
         if live_stream:
             response_data['live_stream'] = result.get('live_stream')
         
-        logger.info(f"Meeting created successfully: {result.get('id')}")
+        logger.info("Meeting created successfully: %s", result.get('id'))
         return jsonify(response_data), 201
         
     except TelemostValidationError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return jsonify({'error': str(e)}), 400
     except TelemostAuthError as e:
-        logger.error(f"Auth error: {e}")
+        logger.error("Auth error: %s", e)
         return jsonify({'error': 'Authentication failed'}), 401
+    except TelemostUnavailableError as e:
+        logger.warning("Telemost unavailable: %s", e)
+        return jsonify({'error': str(e)}), 503
     except TelemostAPIError as e:
-        logger.error(f"API error: {e}")
+        logger.error("API error: %s", e)
         return jsonify({'error': str(e)}), 500
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @meetings_bp.route('/meetings/<meeting_id>', methods=['GET'])
 def get_meeting(meeting_id):
     """Получение информации о встрече"""
-    if not telemost_client:
-        return jsonify({'error': 'Telemost API client not available'}), 500
+    telemost_client, error = _get_client()
+    if error:
+        return error
     
     try:
         result = telemost_client.get_meeting(meeting_id)
-        logger.info(f"Retrieved meeting: {meeting_id}")
+        logger.info("Retrieved meeting: %s", meeting_id)
         return jsonify(result), 200
         
     except TelemostValidationError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return jsonify({'error': str(e)}), 400
+    except TelemostUnavailableError as e:
+        logger.warning("Telemost unavailable: %s", e)
+        return jsonify({'error': str(e)}), 503
     except TelemostAPIError as e:
-        logger.error(f"API error: {e}")
+        logger.error("API error: %s", e)
         return jsonify({'error': str(e)}), 500
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @meetings_bp.route('/meetings', methods=['GET'])
 def list_meetings():
     """Получение списка встреч"""
-    if not telemost_client:
-        return jsonify({'error': 'Telemost API client not available'}), 500
+    telemost_client, error = _get_client()
+    if error:
+        return error
     
     try:
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
         
+        # Список отдается без изменений: тело Telemost можно передать как есть, не разбирая JSON
+        if os.getenv('MEETINGS_PASSTHROUGH', '0') == '1':
+            upstream = telemost_client.list_meetings_raw(limit=limit, offset=offset)
+            logger.info("Streaming meetings list: limit=%s, offset=%s", limit, offset)
+            return _passthrough_response(upstream)
+        
         result = telemost_client.list_meetings(limit=limit, offset=offset)
-        logger.info(f"Retrieved meetings list: limit={limit}, offset={offset}")
+        logger.info("Retrieved meetings list: limit=%s, offset=%s", limit, offset)
         return jsonify(result), 200
         
     except TelemostValidationError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return jsonify({'error': str(e)}), 400
+    except TelemostUnavailableError as e:
+        logger.warning("Telemost unavailable: %s", e)
+        return jsonify({'error': str(e)}), 503
     except TelemostAPIError as e:
-        logger.error(f"API error: {e}")
+        logger.error("API error: %s", e)
         return jsonify({'error': str(e)}), 500
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
+def _passthrough_response(upstream: requests.Response) -> Response:
+    """Ответ Flask, который передает тело успешного ответа Telemost клиенту блоками
+
+    Ответ Telemost закрывается, когда клиент дочитал тело (или соединение оборвалось).
+    """
+    response = Response(
+        upstream.iter_content(PASSTHROUGH_CHUNK_SIZE),
+        status=upstream.status_code,
+        content_type=upstream.headers.get('Content-Type', 'application/json')
+    )
+    # requests распаковывает gzip, поэтому длина Telemost верна только для несжатого тела
+    if 'Content-Length' in upstream.headers and 'Content-Encoding' not in upstream.headers:
+        response.headers['Content-Length'] = upstream.headers['Content-Length']
+    response.call_on_close(upstream.close)
+    return response
+
 @meetings_bp.route('/meetings/<meeting_id>', methods=['PATCH'])
 def update_meeting(meeting_id):
     """Обновление настроек встречи"""
-    if not telemost_client:
-        return jsonify({'error': 'Telemost API client not available'}), 500
+    telemost_client, error = _get_client()
+    if error:
+        return error
     
     try:
         data = request.get_json()
@@ -135,41 +287,113 @@ def update_meeting(meeting_id):
             live_stream=live_stream
         )
         
-        logger.info(f"Meeting updated: {meeting_id}")
+        logger.info("Meeting updated: %s", meeting_id)
+        
+        # Отправленные приглашения редактируем в фоне, чтобы не ждать лимитов Telegram
+        invitations = _schedule_invitations_update({**result, 'id': meeting_id})
+        if invitations:
+            result = {**result, 'invitations_to_update': invitations}
+        
         return jsonify(result), 200
         
     except TelemostValidationError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return jsonify({'error': str(e)}), 400
+    except TelemostUnavailableError as e:
+        logger.warning("Telemost unavailable: %s", e)
+        return jsonify({'error': str(e)}), 503
     except TelemostAPIError as e:
-        logger.error(f"API error: {e}")
+        logger.error("API error: %s", e)
         return jsonify({'error': str(e)}), 500
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
+_invitations_executor: Optional[ThreadPoolExecutor] = None
+_invitations_executor_lock = threading.Lock()
+
+
+def _get_invitations_executor() -> ThreadPoolExecutor:
+    """Ограниченный пул потоков редактирования приглашений (INVITATION_EDIT_WORKERS)"""
+    global _invitations_executor
+    if _invitations_executor is None:
+        with _invitations_executor_lock:
+            if _invitations_executor is None:
+                _invitations_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('INVITATION_EDIT_WORKERS', 4)),
+                    thread_name_prefix='edit-invitations'
+                )
+    return _invitations_executor
+
+
+def _schedule_invitations_update(meeting_data):
+    """Запустить редактирование отправленных приглашений по встрече
+
+    Returns:
+        Количество приглашений, которые будут проверены
+    """
+    try:
+        from src.telegram_bot import get_telegram_bot, update_meeting_invitations
+        telegram_bot = get_telegram_bot()
+        if not telegram_bot.bot_token:
+            return 0
+        count = telegram_bot.message_store.count_for_meeting(meeting_data['id'])
+    except Exception as e:
+        logger.error("Failed to look up sent invitations: %s", e)
+        return 0
+    
+    if not count:
+        return 0
+    
+    def run():
+        try:
+            update_meeting_invitations(meeting_data)
+        except Exception as e:
+            logger.error("Failed to update invitations for meeting %s: %s", meeting_data['id'], e)
+    
+    # Копия контекста запроса: правки сообщений попадут в его трассу
+    _get_invitations_executor().submit(contextvars.copy_context().run, run)
+    return count
+
 @meetings_bp.route('/meetings/<meeting_id>', methods=['DELETE'])
 def delete_meeting(meeting_id):
     """Удаление встречи"""
-    if not telemost_client:
-        return jsonify({'error': 'Telemost API client not available'}), 500
+    telemost_client, error = _get_client()
+    if error:
+        return error
     
     try:
         result = telemost_client.delete_meeting(meeting_id)
-        logger.info(f"Meeting deleted: {meeting_id}")
+        logger.info("Meeting deleted: %s", meeting_id)
         return jsonify(result), 200
         
     except TelemostValidationError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         return jsonify({'error': str(e)}), 400
+    except TelemostUnavailableError as e:
+        logger.warning("Telemost unavailable: %s", e)
+        return jsonify({'error': str(e)}), 503
     except TelemostAPIError as e:
-        logger.error(f"API error: {e}")
+        logger.error("API error: %s", e)
         return jsonify({'error': str(e)}), 500
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
+def _parse_remind_before(value) -> List[int]:
+    """Список минут напоминаний: только список неотрицательных целых
+
+    Raises:
+        ValueError: Если значение не список или в нем не неотрицательное целое
+    """
+    if not isinstance(value, list):
+        raise ValueError("remind_before must be a list")
+    if not all(isinstance(minutes, int) and not isinstance(minutes, bool) and minutes >= 0 for minutes in value):
+        raise ValueError("remind_before must contain non-negative integers")
+    return value
+
 @meetings_bp.route('/send-meeting', methods=['POST'])
+@rate_limited
 def send_meeting_to_contacts():
     """Отправка ссылки на встречу выбранным контактам"""
     try:
@@ -187,7 +411,19 @@ def send_meeting_to_contacts():
         if not contacts:
             return jsonify({'error': 'At least one contact is required'}), 400
         
-        logger.info(f"Sending meeting {meeting_data.get('id')} to {len(contacts)} contacts")
+        # Время начала встречи нужно только для напоминаний
+        start_time = data.get('start_time') or meeting_data.get('start_time')
+        remind_before = data.get('remind_before')
+        if start_time:
+            from src.reminders import parse_start_time
+            try:
+                parse_start_time(start_time)
+                if remind_before is not None:
+                    remind_before = _parse_remind_before(remind_before)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid start_time or remind_before'}), 400
+        
+        logger.info("Sending meeting %s to %s contacts", meeting_data.get('id'), len(contacts))
         
         # Импортируем функцию отправки
         from src.telegram_bot import send_meeting_to_contacts as send_to_telegram
@@ -203,26 +439,52 @@ def send_meeting_to_contacts():
                 'note': 'Telegram bot token not configured - this is a simulation'
             }), 200
         
-        return jsonify({
+        response_data = {
             'success': result['success'],
             'sent_count': result['sent_count'],
             'failed_count': result['failed_count'],
             'message': f'Meeting link sent to {result["sent_count"]} contacts',
             'errors': result.get('errors', [])
-        }), 200
+        }
+        
+        if start_time and result.get('delivered_chat_ids'):
+            from src.reminders import get_reminder_scheduler
+            response_data['reminders_scheduled'] = get_reminder_scheduler().schedule(
+                meeting_data,
+                result['delivered_chat_ids'],
+                start_time,
+                remind_before
+            )
+        
+        return jsonify(response_data), 200
         
     except Exception as e:
-        logger.error(f"Error sending meeting to contacts: {e}")
+        logger.error("Error sending meeting to contacts: %s", e)
         return jsonify({'error': 'Failed to send meeting to contacts'}), 500
 
 @meetings_bp.route('/health', methods=['GET'])
 def health_check():
     """Проверка состояния API"""
+    telemost_pool = _get_pool()
     status = {
         'status': 'healthy',
-        'telemost_api': 'available' if telemost_client else 'unavailable'
+        'telemost_api': 'available' if telemost_pool else 'unavailable'
     }
     
+    if telemost_pool:
+        # Подробности по организациям и токенам — только в /admin/telemost
+        status['telemost_tokens'] = telemost_pool.summary()
+        telemost_health_cache = telemost_pool.health_cache
+        try:
+            telemost_health_cache.get()
+            status['telemost_check_age'] = round(telemost_health_cache.age or 0, 1)
+            if telemost_health_cache.is_stale():
+                status['telemost_api'] = 'degraded'
+        except TelemostAPIError as e:
+            logger.warning("Telemost health check failed: %s", e)
+            status['telemost_api'] = 'unavailable'
+            status['telemost_error'] = str(e)
+    
     return jsonify(status), 200
 
 
@@ -234,7 +496,7 @@ def bot_status():
         status = check_bot_status()
         return jsonify(status), 200
     except Exception as e:
-        logger.error(f"Error checking bot status: {e}")
+        logger.error("Error checking bot status: %s", e)
         return jsonify({
             'status': 'error',
             'message': 'Failed to check bot status'
@@ -0,0 +1,31 @@
+import time
+
+from flask import Blueprint, Response, g, request
+
+from src.metrics import HTTP_LATENCY, HTTP_REQUESTS, render
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.before_app_request
+def start_request_timer():
+    """Время начала обработки запроса"""
+    g.request_started = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def record_request(response):
+    """Учет запроса по шаблону маршрута (а не по конкретному URL)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUESTS.labels(request.method, route, response.status_code).inc()
+        HTTP_LATENCY.labels(request.method, route).observe(time.perf_counter() - started)
+    return response
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Метрики в формате Prometheus"""
+    body, content_type = render()
+    return Response(body, content_type=content_type)
@@ -1,8 +1,25 @@
+import threading
+
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
 
 user_bp = Blueprint('user', __name__)
 
+_tables_created = False
+_tables_lock = threading.Lock()
+
+
+@user_bp.before_request
+def create_tables():
+    """Создание таблиц при первом обращении к API пользователей, а не при старте"""
+    global _tables_created
+    if _tables_created:
+        return
+    with _tables_lock:
+        if not _tables_created:
+            db.create_all()
+            _tables_created = True
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
     users = User.query.all()
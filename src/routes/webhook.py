@@ -0,0 +1,71 @@
+import os
+import hmac
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from flask import Blueprint, request, jsonify
+
+if TYPE_CHECKING:
+    from src.bot_handlers import UpdateWorkerPool
+
+logger = logging.getLogger(__name__)
+
+webhook_bp = Blueprint('webhook', __name__)
+
+_update_pool: Optional['UpdateWorkerPool'] = None
+_update_pool_lock = threading.Lock()
+
+
+def get_update_pool() -> 'UpdateWorkerPool':
+    """Пул обработки обновлений (создается при первом webhook-запросе)"""
+    global _update_pool
+    if _update_pool is None:
+        with _update_pool_lock:
+            if _update_pool is None:
+                from src.bot_handlers import UpdateDispatcher, UpdateWorkerPool, register_default_handlers
+                from src.inline_mode import register_inline_handlers
+                from src.storage import BotStateStore
+                from src.telegram_bot import get_telegram_bot
+                dispatcher = register_inline_handlers(register_default_handlers(UpdateDispatcher(get_telegram_bot())))
+                _update_pool = UpdateWorkerPool(
+                    dispatcher,
+                    workers=int(os.getenv('BOT_WORKERS', 8)),
+                    max_queue=int(os.getenv('BOT_UPDATE_QUEUE_SIZE', 1000)),
+                    state_store=BotStateStore(),
+                    lease=float(os.getenv('BOT_UPDATE_LEASE', 120))
+                )
+    return _update_pool
+
+
+@webhook_bp.route('/telegram/webhook', methods=['POST'])
+def telegram_webhook():
+    """Прием обновлений Telegram: проверка секрета, сохранение в базу, постановка в очередь и ответ
+
+    200 отвечается только после записи обновления в базу: Telegram считает
+    его доставленным и больше не повторит.
+    """
+    secret = os.getenv('TELEGRAM_WEBHOOK_SECRET')
+    if not secret:
+        return jsonify({'error': 'Webhook is not configured'}), 404
+
+    received = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+    if not hmac.compare_digest(received.encode(), secret.encode()):
+        logger.warning("Webhook request with invalid secret from %s", request.remote_addr)
+        return jsonify({'error': 'Forbidden'}), 403
+
+    update = request.get_json(silent=True)
+    if not isinstance(update, dict) or 'update_id' not in update:
+        return jsonify({'error': 'Invalid update'}), 400
+
+    try:
+        accepted = get_update_pool().submit(update)
+    except Exception as e:
+        # Обновление не сохранено: Telegram повторит доставку
+        logger.error("Failed to accept update %s: %s", update.get('update_id'), e)
+        return jsonify({'error': 'Update was not stored'}), 503
+    if not accepted:
+        # Telegram повторит доставку позже
+        return jsonify({'error': 'Update queue is full'}), 503
+
+    return '', 200
@@ -0,0 +1,43 @@
+"""
+Консистентное хеширование для распределения получателей между узлами
+"""
+
+import bisect
+import hashlib
+from typing import Any, Dict, Generic, List, Sequence, TypeVar
+
+T = TypeVar('T')
+
+
+class ConsistentHashRing(Generic[T]):
+    """Кольцо консистентного хеширования с виртуальными узлами
+
+    Ключ всегда попадает на один и тот же узел, а при добавлении или удалении
+    узла перераспределяется только ~1/N ключей.
+    """
+
+    def __init__(self, nodes: Sequence[T], replicas: int = 100, node_key=str):
+        """
+        Args:
+            nodes: Узлы кольца
+            replicas: Количество виртуальных узлов на каждый узел
+            node_key: Функция получения стабильного имени узла для хеширования
+        """
+        if not nodes:
+            raise ValueError("Hash ring requires at least one node")
+
+        self._ring: Dict[int, T] = {}
+        for node in nodes:
+            name = node_key(node)
+            for i in range(replicas):
+                self._ring[self._hash(f"{name}#{i}")] = node
+        self._keys: List[int] = sorted(self._ring)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+    def get(self, key: Any) -> T:
+        """Узел, отвечающий за ключ"""
+        index = bisect.bisect(self._keys, self._hash(str(key))) % len(self._keys)
+        return self._ring[self._keys[index]]
@@ -0,0 +1,366 @@
+"""
+Сборка и раздача статических файлов Web App
+
+Сборка (python -m src.static_assets) кладет в static/dist:
+- копии файлов с хешем содержимого в имени (favicon.3f2a9c1b.ico);
+- сжатые варианты .gz и .br (brotli — если установлен пакет Brotli);
+- manifest.json с хешами, типами и вариантами файлов.
+
+HTML-страницы (точки входа Web App) сохраняют свои имена, ссылки в них на
+остальные файлы заменяются хешированными именами. Хешированные файлы
+отдаются с Cache-Control: immutable, остальные — с обязательной
+перепроверкой по ETag (ответ 304 без тела).
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import time
+import logging
+import mimetypes
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Response, request, send_file
+
+from src import memory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Файлы меньше этого размера и уже сжатые форматы не сжимаем
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml',
+                      'image/vnd.microsoft.icon', 'image/x-icon')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Предпочтение кодировок при согласовании Accept-Encoding
+ENCODING_PREFERENCE = ('br', 'gzip')
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def _content_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def _hashed_name(name: str, digest: str) -> str:
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest[:8]}{ext}"
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def build(static_folder: str) -> Dict[str, Any]:
+    """Собрать статику в static/dist и записать manifest.json
+
+    Args:
+        static_folder: Каталог с исходной статикой
+
+    Returns:
+        Манифест
+    """
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist_folder):
+        shutil.rmtree(dist_folder)
+    os.makedirs(dist_folder)
+
+    sources = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_folder]
+        for filename in files:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                sources[name] = f.read()
+
+    # Все файлы, кроме HTML, получают хеш в имени; ссылки на них в HTML заменяются
+    aliases = {}
+    for name, data in sources.items():
+        if not name.endswith('.html'):
+            aliases[name] = _hashed_name(name, hashlib.sha256(data).hexdigest())
+
+    if aliases:
+        pattern = re.compile(r'(?<![\w./-])/?(' + '|'.join(re.escape(n) for n in sorted(aliases, key=len, reverse=True)) + r')(?![\w.-])')
+        for name in sources:
+            if name.endswith('.html'):
+                text = sources[name].decode('utf-8')
+                text = pattern.sub(lambda m: m.group(0).replace(m.group(1), aliases[m.group(1)]), text)
+                sources[name] = text.encode('utf-8')
+
+    assets = {}
+    for name, data in sources.items():
+        digest = hashlib.sha256(data).hexdigest()
+        immutable = name in aliases
+        output_name = aliases.get(name, name)
+
+        content_type = _content_type(name)
+        output_path = os.path.join(dist_folder, output_name)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+        encodings = {}
+        if len(data) >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+            for encoding in ENCODING_PREFERENCE:
+                if encoding == 'br' and brotli is None:
+                    continue
+                compressed = _compress(data, encoding)
+                if len(compressed) < len(data) * 0.9:
+                    variant = output_name + ENCODING_SUFFIXES[encoding]
+                    with open(os.path.join(dist_folder, variant), 'wb') as f:
+                        f.write(compressed)
+                    encodings[encoding] = variant
+
+        assets[output_name] = {
+            'file': output_name,
+            'hash': digest[:16],
+            'size': len(data),
+            'content_type': content_type,
+            'immutable': immutable,
+            'encodings': encodings,
+        }
+
+    manifest = {'assets': assets, 'aliases': aliases}
+    with open(os.path.join(dist_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    logger.info("Built %s static assets into %s", len(assets), dist_folder)
+    return manifest
+
+
+@lru_cache(maxsize=256)
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Кодировки из Accept-Encoding с их q (браузеры шлют ограниченный набор значений)"""
+    accepted = {}
+    for item in header.split(','):
+        token, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    return accepted
+
+
+class StaticAssets:
+    """Раздача собранной статики из памяти
+
+    Манифест и содержимое файлов (вместе со сжатыми вариантами) читаются один
+    раз при старте и хранятся в словаре по ключу (файл, кодировка), поэтому
+    ответ на запрос статики не обращается к файловой системе. Файлы больше
+    max_memory_size остаются на диске и отдаются через wsgi.file_wrapper —
+    gunicorn передает их в сокет через sendfile.
+    """
+
+    def __init__(self, static_folder: str, auto_build: bool = True, max_memory_size: int = 1024 * 1024):
+        """
+        Args:
+            static_folder: Каталог с исходной статикой
+            auto_build: Собрать статику, если манифест не найден (удобно в разработке)
+            max_memory_size: Максимальный размер файла, хранимого в памяти (байт)
+        """
+        self.static_folder = static_folder
+        self.dist_folder = os.path.join(static_folder, DIST_DIR)
+        self.auto_build = auto_build
+        self.max_memory_size = max_memory_size
+        self._watcher: Optional[threading.Thread] = None
+        self._load()
+        memory.track('static_assets', self)
+
+    def _load(self, rebuild: bool = False):
+        manifest_path = os.path.join(self.dist_folder, MANIFEST_NAME)
+        if rebuild:
+            manifest = build(self.static_folder)
+        elif os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        elif self.auto_build and os.path.isdir(self.static_folder):
+            logger.warning("Static manifest not found, building assets on startup")
+            manifest = build(self.static_folder)
+        else:
+            manifest = {'assets': {}, 'aliases': {}}
+
+        # Манифест мог устареть (dist/ скопирован не полностью или почищен вручную):
+        # в разработке пересобираем, иначе не отдаем отсутствующие файлы
+        missing = {
+            filename
+            for asset in manifest['assets'].values()
+            for filename in (asset['file'], *asset['encodings'].values())
+            if not os.path.isfile(os.path.join(self.dist_folder, filename))
+        }
+        if missing and not rebuild and self.auto_build and os.path.isdir(self.static_folder):
+            logger.warning("Static manifest is stale (%s files missing), rebuilding assets", len(missing))
+            self._load(rebuild=True)
+            return
+        if missing:
+            logger.warning("Static files listed in manifest are missing, skipping: %s", ', '.join(sorted(missing)))
+
+        assets: Dict[str, Dict[str, Any]] = {}
+        cache: Dict[Tuple[str, Optional[str]], bytes] = {}
+        for name, asset in manifest['assets'].items():
+            if asset['file'] in missing:
+                continue
+            asset = {**asset, 'encodings': {
+                encoding: filename for encoding, filename in asset['encodings'].items() if filename not in missing
+            }}
+            assets[name] = asset
+            variants = {None: asset['file'], **asset['encodings']}
+            for encoding, filename in variants.items():
+                path = os.path.join(self.dist_folder, filename)
+                if os.path.getsize(path) <= self.max_memory_size:
+                    with open(path, 'rb') as f:
+                        cache[(asset['file'], encoding)] = f.read()
+        aliases = {name: hashed for name, hashed in manifest['aliases'].items() if hashed in assets}
+
+        # Одно присваивание — запросы не видят наполовину обновленное состояние
+        self._state = (assets, aliases, cache)
+        logger.info("Static assets loaded: %s files, %s bytes in memory",
+                    len(assets), sum(len(body) for body in cache.values()))
+
+    @property
+    def assets(self) -> Dict[str, Dict[str, Any]]:
+        return self._state[0]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Файлы статики в памяти (вместе со сжатыми вариантами) и кэш Accept-Encoding"""
+        cache = self._state[2]
+        return {
+            'items': len(cache),
+            'bytes': sum(len(body) for body in cache.values()),
+            'accept_encodings': _parse_accept_encoding.cache_info().currsize
+        }
+
+    @property
+    def aliases(self) -> Dict[str, str]:
+        return self._state[1]
+
+    def _source_signature(self) -> Tuple[Tuple[str, float, int], ...]:
+        signature = []
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = [d for d in dirs if os.path.join(root, d) != self.dist_folder]
+            for filename in files:
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime, stat.st_size))
+        return tuple(sorted(signature))
+
+    def watch(self, interval: float = 1.0) -> None:
+        """Пересобирать статику при изменении исходников (только для разработки)
+
+        Args:
+            interval: Период проверки времени изменения файлов (сек)
+        """
+        if self._watcher is not None:
+            return
+
+        def run():
+            signature = self._source_signature()
+            while True:
+                time.sleep(interval)
+                try:
+                    current = self._source_signature()
+                    if current != signature:
+                        signature = current
+                        logger.info("Static sources changed, rebuilding assets")
+                        self._load(rebuild=True)
+                except Exception as e:
+                    logger.error("Failed to rebuild static assets: %s", e)
+
+        self._watcher = threading.Thread(target=run, name='static-watcher', daemon=True)
+        self._watcher.start()
+
+    def url_for(self, name: str) -> str:
+        """Публичный путь файла (хешированное имя, если оно есть)"""
+        return '/' + self.aliases.get(name, name)
+
+    def resolve(self, path: str) -> Optional[Dict[str, Any]]:
+        """Найти файл по пути запроса; обращение по исходному имени не кэшируется навсегда"""
+        assets, aliases, _ = self._state
+        asset = assets.get(path)
+        if asset is not None:
+            return asset
+
+        hashed = aliases.get(path)
+        if hashed is not None:
+            return {**assets[hashed], 'immutable': False}
+        return None
+
+    @staticmethod
+    def negotiate(asset: Dict[str, Any], accept_encoding: str) -> Optional[str]:
+        """Выбрать кодировку из Accept-Encoding (None — без сжатия)"""
+        if not asset['encodings'] or not accept_encoding:
+            return None
+
+        accepted = _parse_accept_encoding(accept_encoding)
+        for encoding in ENCODING_PREFERENCE:
+            quality = accepted.get(encoding, accepted.get('*', 0.0))
+            if encoding in asset['encodings'] and quality > 0:
+                return encoding
+        return None
+
+    def response(self, path: str) -> Optional[Response]:
+        """Ответ с файлом, ETag, Cache-Control и согласованием сжатия
+
+        Returns:
+            Ответ Flask или None, если файла нет
+        """
+        asset = self.resolve(path)
+        if asset is None:
+            return None
+
+        encoding = self.negotiate(asset, request.headers.get('Accept-Encoding', ''))
+        etag = asset['hash'] + (f"-{encoding}" if encoding else '')
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            body = self._state[2].get((asset['file'], encoding))
+            if body is not None:
+                response = Response(body, mimetype=asset['content_type'])
+            else:
+                filename = asset['encodings'][encoding] if encoding else asset['file']
+                response = send_file(
+                    os.path.join(self.dist_folder, filename),
+                    mimetype=asset['content_type'],
+                    etag=False,
+                    conditional=False,
+                    max_age=None
+                )
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if asset['immutable'] else REVALIDATE_CACHE_CONTROL
+        if asset['encodings']:
+            response.vary.add('Accept-Encoding')
+        return response
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), 'static')
+    result = build(folder)
+    for asset in result['assets'].values():
+        variants = ', '.join(f"{enc} {os.path.getsize(os.path.join(folder, DIST_DIR, name))}"
+                             for enc, name in asset['encodings'].items())
+        print(f"{asset['file']:40} {asset['size']:>8}  {variants}")
@@ -0,0 +1,595 @@
+"""
+Локальное хранилище состояния бота (SQLite)
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+import logging
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), 'database', 'bot.db')
+
+
+def _gevent_threadpool():
+    """Пул настоящих потоков gevent или None, если потоки не пропатчены"""
+    if 'gevent' not in sys.modules:
+        return None
+    from gevent import get_hub, monkey
+    if not monkey.is_module_patched('threading'):
+        return None
+    return get_hub().threadpool
+
+
+def blocking(method: Callable) -> Callable:
+    """Выполнять метод хранилища в настоящем потоке, если воркер работает на gevent
+
+    sqlite3 не знает о gevent: ожидание блокировки базы (timeout=10) и запись
+    на диск останавливали бы все гринлеты воркера. В пуле потоков hub'а
+    соединения живут в потоках пула и переиспользуются между запросами.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        pool = _gevent_threadpool()
+        if pool is None:
+            return method(self, *args, **kwargs)
+        return pool.apply(method, (self,) + args, kwargs)
+    return wrapper
+
+
+class SQLiteStore:
+    """Базовый класс хранилища поверх sqlite3
+
+    Каждый поток получает собственное соединение, база открывается в режиме WAL,
+    чтобы фоновые воркеры и веб-процесс могли работать с ней одновременно.
+    Публичные методы наследников помечены @blocking: под gevent запросы
+    выполняются в пуле потоков hub'а, и соединение открывается один раз
+    на поток пула, а не на каждый гринлет.
+    """
+
+    # SQL-схема, которую наследники создают при инициализации
+    SCHEMA = ""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """Инициализация хранилища
+
+        Args:
+            db_path: Путь к файлу базы. Если не указан, берется из BOT_DB_PATH
+        """
+        self.db_path = db_path or os.getenv('BOT_DB_PATH', DEFAULT_DB_PATH)
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._create_schema()
+
+    @blocking
+    def _create_schema(self) -> None:
+        with self._connection() as conn:
+            if self.SCHEMA:
+                conn.executescript(self.SCHEMA)
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Обновить таблицы баз, созданных прошлыми версиями (вызывается после SCHEMA)"""
+        pass
+
+    def _connection(self) -> sqlite3.Connection:
+        """Получить соединение текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+
+class BotStateStore(SQLiteStore):
+    """Хранилище служебных значений бота (offset getUpdates и т.п.)
+    и обновлений, полученных, но еще не обработанных
+
+    Обновление в pending_updates «захвачено» процессом, который его
+    обрабатывает (claimed_at); захват старше срока аренды означает, что
+    процесс завершился, не обработав обновление. id обработанных обновлений
+    хранятся PROCESSED_TTL секунд, чтобы повторная доставка в любой процесс
+    не обрабатывалась второй раз.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS pending_updates (
+            update_id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL,
+            claimed_at REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS processed_updates (
+            update_id INTEGER PRIMARY KEY,
+            processed_at REAL NOT NULL
+        );
+    """
+
+    # Telegram хранит неподтвержденные обновления сутки — дольше дубликаты не придут
+    PROCESSED_TTL = 86400
+
+    # Как часто удалять старые id обработанных обновлений (сек)
+    CLEANUP_INTERVAL = 600
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__(db_path)
+        self._last_cleanup = 0.0
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        # Базы, созданные до приема обновлений через webhook, не содержат claimed_at
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(pending_updates)')}
+        if 'claimed_at' not in columns:
+            conn.execute('ALTER TABLE pending_updates ADD COLUMN claimed_at REAL NOT NULL DEFAULT 0')
+
+    @blocking
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Получить значение по ключу"""
+        row = self._connection().execute(
+            'SELECT value FROM bot_state WHERE key = ?', (key,)
+        ).fetchone()
+        return row['value'] if row else default
+
+    @blocking
+    def set(self, key: str, value: str) -> None:
+        """Сохранить значение по ключу"""
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT INTO bot_state (key, value) VALUES (?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (key, value)
+            )
+
+    @blocking
+    def add_pending(self, updates: List[Dict[str, Any]], offset_key: str, offset: int) -> None:
+        """Сохранить полученные обновления вместе с новым offset (одной транзакцией)"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO pending_updates (update_id, data, claimed_at) VALUES (?, ?, ?)',
+                [(update['update_id'], json.dumps(update, ensure_ascii=False), now) for update in updates]
+            )
+            conn.execute(
+                'INSERT INTO bot_state (key, value) VALUES (?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (offset_key, str(offset))
+            )
+
+    @blocking
+    def add_update(self, update: Dict[str, Any]) -> bool:
+        """Сохранить обновление, полученное через webhook, и захватить его
+
+        Returns:
+            False, если обновление уже сохранено или обработано (повторная доставка)
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO pending_updates (update_id, data, claimed_at) '
+                'SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM processed_updates WHERE update_id = ?)',
+                (update['update_id'], json.dumps(update, ensure_ascii=False), time.time(), update['update_id'])
+            )
+            return cursor.rowcount == 1
+
+    @blocking
+    def claim_stale(self, claimed_before: float) -> List[Dict[str, Any]]:
+        """Захватить обновления, чей захват старше claimed_before (процесс завершился)
+
+        Returns:
+            Обновления в порядке получения
+        """
+        with self._connection() as conn:
+            rows = conn.execute(
+                'UPDATE pending_updates SET claimed_at = ? WHERE claimed_at < ? RETURNING update_id, data',
+                (time.time(), claimed_before)
+            ).fetchall()
+        return [json.loads(row['data']) for row in sorted(rows, key=lambda row: row['update_id'])]
+
+    @blocking
+    def remove_pending(self, update_id: int) -> None:
+        """Отметить обновление обработанным"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute('DELETE FROM pending_updates WHERE update_id = ?', (update_id,))
+            conn.execute(
+                'INSERT OR REPLACE INTO processed_updates (update_id, processed_at) VALUES (?, ?)',
+                (update_id, now)
+            )
+            if now - self._last_cleanup > self.CLEANUP_INTERVAL:
+                self._last_cleanup = now
+                conn.execute('DELETE FROM processed_updates WHERE processed_at < ?', (now - self.PROCESSED_TTL,))
+
+    @blocking
+    def pending(self) -> List[Dict[str, Any]]:
+        """Необработанные обновления в порядке получения"""
+        rows = self._connection().execute(
+            'SELECT data FROM pending_updates ORDER BY update_id'
+        ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+
+class MeetingStore(SQLiteStore):
+    """Хранилище встреч, созданных через бота
+
+    Встречи без владельца (owner_id IS NULL) — заранее созданные комнаты
+    «теплого» пула, которые выдаются пользователям по запросу.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meetings (
+            id TEXT PRIMARY KEY,
+            owner_id INTEGER,
+            join_url TEXT NOT NULL,
+            title TEXT,
+            data TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_meetings_owner ON meetings (owner_id, created_at);
+        CREATE TABLE IF NOT EXISTS inline_offers (
+            user_id INTEGER PRIMARY KEY,
+            meeting_id TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+    """
+
+    @blocking
+    def add(self, meeting: Dict[str, Any], owner_id: Optional[int] = None, title: Optional[str] = None) -> None:
+        """Сохранить встречу
+
+        Args:
+            meeting: Данные встречи из Telemost API
+            owner_id: ID пользователя Telegram (None — комната пула)
+            title: Название встречи
+        """
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO meetings (id, owner_id, join_url, title, data, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (meeting['id'], owner_id, meeting.get('join_url', ''), title,
+                 json.dumps(meeting, ensure_ascii=False), time.time())
+            )
+
+    @blocking
+    def recent(self, owner_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Последние встречи пользователя (новые первыми)"""
+        rows = self._connection().execute(
+            'SELECT id, join_url, title, created_at FROM meetings '
+            'WHERE owner_id = ? ORDER BY created_at DESC LIMIT ?',
+            (owner_id, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    @blocking
+    def count_unclaimed(self) -> int:
+        """Количество свободных комнат пула"""
+        row = self._connection().execute(
+            'SELECT COUNT(*) AS n FROM meetings WHERE owner_id IS NULL'
+        ).fetchone()
+        return row['n']
+
+    @blocking
+    def claim(self, owner_id: int, title: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Атомарно забрать свободную комнату пула для пользователя
+
+        Returns:
+            Данные встречи или None, если пул пуст
+        """
+        conn = self._connection()
+        with conn:
+            row = conn.execute(
+                'UPDATE meetings SET owner_id = ?, title = ?, created_at = ? '
+                'WHERE id = (SELECT id FROM meetings WHERE owner_id IS NULL ORDER BY created_at LIMIT 1) '
+                'RETURNING data',
+                (owner_id, title, time.time())
+            ).fetchone()
+        return json.loads(row['data']) if row else None
+
+    @blocking
+    def offered(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Комната, предложенная пользователю в inline-режиме (если предложение не истекло)"""
+        row = self._connection().execute(
+            'SELECT m.data FROM inline_offers o JOIN meetings m ON m.id = o.meeting_id '
+            'WHERE o.user_id = ? AND o.expires_at > ? AND m.owner_id = o.user_id',
+            (user_id, time.time())
+        ).fetchone()
+        return json.loads(row['data']) if row else None
+
+    @blocking
+    def set_offer(self, user_id: int, meeting_id: str, ttl: float) -> None:
+        """Запомнить комнату, предложенную пользователю, на ttl секунд"""
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO inline_offers (user_id, meeting_id, expires_at) VALUES (?, ?, ?)',
+                (user_id, meeting_id, time.time() + ttl)
+            )
+
+    @blocking
+    def clear_offer(self, user_id: int) -> None:
+        """Предложение использовано: комната остается у пользователя"""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM inline_offers WHERE user_id = ?', (user_id,))
+
+    @blocking
+    def expire_offers(self, release: bool) -> int:
+        """Удалить истекшие предложения
+
+        Args:
+            release: Вернуть их комнаты в пул (только если известно, что
+                отправленные комнаты снимают предложение — inline feedback)
+
+        Returns:
+            Количество истекших предложений
+        """
+        now = time.time()
+        with self._connection() as conn:
+            if release:
+                conn.execute(
+                    'UPDATE meetings SET owner_id = NULL, title = NULL WHERE EXISTS ('
+                    'SELECT 1 FROM inline_offers o WHERE o.meeting_id = meetings.id '
+                    'AND o.user_id = meetings.owner_id AND o.expires_at <= ?)',
+                    (now,)
+                )
+            cursor = conn.execute('DELETE FROM inline_offers WHERE expires_at <= ?', (now,))
+        return cursor.rowcount
+
+    @blocking
+    def count_offers(self) -> int:
+        """Количество действующих и еще не удаленных предложений"""
+        row = self._connection().execute('SELECT COUNT(*) AS n FROM inline_offers').fetchone()
+        return row['n']
+
+
+class SentMessageStore(SQLiteStore):
+    """Хранилище отправленных приглашений: (meeting_id, chat_id, message_id)
+
+    Позволяет при изменении встречи отредактировать уже отправленные
+    сообщения вместо повторной рассылки.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sent_invitations (
+            meeting_id TEXT NOT NULL,
+            chat_id TEXT NOT NULL,
+            message_id INTEGER NOT NULL,
+            meeting_data TEXT NOT NULL,
+            custom_message TEXT,
+            sent_at REAL NOT NULL,
+            bot_id TEXT,
+            PRIMARY KEY (meeting_id, chat_id)
+        );
+    """
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        # Базы, созданные до появления пула ботов, не содержат bot_id
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(sent_invitations)')}
+        if 'bot_id' not in columns:
+            conn.execute('ALTER TABLE sent_invitations ADD COLUMN bot_id TEXT')
+
+    @blocking
+    def add(
+        self,
+        meeting_id: str,
+        chat_id: Any,
+        message_id: int,
+        meeting_data: Dict[str, Any],
+        custom_message: Optional[str] = None,
+        bot_id: Optional[str] = None
+    ) -> None:
+        """Сохранить отправленное приглашение (повторная отправка заменяет запись)"""
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sent_invitations '
+                '(meeting_id, chat_id, message_id, meeting_data, custom_message, sent_at, bot_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (str(meeting_id), str(chat_id), message_id,
+                 json.dumps(meeting_data, ensure_ascii=False), custom_message, time.time(), bot_id)
+            )
+
+    @blocking
+    def for_meeting(self, meeting_id: str) -> List[Dict[str, Any]]:
+        """Все приглашения, отправленные по встрече"""
+        rows = self._connection().execute(
+            'SELECT chat_id, message_id, meeting_data, custom_message, bot_id FROM sent_invitations '
+            'WHERE meeting_id = ?',
+            (str(meeting_id),)
+        ).fetchall()
+        return [
+            {
+                'chat_id': row['chat_id'],
+                'message_id': row['message_id'],
+                'meeting_data': json.loads(row['meeting_data']),
+                'custom_message': row['custom_message'],
+                'bot_id': row['bot_id']
+            }
+            for row in rows
+        ]
+
+    @blocking
+    def bot_id_for(self, meeting_id: str, chat_id: Any) -> Optional[str]:
+        """ID бота пула, отправившего приглашение в чат"""
+        row = self._connection().execute(
+            'SELECT bot_id FROM sent_invitations WHERE meeting_id = ? AND chat_id = ?',
+            (str(meeting_id), str(chat_id))
+        ).fetchone()
+        return row['bot_id'] if row else None
+
+    @blocking
+    def update_meeting_data(self, meeting_id: str, chat_id: Any, meeting_data: Dict[str, Any]) -> None:
+        """Обновить сохраненные данные встречи после редактирования сообщения"""
+        with self._connection() as conn:
+            conn.execute(
+                'UPDATE sent_invitations SET meeting_data = ? WHERE meeting_id = ? AND chat_id = ?',
+                (json.dumps(meeting_data, ensure_ascii=False), str(meeting_id), str(chat_id))
+            )
+
+    @blocking
+    def count_for_meeting(self, meeting_id: str) -> int:
+        """Количество приглашений по встрече"""
+        row = self._connection().execute(
+            'SELECT COUNT(*) AS n FROM sent_invitations WHERE meeting_id = ?', (str(meeting_id),)
+        ).fetchone()
+        return row['n']
+
+
+class ReminderStore(SQLiteStore):
+    """Хранилище запланированных напоминаний о встречах
+
+    Статусы: pending — ждет отправки, sending — забрано одним из процессов,
+    sent — отправлено, failed — ошибка отправки, expired — встреча уже началась.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            meeting_id TEXT,
+            chat_id TEXT NOT NULL,
+            fire_at REAL NOT NULL,
+            meeting_start REAL NOT NULL,
+            text TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders (status, fire_at);
+    """
+
+    @blocking
+    def add_many(self, reminders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Сохранить напоминания
+
+        Args:
+            reminders: Словари с ключами meeting_id, chat_id, fire_at, meeting_start, text
+
+        Returns:
+            Те же напоминания с присвоенными id
+        """
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            for reminder in reminders:
+                cursor = conn.execute(
+                    'INSERT INTO reminders (meeting_id, chat_id, fire_at, meeting_start, text, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (reminder.get('meeting_id'), str(reminder['chat_id']), reminder['fire_at'],
+                     reminder['meeting_start'], reminder['text'], now)
+                )
+                reminder['id'] = cursor.lastrowid
+        return reminders
+
+    @blocking
+    def pending(self, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Неотправленные напоминания (опционально — со временем срабатывания до until)"""
+        query = 'SELECT id, meeting_id, chat_id, fire_at, meeting_start, text FROM reminders WHERE status = ?'
+        params: List[Any] = ['pending']
+        if until is not None:
+            query += ' AND fire_at <= ?'
+            params.append(until)
+        rows = self._connection().execute(query + ' ORDER BY fire_at', params).fetchall()
+        return [dict(row) for row in rows]
+
+    @blocking
+    def claim(self, reminder_id: int) -> bool:
+        """Атомарно забрать напоминание на отправку (защита от дублей между процессами)"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE reminders SET status = 'sending' WHERE id = ? AND status = 'pending'",
+                (reminder_id,)
+            )
+        return cursor.rowcount == 1
+
+    @blocking
+    def set_status(self, reminder_id: int, status: str) -> None:
+        """Обновить статус напоминания"""
+        with self._connection() as conn:
+            conn.execute('UPDATE reminders SET status = ? WHERE id = ?', (status, reminder_id))
+
+    @blocking
+    def reset_stuck(self, older_than: float) -> int:
+        """Вернуть в очередь напоминания, зависшие в статусе sending (процесс упал при отправке)"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE reminders SET status = 'pending' WHERE status = 'sending' AND fire_at < ?",
+                (older_than,)
+            )
+        return cursor.rowcount
+
+
+class RateLimitStore(SQLiteStore):
+    """Счетчики запросов по окнам времени, общие для всех процессов (см. SlidingWindowLimiter)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT NOT NULL,
+            window_start INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (key, window_start)
+        );
+    """
+
+    # Как часто удалять счетчики прошедших окон (сек)
+    CLEANUP_INTERVAL = 60
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__(db_path)
+        self._last_cleanup = 0.0
+
+    @blocking
+    def hit(self, key: str, window_start: int, window: int, allow: Callable[[int, int], bool]) -> Tuple[bool, int, int]:
+        """Атомарно учесть запрос, если allow разрешает
+
+        Счетчик увеличивается до проверки: блокировка записи SQLite удерживается
+        до конца транзакции, поэтому процессы не превысят лимит одновременно.
+
+        Args:
+            key: Ключ ограничения (например, ip:1.2.3.4)
+            window_start: Начало текущего окна (сек)
+            window: Длина окна (сек)
+            allow: Функция (запросов в прошлом окне, в текущем с учетом этого) -> разрешить ли
+
+        Returns:
+            Кортеж (разрешено, запросов в прошлом окне, в текущем окне)
+        """
+        conn = self._connection()
+        try:
+            conn.execute(
+                'INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, 1) '
+                'ON CONFLICT(key, window_start) DO UPDATE SET count = count + 1',
+                (key, window_start)
+            )
+            counts = dict(conn.execute(
+                'SELECT window_start, count FROM rate_limits WHERE key = ? AND window_start IN (?, ?)',
+                (key, window_start - window, window_start)
+            ).fetchall())
+            previous, current = counts.get(window_start - window, 0), counts[window_start]
+
+            allowed = allow(previous, current)
+            if allowed:
+                conn.commit()
+            else:
+                # Отклоненные запросы не расходуют лимит
+                conn.rollback()
+                current -= 1
+        except Exception:
+            conn.rollback()
+            raise
+
+        now = time.time()
+        if now - self._last_cleanup > self.CLEANUP_INTERVAL:
+            self._last_cleanup = now
+            with conn:
+                conn.execute('DELETE FROM rate_limits WHERE window_start < ?', (window_start - window,))
+
+        return allowed, previous, current
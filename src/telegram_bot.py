@@ -1,43 +1,130 @@
 import os
+import time
+import threading
 import requests
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
-from dotenv import load_dotenv
 
-# Загружаем переменные окружения
-load_dotenv()
+from src import json_provider, metrics, tracing
+from src.cache import CachedValue
+from src.rate_limit import TokenBucket
+from src.sharding import ConsistentHashRing
+from src.storage import SentMessageStore
+from src.transport import build_session
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class TelegramBotError(Exception):
     """Базовый класс для ошибок Telegram Bot API"""
-    pass
+    
+    def __init__(self, message: str, error_code: Optional[int] = None, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.error_code = error_code
+        self.retry_after = retry_after
 
 
 class TelegramBot:
     """Класс для работы с Telegram Bot API"""
     
-    def __init__(self, bot_token: Optional[str] = None):
+    # Методы, на которые распространяется лимит Telegram на отправку сообщений
+    RATE_LIMITED_METHODS = {'sendMessage', 'editMessageText'}
+    
+    # Сколько раз повторять запрос после ответа 429
+    MAX_RETRIES = 3
+    
+    def __init__(
+        self,
+        bot_token: Optional[str] = None,
+        rate_limit: Optional[float] = None,
+        message_store: Optional[SentMessageStore] = None,
+        bot_tokens: Optional[List[str]] = None,
+        session: Optional[requests.Session] = None
+    ):
         """Инициализация бота
         
         Args:
-            bot_token: Токен бота. Если не указан, берется из переменной окружения
+            bot_token: Токен основного бота. Если не указан, берется из переменной окружения
+            rate_limit: Максимум сообщений в секунду на каждого бота
+                        (по умолчанию TELEGRAM_RATE_LIMIT или 25)
+            message_store: Хранилище отправленных приглашений
+            bot_tokens: Дополнительные токены для рассылок (по умолчанию TELEGRAM_BOT_TOKENS)
+            session: HTTP-сессия (по умолчанию — собственная, с keep-alive соединениями)
         """
         self.bot_token = bot_token or os.getenv('TELEGRAM_BOT_TOKEN')
-        self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.api_url = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+        self.base_url = f"{self.api_url}/bot{self.bot_token}"
+        self._message_store = message_store
+        
+        if session is None:
+            session = build_session(pool_maxsize=int(os.getenv('TELEGRAM_POOL_MAXSIZE', 50)))
+        self.session = session
+        
+        # getMe меняется крайне редко, а /api/bot-status дергают healthcheck и дашборды
+        self.info_cache = CachedValue(
+            self.get_me,
+            ttl=float(os.getenv('BOT_STATUS_TTL', 300)),
+            max_stale=float(os.getenv('BOT_STATUS_MAX_STALE', 3600)),
+            name='bot_info'
+        )
+        
+        if bot_tokens is None:
+            bot_tokens = [t.strip() for t in os.getenv('TELEGRAM_BOT_TOKENS', '').split(',') if t.strip()]
+        
+        # Основной бот принимает обновления и отвечает на команды, рассылки
+        # распределяются между всеми ботами пула
+        self.bot_tokens = [t for t in dict.fromkeys([self.bot_token, *bot_tokens]) if t]
+        
+        rate = rate_limit or float(os.getenv('TELEGRAM_RATE_LIMIT', 25))
+        self.rate_limiters = {token: TokenBucket(rate) for token in self.bot_tokens}
+        self._ring = ConsistentHashRing(self.bot_tokens, node_key=self.bot_id) if self.bot_tokens else None
         
         if not self.bot_token:
             logger.warning("TELEGRAM_BOT_TOKEN не найден в переменных окружения")
+        elif len(self.bot_tokens) > 1:
+            logger.info("Telegram bot pool: %s bots", len(self.bot_tokens))
+    
+    @staticmethod
+    def bot_id(bot_token: str) -> str:
+        """ID бота — часть токена до двоеточия (не является секретом)"""
+        return bot_token.split(':', 1)[0]
     
-    def _make_request(self, method: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
+    def token_for_chat(self, chat_id: Any) -> Optional[str]:
+        """Токен бота, который отвечает за получателя (консистентное хеширование)"""
+        if not self._ring:
+            return self.bot_token
+        return self._ring.get(chat_id)
+    
+    def token_by_bot_id(self, bot_id: Optional[str]) -> Optional[str]:
+        """Токен бота пула по его ID"""
+        for token in self.bot_tokens:
+            if self.bot_id(token) == bot_id:
+                return token
+        return None
+    
+    @property
+    def message_store(self) -> SentMessageStore:
+        """Хранилище отправленных приглашений (создается при первом обращении)"""
+        if self._message_store is None:
+            self._message_store = SentMessageStore()
+        return self._message_store
+    
+    def _make_request(
+        self,
+        method: str,
+        data: Dict[str, Any] = None,
+        timeout: float = 30,
+        bot_token: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Базовый метод для выполнения запросов к Telegram API
         
         Args:
             method: Метод API
             data: Данные для отправки
+            timeout: Таймаут HTTP-запроса в секундах
+            bot_token: Токен бота пула (по умолчанию — основной бот)
         
         Returns:
             Ответ API
@@ -45,31 +132,63 @@ class TelegramBot:
         Raises:
             TelegramBotError: При ошибках API
         """
-        if not self.bot_token:
+        bot_token = bot_token or self.bot_token
+        if not bot_token:
             raise TelegramBotError("Bot token not configured")
         
-        url = f"{self.base_url}/{method}"
+        url = f"{self.api_url}/bot{bot_token}/{method}"
+        rate_limiter = self.rate_limiters[bot_token]
         
-        try:
-            response = requests.post(url, json=data, timeout=30)
-            result = response.json()
+        with tracing.start_span(f"telegram {method}", **{'telegram.method': method}) as span:
+            for attempt in range(self.MAX_RETRIES + 1):
+                if span is not None:
+                    span.set_attribute('retries', attempt)
+                if method in self.RATE_LIMITED_METHODS:
+                    rate_limiter.acquire()
+            
+                started = time.perf_counter()
+                try:
+                    response = self.session.post(url, json=data, timeout=timeout)
+                    result = json_provider.loads_response(response)
+                except requests.exceptions.RequestException as e:
+                    metrics.TELEGRAM_REQUESTS.labels(method, 'error').inc()
+                    logger.error("Network error: %s", e)
+                    raise TelegramBotError(f"Network error: {e}")
+                finally:
+                    metrics.TELEGRAM_LATENCY.labels(method).observe(time.perf_counter() - started)
+            
+                if span is not None:
+                    span.set_attribute('http.status_code', response.status_code)
+                
+                if result.get('ok'):
+                    metrics.TELEGRAM_REQUESTS.labels(method, 'ok').inc()
+                    return result.get('result', {})
             
-            if not result.get('ok'):
                 error_msg = result.get('description', 'Unknown error')
-                raise TelegramBotError(f"Telegram API error: {error_msg}")
+                error_code = result.get('error_code')
+                metrics.TELEGRAM_REQUESTS.labels(method, str(error_code or 'error')).inc()
+                retry_after = (result.get('parameters') or {}).get('retry_after')
             
-            return result.get('result', {})
+                if error_code == 429 and retry_after and attempt < self.MAX_RETRIES:
+                    # Telegram просит подождать: притормаживаем все отправки этого бота
+                    logger.warning("Telegram rate limit hit on %s, retrying in %ss", method, retry_after)
+                    tracing.add_event('retry', attempt=attempt + 1, retry_after=retry_after)
+                    if method in self.RATE_LIMITED_METHODS:
+                        rate_limiter.pause(retry_after)
+                    else:
+                        time.sleep(retry_after)
+                    continue
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Network error: {e}")
-            raise TelegramBotError(f"Network error: {e}")
+                raise TelegramBotError(f"Telegram API error: {error_msg}", error_code, retry_after)
     
     def send_message(
         self, 
         chat_id: str, 
         text: str, 
         parse_mode: str = 'HTML',
-        disable_web_page_preview: bool = True
+        disable_web_page_preview: bool = True,
+        reply_markup: Optional[Dict[str, Any]] = None,
+        bot_token: Optional[str] = None
     ) -> Dict[str, Any]:
         """Отправка сообщения
         
@@ -78,6 +197,8 @@ class TelegramBot:
             text: Текст сообщения
             parse_mode: Режим парсинга (HTML, Markdown)
             disable_web_page_preview: Отключить превью ссылок
+            reply_markup: Клавиатура (inline или reply)
+            bot_token: Токен бота пула (по умолчанию — основной бот)
         
         Returns:
             Информация об отправленном сообщении
@@ -89,14 +210,18 @@ class TelegramBot:
             'disable_web_page_preview': disable_web_page_preview
         }
         
-        logger.info(f"Sending message to {chat_id}")
-        return self._make_request('sendMessage', data)
+        if reply_markup:
+            data['reply_markup'] = reply_markup
+        
+        logger.info("Sending message to %s", chat_id)
+        return self._make_request('sendMessage', data, bot_token=bot_token)
     
     def send_meeting_invitation(
         self,
         chat_id: str,
         meeting_data: Dict[str, Any],
-        custom_message: str = None
+        custom_message: str = None,
+        bot_token: Optional[str] = None
     ) -> Dict[str, Any]:
         """Отправка приглашения на встречу
         
@@ -104,36 +229,184 @@ class TelegramBot:
             chat_id: ID чата или username
             meeting_data: Данные встречи
             custom_message: Пользовательское сообщение
+            bot_token: Токен бота пула (по умолчанию — основной бот)
         
         Returns:
             Информация об отправленном сообщении
         """
-        meeting_id = meeting_data.get('id', 'N/A')
+        message = custom_message or self.format_invitation(meeting_data)
+        return self.send_message(chat_id, message, bot_token=bot_token)
+    
+    @staticmethod
+    def format_invitation(meeting_data: Dict[str, Any]) -> str:
+        """Текст стандартного приглашения на встречу
+        
+        Args:
+            meeting_data: Данные встречи
+        
+        Returns:
+            Текст сообщения в HTML-разметке
+        """
         join_url = meeting_data.get('join_url', '')
         title = meeting_data.get('title', 'Встреча в Telemost')
         description = meeting_data.get('description', '')
+        live_stream = meeting_data.get('live_stream') or {}
         
-        # Формируем сообщение
-        if custom_message:
-            message = custom_message
-        else:
-            message = f"🎥 <b>Приглашение на встречу</b>\n\n"
-            
-            if title:
-                message += f"📋 <b>Название:</b> {title}\n"
-            
-            if description:
-                message += f"📝 <b>Описание:</b> {description}\n"
-            
-            message += f"\n🔗 <b>Ссылка для подключения:</b>\n{join_url}\n"
-            message += f"\n💡 Нажмите на ссылку, чтобы присоединиться к встрече"
+        message = f"🎥 <b>Приглашение на встречу</b>\n\n"
+        
+        if title:
+            message += f"📋 <b>Название:</b> {title}\n"
+        
+        if description:
+            message += f"📝 <b>Описание:</b> {description}\n"
+        
+        if live_stream.get('title'):
+            message += f"📺 <b>Трансляция:</b> {live_stream['title']}\n"
+        
+        message += f"\n🔗 <b>Ссылка для подключения:</b>\n{join_url}\n"
+        
+        if live_stream.get('watch_url'):
+            message += f"\n👀 <b>Ссылка на просмотр:</b>\n{live_stream['watch_url']}\n"
+        
+        message += f"\n💡 Нажмите на ссылку, чтобы присоединиться к встрече"
+        return message
+    
+    def edit_message_text(
+        self,
+        chat_id: Any,
+        message_id: int,
+        text: str,
+        parse_mode: str = 'HTML',
+        disable_web_page_preview: bool = True,
+        bot_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Редактирование текста отправленного сообщения
+        
+        Args:
+            chat_id: ID чата
+            message_id: ID сообщения
+            text: Новый текст
+            parse_mode: Режим парсинга (HTML, Markdown)
+            disable_web_page_preview: Отключить превью ссылок
+            bot_token: Токен бота, отправившего сообщение
+        """
+        data = {
+            'chat_id': chat_id,
+            'message_id': message_id,
+            'text': text,
+            'parse_mode': parse_mode,
+            'disable_web_page_preview': disable_web_page_preview
+        }
         
-        return self.send_message(chat_id, message)
+        return self._make_request('editMessageText', data, bot_token=bot_token)
     
     def get_me(self) -> Dict[str, Any]:
         """Получение информации о боте"""
         return self._make_request('getMe')
     
+    def get_updates(
+        self,
+        offset: Optional[int] = None,
+        timeout: int = 30,
+        limit: int = 100,
+        allowed_updates: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Получение входящих обновлений через long polling
+        
+        Args:
+            offset: ID первого обновления, которое нужно вернуть
+            timeout: Время ожидания обновлений на стороне Telegram (сек)
+            limit: Максимальное число обновлений в пачке (1-100)
+            allowed_updates: Типы обновлений, которые нужно получать
+        
+        Returns:
+            Список обновлений
+        """
+        data = {'timeout': timeout, 'limit': limit}
+        
+        if offset is not None:
+            data['offset'] = offset
+        
+        if allowed_updates is not None:
+            data['allowed_updates'] = allowed_updates
+        
+        # HTTP-таймаут должен быть больше времени long polling
+        return self._make_request('getUpdates', data, timeout=timeout + 10)
+    
+    def set_webhook(
+        self,
+        url: str,
+        secret_token: Optional[str] = None,
+        allowed_updates: Optional[List[str]] = None,
+        max_connections: int = 40
+    ) -> Dict[str, Any]:
+        """Установка webhook для получения обновлений
+        
+        Args:
+            url: HTTPS-адрес, на который Telegram будет отправлять обновления
+            secret_token: Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+            allowed_updates: Типы обновлений, которые нужно получать
+            max_connections: Максимум одновременных соединений от Telegram
+        """
+        data = {'url': url, 'max_connections': max_connections}
+        
+        if secret_token:
+            data['secret_token'] = secret_token
+        
+        if allowed_updates is not None:
+            data['allowed_updates'] = allowed_updates
+        
+        return self._make_request('setWebhook', data)
+    
+    def delete_webhook(self, drop_pending_updates: bool = False) -> Dict[str, Any]:
+        """Удаление webhook (обязательно перед использованием getUpdates)"""
+        return self._make_request('deleteWebhook', {'drop_pending_updates': drop_pending_updates})
+    
+    def answer_callback_query(
+        self,
+        callback_query_id: str,
+        text: Optional[str] = None,
+        show_alert: bool = False
+    ) -> Dict[str, Any]:
+        """Ответ на нажатие inline-кнопки
+        
+        Args:
+            callback_query_id: ID callback-запроса
+            text: Текст уведомления
+            show_alert: Показать уведомление в виде алерта
+        """
+        data = {'callback_query_id': callback_query_id, 'show_alert': show_alert}
+        
+        if text:
+            data['text'] = text
+        
+        return self._make_request('answerCallbackQuery', data)
+    
+    def answer_inline_query(
+        self,
+        inline_query_id: str,
+        results: List[Dict[str, Any]],
+        cache_time: int = 10,
+        is_personal: bool = True
+    ) -> Dict[str, Any]:
+        """Ответ на inline-запрос
+        
+        Args:
+            inline_query_id: ID inline-запроса
+            results: Список InlineQueryResult (не более 50)
+            cache_time: Сколько секунд Telegram может кэшировать ответ
+            is_personal: Кэшировать ответ отдельно для каждого пользователя
+        """
+        data = {
+            'inline_query_id': inline_query_id,
+            'results': results,
+            'cache_time': cache_time,
+            'is_personal': is_personal
+        }
+        
+        # Telegram ждет ответ недолго — не держим запрос 30 секунд
+        return self._make_request('answerInlineQuery', data, timeout=10)
+    
     def send_bulk_invitations(
         self,
         contacts: List[Dict[str, Any]],
@@ -159,46 +432,199 @@ class TelegramBot:
                 'simulated': True
             }
         
+        # Распределяем получателей по ботам пула: каждый бот шлет свою часть
+        # параллельно и упирается только в собственный лимит
+        shards: Dict[str, List[Dict[str, Any]]] = {}
+        failed_count = 0
+        
+        for contact in contacts:
+            # Пытаемся отправить по username, если есть
+            chat_id = contact.get('username', '').replace('@', '')
+            if not chat_id:
+                # Если нет username, используем ID (если есть)
+                chat_id = contact.get('id')
+            
+            if not chat_id:
+                logger.warning("No chat_id for contact: %s", contact)
+                failed_count += 1
+                continue
+            
+            shards.setdefault(self.token_for_chat(chat_id), []).append({**contact, '_chat_id': chat_id})
+        
+        if len(shards) > 1:
+            with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix='tg-shard') as executor:
+                # Каждому потоку — своя копия контекста запроса, чтобы отправки попали в его трассу
+                contexts = [contextvars.copy_context() for _ in shards]
+                shard_results = list(executor.map(
+                    lambda context, item: context.run(
+                        self._send_shard, item[0], item[1], meeting_data, custom_message
+                    ),
+                    contexts, shards.items()
+                ))
+        else:
+            shard_results = [
+                self._send_shard(token, shard_contacts, meeting_data, custom_message)
+                for token, shard_contacts in shards.items()
+            ]
+        
+        sent_count = sum(r['sent_count'] for r in shard_results)
+        failed_count += sum(r['failed_count'] for r in shard_results)
+        errors = [e for r in shard_results for e in r['errors']]
+        
+        result = {
+            'success': sent_count > 0,
+            'sent_count': sent_count,
+            'failed_count': failed_count,
+            'errors': errors[:5],  # Показываем только первые 5 ошибок
+            'delivered_chat_ids': [c for r in shard_results for c in r['delivered_chat_ids']]
+        }
+        
+        if len(self.bot_tokens) > 1:
+            result['per_bot'] = {
+                r['bot_id']: {'sent_count': r['sent_count'], 'failed_count': r['failed_count']}
+                for r in shard_results
+            }
+        
+        return result
+    
+    def _send_shard(
+        self,
+        bot_token: str,
+        contacts: List[Dict[str, Any]],
+        meeting_data: Dict[str, Any],
+        custom_message: Optional[str]
+    ) -> Dict[str, Any]:
+        """Отправка приглашений получателям одного бота пула"""
         sent_count = 0
         failed_count = 0
         errors = []
+        delivered_chat_ids = []
         
         for contact in contacts:
+            chat_id = contact['_chat_id']
             try:
-                # Пытаемся отправить по username, если есть
-                chat_id = contact.get('username', '').replace('@', '')
-                if not chat_id:
-                    # Если нет username, используем ID (если есть)
-                    chat_id = contact.get('id')
-                
-                if not chat_id:
-                    logger.warning(f"No chat_id for contact: {contact}")
-                    failed_count += 1
-                    continue
-                
-                self.send_meeting_invitation(chat_id, meeting_data, custom_message)
+                message = self.send_meeting_invitation(chat_id, meeting_data, custom_message, bot_token=bot_token)
                 sent_count += 1
-                logger.info(f"Invitation sent to {contact.get('name', chat_id)}")
+                delivered_chat_ids.append(message.get('chat', {}).get('id', chat_id))
+                self._remember_invitation(message, meeting_data, custom_message, bot_token)
+                logger.info("Invitation sent to %s", contact.get('name', chat_id))
                 
             except TelegramBotError as e:
-                logger.error(f"Failed to send to {contact.get('name', 'unknown')}: {e}")
+                logger.error("Failed to send to %s: %s", contact.get('name', 'unknown'), e)
                 failed_count += 1
                 errors.append(str(e))
             except Exception as e:
-                logger.error(f"Unexpected error sending to {contact.get('name', 'unknown')}: {e}")
+                logger.error("Unexpected error sending to %s: %s", contact.get('name', 'unknown'), e)
                 failed_count += 1
                 errors.append(str(e))
         
         return {
-            'success': sent_count > 0,
+            'bot_id': self.bot_id(bot_token),
             'sent_count': sent_count,
             'failed_count': failed_count,
-            'errors': errors[:5]  # Показываем только первые 5 ошибок
+            'errors': errors,
+            'delivered_chat_ids': delivered_chat_ids
+        }
+    
+    def _remember_invitation(
+        self,
+        message: Dict[str, Any],
+        meeting_data: Dict[str, Any],
+        custom_message: Optional[str],
+        bot_token: Optional[str] = None
+    ):
+        """Сохранить ID отправленного приглашения для последующего редактирования"""
+        meeting_id = meeting_data.get('id')
+        if not meeting_id or not message.get('message_id'):
+            return
+        
+        try:
+            self.message_store.add(
+                meeting_id,
+                message['chat']['id'],
+                message['message_id'],
+                meeting_data,
+                custom_message,
+                bot_id=self.bot_id(bot_token or self.bot_token)
+            )
+        except Exception as e:
+            logger.error("Failed to store sent invitation for meeting %s: %s", meeting_id, e)
+    
+    def edit_bulk_invitations(self, meeting_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Обновление уже отправленных приглашений после изменения встречи
+        
+        Args:
+            meeting_data: Актуальные данные встречи (должны содержать id)
+        
+        Returns:
+            Статистика редактирования
+        """
+        meeting_id = meeting_data.get('id')
+        if not meeting_id:
+            raise TelegramBotError("Meeting id is required to edit invitations")
+        
+        edited_count = 0
+        unchanged_count = 0
+        failed_count = 0
+        errors = []
+        
+        for invitation in self.message_store.for_meeting(meeting_id):
+            if invitation['custom_message']:
+                # Пользовательский текст не зависит от настроек встречи
+                unchanged_count += 1
+                continue
+            
+            # Название и описание задаются в приложении, остальное приходит из Telemost
+            updated_data = {**invitation['meeting_data'], **meeting_data}
+            text = self.format_invitation(updated_data)
+            
+            if text == self.format_invitation(invitation['meeting_data']):
+                unchanged_count += 1
+                continue
+            
+            # Редактировать сообщение может только бот, который его отправил
+            bot_token = self.token_by_bot_id(invitation['bot_id']) if invitation['bot_id'] else self.bot_token
+            if not bot_token:
+                failed_count += 1
+                errors.append(f"Bot {invitation['bot_id']} is no longer in the pool")
+                continue
+            
+            try:
+                self.edit_message_text(invitation['chat_id'], invitation['message_id'], text, bot_token=bot_token)
+                self.message_store.update_meeting_data(meeting_id, invitation['chat_id'], updated_data)
+                edited_count += 1
+            except TelegramBotError as e:
+                if 'message is not modified' in str(e):
+                    unchanged_count += 1
+                    continue
+                logger.error("Failed to edit invitation in chat %s: %s", invitation['chat_id'], e)
+                failed_count += 1
+                errors.append(str(e))
+        
+        logger.info("Invitations for meeting %s: %s edited, %s unchanged, %s failed",
+                    meeting_id, edited_count, unchanged_count, failed_count)
+        
+        return {
+            'success': failed_count == 0,
+            'edited_count': edited_count,
+            'unchanged_count': unchanged_count,
+            'failed_count': failed_count,
+            'errors': errors[:5]
         }
 
 
-# Глобальный экземпляр бота
-telegram_bot = TelegramBot()
+_telegram_bot: Optional[TelegramBot] = None
+_telegram_bot_lock = threading.Lock()
+
+
+def get_telegram_bot() -> TelegramBot:
+    """Общий экземпляр бота (создается при первом использовании)"""
+    global _telegram_bot
+    if _telegram_bot is None:
+        with _telegram_bot_lock:
+            if _telegram_bot is None:
+                _telegram_bot = TelegramBot()
+    return _telegram_bot
 
 
 def send_meeting_to_contacts(
@@ -216,23 +642,46 @@ def send_meeting_to_contacts(
     Returns:
         Результат отправки
     """
-    return telegram_bot.send_bulk_invitations(contacts, meeting_data, custom_message)
+    return get_telegram_bot().send_bulk_invitations(contacts, meeting_data, custom_message)
+
+
+def update_meeting_invitations(meeting_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Удобная функция для обновления отправленных приглашений по встрече
+    
+    Args:
+        meeting_data: Актуальные данные встречи
+    
+    Returns:
+        Результат редактирования
+    """
+    return get_telegram_bot().edit_bulk_invitations(meeting_data)
 
 
 def check_bot_status() -> Dict[str, Any]:
-    """Проверка статуса бота"""
+    """Проверка статуса бота (getMe кэшируется, см. BOT_STATUS_TTL)"""
     try:
+        telegram_bot = get_telegram_bot()
         if not telegram_bot.bot_token:
             return {
                 'status': 'not_configured',
                 'message': 'Bot token not configured'
             }
         
-        bot_info = telegram_bot.get_me()
-        return {
+        bot_info_cache = telegram_bot.info_cache
+        bot_info = bot_info_cache.get()
+        status = {
             'status': 'active',
-            'bot_info': bot_info
+            'bot_info': bot_info,
+            'cache_age': round(bot_info_cache.age or 0, 1)
         }
+        
+        if bot_info_cache.is_stale():
+            # Telegram сейчас недоступен — отдаем последнее удачное значение
+            status['stale'] = True
+            if bot_info_cache.last_error:
+                status['last_error'] = str(bot_info_cache.last_error)
+        
+        return status
     except TelegramBotError as e:
         return {
             'status': 'error',
@@ -6,18 +6,19 @@ CRUD встреч, управление соорганизаторами, нас
 
 import os
 import json
+import time
+import threading
 import requests
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any, Union
-from dotenv import load_dotenv
 import logging
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from src import json_provider, metrics, tracing
+from src.circuit_breaker import CircuitBreaker
+from src.rate_limit import TokenBucket
+from src.transport import build_session
 
-# Загружаем переменные окружения
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 
 class TelemostAPIError(Exception):
@@ -35,21 +36,45 @@ class TelemostValidationError(TelemostAPIError):
     pass
 
 
+class TelemostUnavailableError(TelemostAPIError):
+    """API временно недоступно (цепь circuit breaker разомкнута)"""
+    pass
+
+
 class TelemostAPI:
     """Полнофункциональный класс для работы с API Яндекс Телемост"""
     
-    def __init__(self, oauth_token: Optional[str] = None):
+    def __init__(
+        self,
+        oauth_token: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        rate_limit: Optional[float] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
         """Инициализация API клиента
         
         Args:
             oauth_token: OAuth токен. Если не указан, берется из переменной окружения
+            session: HTTP-сессия (пул соединений); может быть общей для нескольких клиентов
+            rate_limit: Максимум запросов в секунду для токена (по умолчанию TELEMOST_RATE_LIMIT)
+            circuit_breaker: Circuit breaker токена
         """
         self.oauth_token = oauth_token or os.getenv('YANDEX_OAUTH_TOKEN')
-        self.base_url = "https://cloud-api.yandex.net/v1/telemost-api"
+        self.base_url = os.getenv('TELEMOST_API_URL', "https://cloud-api.yandex.net/v1/telemost-api")
         
         if not self.oauth_token:
             raise TelemostAuthError("Не найден YANDEX_OAUTH_TOKEN в переменных окружения")
         
+        self.session = session or build_session()
+        
+        rate_limit = rate_limit or float(os.getenv('TELEMOST_RATE_LIMIT', 0))
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        
+        # Количество запросов в работе — используется пулом для выбора наименее загруженного токена
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        
         logger.info("TelemostAPI инициализирован")
     
     def _get_headers(self) -> Dict[str, str]:
@@ -64,8 +89,9 @@ class TelemostAPI:
         method: str, 
         endpoint: str, 
         data: Optional[Dict[str, Any]] = None,
-        params: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        params: Optional[Dict[str, Any]] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], requests.Response]:
         """Базовый метод для выполнения HTTP-запросов
         
         Args:
@@ -73,48 +99,94 @@ class TelemostAPI:
             endpoint: Конечная точка API
             data: Данные для отправки в теле запроса
             params: Параметры запроса
+            raw: Вернуть успешный ответ requests без разбора JSON; тело
+                читается потоком, ответ нужно закрыть
         
         Returns:
-            Ответ API в виде словаря
+            Ответ API в виде словаря (при raw — requests.Response)
         
         Raises:
             TelemostAPIError: При ошибках API
             TelemostAuthError: При ошибках авторизации
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        
-        try:
-            logger.debug(f"{method} {url}")
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self._get_headers(),
-                json=data,
-                params=params,
-                timeout=30
-            )
+        endpoint_name = metrics.telemost_endpoint(endpoint)
+        
+        with tracing.start_span(f"telemost {method} {endpoint_name}", **{'http.method': method, 'telemost.endpoint': endpoint_name}) as span:
+            if not self.circuit_breaker.allow():
+                tracing.add_event('circuit_open')
+                raise TelemostUnavailableError(
+                    f"Telemost API временно недоступен, повторите через {self.circuit_breaker.retry_after():.0f} с"
+                )
+        
+            if self.rate_limiter:
+                waited = time.perf_counter()
+                self.rate_limiter.acquire()
+                if span is not None:
+                    span.set_attribute('rate_limit.wait_ms', round((time.perf_counter() - waited) * 1000, 1))
+        
+            with self._in_flight_lock:
+                self.in_flight += 1
+            metrics.TELEMOST_IN_FLIGHT.inc()
+        
+            try:
+                logger.debug("%s %s", method, url)
+                started = time.perf_counter()
+                try:
+                    response = self.session.request(
+                        method=method,
+                        url=url,
+                        headers=self._get_headers(),
+                        json=data,
+                        params=params,
+                        timeout=30,
+                        stream=raw
+                    )
+                except requests.exceptions.RequestException:
+                    self.circuit_breaker.record_failure()
+                    metrics.TELEMOST_REQUESTS.labels(method, endpoint_name, 'error').inc()
+                    raise
+                finally:
+                    with self._in_flight_lock:
+                        self.in_flight -= 1
+                    metrics.TELEMOST_IN_FLIGHT.dec()
+                    metrics.TELEMOST_LATENCY.labels(method, endpoint_name).observe(time.perf_counter() - started)
+            
+                metrics.TELEMOST_REQUESTS.labels(method, endpoint_name, metrics.status_class(response.status_code)).inc()
+                if span is not None:
+                    span.set_attribute('http.status_code', response.status_code)
+            
+                # Ошибки сервера и превышение квоты размыкают цепь, ошибки клиента — нет
+                if response.status_code >= 500 or response.status_code == 429:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+            
+                # Проверяем статус ответа
+                if response.status_code == 401:
+                    response.close()
+                    raise TelemostAuthError("Неавторизованный запрос. Проверьте токен.")
+                elif response.status_code == 403:
+                    error_data = json_provider.loads_response(response) if response.content else {}
+                    error_msg = error_data.get('message', 'Доступ запрещен')
+                    raise TelemostAPIError(f"Ошибка 403: {error_msg}")
+                elif response.status_code >= 400:
+                    error_data = json_provider.loads_response(response) if response.content else {}
+                    error_msg = error_data.get('message', f'Ошибка {response.status_code}')
+                    raise TelemostAPIError(f"Ошибка API {response.status_code}: {error_msg}")
             
-            # Проверяем статус ответа
-            if response.status_code == 401:
-                raise TelemostAuthError("Неавторизованный запрос. Проверьте токен.")
-            elif response.status_code == 403:
-                error_data = response.json() if response.content else {}
-                error_msg = error_data.get('message', 'Доступ запрещен')
-                raise TelemostAPIError(f"Ошибка 403: {error_msg}")
-            elif response.status_code >= 400:
-                error_data = response.json() if response.content else {}
-                error_msg = error_data.get('message', f'Ошибка {response.status_code}')
-                raise TelemostAPIError(f"Ошибка API {response.status_code}: {error_msg}")
+                if raw:
+                    return response
             
-            # Возвращаем JSON для успешных ответов
-            if response.content:
-                return response.json()
-            else:
-                return {'status': 'success', 'status_code': response.status_code}
+                # Возвращаем JSON для успешных ответов
+                if response.content:
+                    return json_provider.loads_response(response)
+                else:
+                    return {'status': 'success', 'status_code': response.status_code}
                 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка сети: {e}")
-            raise TelemostAPIError(f"Ошибка сети: {e}")
+            except requests.exceptions.RequestException as e:
+                logger.error("Ошибка сети: %s", e)
+                raise TelemostAPIError(f"Ошибка сети: {e}")
     
     def _validate_email(self, email: str) -> bool:
         """Простая валидация email"""
@@ -190,11 +262,11 @@ class TelemostAPI:
         if cohosts:
             data["cohosts"] = cohosts
         
-        logger.info(f"Создание встречи с параметрами: {waiting_room_level}")
+        logger.info("Создание встречи с параметрами: %s", waiting_room_level)
         result = self._make_request('POST', 'conferences', data)
         
         if result.get('id'):
-            logger.info(f"Встреча создана: {result['id']}")
+            logger.info("Встреча создана: %s", result['id'])
         
         return result
     
@@ -211,7 +283,7 @@ class TelemostAPI:
         if not meeting_id:
             raise TelemostValidationError("ID встречи обязателен")
         
-        logger.info(f"Получение данных встречи: {meeting_id}")
+        logger.info("Получение данных встречи: %s", meeting_id)
         return self._make_request('GET', f'conferences/{meeting_id}')
     
     def update_meeting(
@@ -247,7 +319,7 @@ class TelemostAPI:
         if not data:
             raise TelemostValidationError("Нет данных для обновления")
         
-        logger.info(f"Обновление встречи: {meeting_id}")
+        logger.info("Обновление встречи: %s", meeting_id)
         return self._make_request('PATCH', f'conferences/{meeting_id}', data)
     
     def delete_meeting(self, meeting_id: str) -> Dict[str, Any]:
@@ -263,7 +335,7 @@ class TelemostAPI:
         if not meeting_id:
             raise TelemostValidationError("ID встречи обязателен")
         
-        logger.info(f"Удаление встречи: {meeting_id}")
+        logger.info("Удаление встречи: %s", meeting_id)
         return self._make_request('DELETE', f'conferences/{meeting_id}')
     
     def list_meetings(self, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
@@ -282,9 +354,28 @@ class TelemostAPI:
         
         params = {'limit': limit, 'offset': offset}
         
-        logger.info(f"Получение списка встреч (limit: {limit}, offset: {offset})")
+        logger.info("Получение списка встреч (limit: %s, offset: %s)", limit, offset)
         return self._make_request('GET', 'conferences', params=params)
     
+    def list_meetings_raw(self, limit: int = 50, offset: int = 0) -> requests.Response:
+        """
+        Получить список встреч без разбора JSON (для передачи ответа клиенту как есть)
+        
+        Args:
+            limit: Количество встреч на страницу (макс. 100)
+            offset: Смещение для пагинации
+        
+        Returns:
+            Успешный ответ requests, тело которого еще не прочитано; его нужно закрыть
+        """
+        if limit > 100:
+            raise TelemostValidationError("Максимальный limit: 100")
+        
+        params = {'limit': limit, 'offset': offset}
+        
+        logger.info("Получение списка встреч без разбора (limit: %s, offset: %s)", limit, offset)
+        return self._make_request('GET', 'conferences', params=params, raw=True)
+    
     # ===========================================
     # Управление соорганизаторами
     # ===========================================
@@ -302,7 +393,7 @@ class TelemostAPI:
         if not meeting_id:
             raise TelemostValidationError("ID встречи обязателен")
         
-        logger.info(f"Получение соорганизаторов встречи: {meeting_id}")
+        logger.info("Получение соорганизаторов встречи: %s", meeting_id)
         return self._make_request('GET', f'conferences/{meeting_id}/cohosts')
     
     def update_meeting_cohosts(
@@ -333,7 +424,7 @@ class TelemostAPI:
         
         data = {'cohosts': cohosts}
         
-        logger.info(f"Обновление соорганизаторов встречи: {meeting_id}")
+        logger.info("Обновление соорганизаторов встречи: %s", meeting_id)
         return self._make_request('PUT', f'conferences/{meeting_id}/cohosts', data)
     
     def add_meeting_cohost(
@@ -359,7 +450,7 @@ class TelemostAPI:
         
         data = {'email': email}
         
-        logger.info(f"Добавление соорганизатора {email} к встрече: {meeting_id}")
+        logger.info("Добавление соорганизатора %s к встрече: %s", email, meeting_id)
         return self._make_request('POST', f'conferences/{meeting_id}/cohosts', data)
     
     def remove_meeting_cohost(
@@ -383,7 +474,7 @@ class TelemostAPI:
         if not cohost_id:
             raise TelemostValidationError("ID соорганизатора обязателен")
         
-        logger.info(f"Удаление соорганизатора {cohost_id} из встречи: {meeting_id}")
+        logger.info("Удаление соорганизатора %s из встречи: %s", cohost_id, meeting_id)
         return self._make_request('DELETE', f'conferences/{meeting_id}/cohosts/{cohost_id}')
     
     # ===========================================
@@ -565,7 +656,7 @@ class TelemostAPI:
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(meeting_data, f, ensure_ascii=False, indent=2)
         
-        logger.info(f"Данные встречи сохранены: {filename}")
+        logger.info("Данные встречи сохранены: %s", filename)
         return filename
     
     def validate_meeting_data(self, meeting_data: Dict[str, Any]) -> bool:
@@ -597,6 +688,9 @@ class TelemostAPI:
 
 def main():
     """Основная функция для демонстрации возможностей API"""
+    from src.config import load_env
+    load_env()
+
     try:
         # Инициализируем API
         api = TelemostAPI()
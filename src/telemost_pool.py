@@ -0,0 +1,215 @@
+"""
+Пул клиентов Telemost API: несколько OAuth-токенов (организации и распределение квоты)
+"""
+
+import os
+import logging
+import itertools
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.cache import CachedValue
+from src.circuit_breaker import CircuitBreaker
+from src.telemost_api import TelemostAPI, TelemostAuthError, TelemostValidationError
+from src.transport import build_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = 'default'
+
+
+class TelemostClientPool:
+    """Набор клиентов TelemostAPI, сгруппированных по организациям (tenant)
+
+    - У каждой организации может быть несколько токенов: запрос уходит на
+      наименее загруженный (по числу запросов в работе) токен с замкнутой цепью.
+    - У каждого токена собственные rate limiter и circuit breaker: исчерпанная
+      квота или сбой одного токена не влияет на остальные.
+    - Все клиенты используют одну HTTP-сессию, то есть общий пул keep-alive
+      соединений с cloud-api.yandex.net.
+    """
+
+    def __init__(
+        self,
+        tokens: Dict[str, List[str]],
+        rate_limit: Optional[float] = None,
+        pool_maxsize: int = 50,
+        tenant_users: Optional[Dict[int, str]] = None
+    ):
+        """
+        Args:
+            tokens: Токены по организациям: {"tenant": ["token1", "token2"]}
+            rate_limit: Лимит запросов в секунду на каждый токен
+            pool_maxsize: Максимум соединений в общем пуле
+            tenant_users: Организации пользователей Telegram: {user_id: "tenant"};
+                остальные пользователи относятся к организации по умолчанию
+        """
+        if not any(tokens.values()):
+            raise TelemostAuthError("Не задан ни один OAuth токен Телемост")
+
+        self.session = build_session(pool_connections=1, pool_maxsize=pool_maxsize)
+
+        self._clients: Dict[str, List[TelemostAPI]] = {
+            tenant: [
+                TelemostAPI(
+                    token,
+                    session=self.session,
+                    rate_limit=rate_limit,
+                    circuit_breaker=CircuitBreaker()
+                )
+                for token in tenant_tokens
+            ]
+            for tenant, tenant_tokens in tokens.items()
+            if tenant_tokens
+        }
+        self._round_robin = itertools.count()
+
+        self.tenant_users: Dict[int, str] = {}
+        for user_id, tenant in (tenant_users or {}).items():
+            if tenant in self._clients:
+                self.tenant_users[user_id] = tenant
+            else:
+                logger.error("Tenant %s of user %s has no tokens, user is not assigned", tenant, user_id)
+
+        # Результат проверки Telemost кэшируется: healthcheck не должен нагружать API
+        self.health_cache = CachedValue(
+            self._probe,
+            ttl=float(os.getenv('HEALTH_CHECK_TTL', 60)),
+            max_stale=float(os.getenv('HEALTH_CHECK_MAX_STALE', 600)),
+            name='telemost_health'
+        )
+
+    @classmethod
+    def from_env(cls) -> 'TelemostClientPool':
+        """Создать пул из переменных окружения
+
+        YANDEX_OAUTH_TOKEN — токен организации по умолчанию.
+        YANDEX_OAUTH_TOKENS — дополнительные токены через запятую, в формате
+        "token" (организация по умолчанию) или "tenant=token".
+        """
+        tokens: Dict[str, List[str]] = {}
+
+        default_token = os.getenv('YANDEX_OAUTH_TOKEN')
+        if default_token:
+            tokens.setdefault(DEFAULT_TENANT, []).append(default_token)
+
+        for item in os.getenv('YANDEX_OAUTH_TOKENS', '').split(','):
+            item = item.strip()
+            if not item:
+                continue
+            tenant, _, token = item.rpartition('=')
+            tenant, token = tenant.strip() or DEFAULT_TENANT, token.strip()
+            if token not in tokens.get(tenant, []):
+                tokens.setdefault(tenant, []).append(token)
+
+        # TELEMOST_TENANT_USERS — пользователи Telegram организаций: "tenant=user_id" через запятую
+        tenant_users: Dict[int, str] = {}
+        for item in os.getenv('TELEMOST_TENANT_USERS', '').split(','):
+            tenant, _, user_id = item.strip().rpartition('=')
+            if not tenant or not user_id.strip():
+                continue
+            try:
+                tenant_users[int(user_id)] = tenant.strip()
+            except ValueError:
+                logger.error("Invalid user id in TELEMOST_TENANT_USERS: %s", user_id)
+
+        return cls(
+            tokens,
+            pool_maxsize=int(os.getenv('TELEMOST_POOL_MAXSIZE', 50)),
+            tenant_users=tenant_users
+        )
+
+    @property
+    def tenants(self) -> List[str]:
+        """Список организаций"""
+        return list(self._clients)
+
+    @property
+    def default_tenant(self) -> Optional[str]:
+        """Организация пользователей без назначения: "default" или единственная
+
+        None, если заданы только именованные организации и их несколько.
+        """
+        if DEFAULT_TENANT in self._clients:
+            return DEFAULT_TENANT
+        if len(self._clients) == 1:
+            return next(iter(self._clients))
+        return None
+
+    def tenant_for(self, user_id: Optional[int]) -> Optional[str]:
+        """Организация пользователя Telegram (без пользователя — организация по умолчанию)"""
+        if user_id is not None and user_id in self.tenant_users:
+            return self.tenant_users[user_id]
+        return self.default_tenant
+
+    def client(self, tenant: Optional[str] = None) -> TelemostAPI:
+        """Выбрать клиент для запроса
+
+        Args:
+            tenant: Организация (по умолчанию — default_tenant)
+
+        Raises:
+            TelemostValidationError: Если организация неизвестна или не определена
+        """
+        tenant = tenant or self.default_tenant
+        if tenant is None:
+            raise TelemostValidationError("Организация не определена: пользователь не назначен ни одной организации")
+        clients = self._clients.get(tenant)
+        if not clients:
+            raise TelemostValidationError(f"Неизвестная организация: {tenant}")
+
+        if len(clients) == 1:
+            return clients[0]
+
+        # Предпочитаем токены с замкнутой цепью; при равной загрузке — по кругу
+        available = [c for c in clients if c.circuit_breaker.state != CircuitBreaker.OPEN] or clients
+        offset = next(self._round_robin) % len(available)
+        rotated = available[offset:] + available[:offset]
+        return min(rotated, key=lambda c: c.in_flight)
+
+    def _probe(self) -> bool:
+        """Легкий запрос к Telemost API для проверки доступности"""
+        self.client(self.tenants[0]).get_default_settings()
+        return True
+
+    def summary(self) -> Dict[str, int]:
+        """Сводка для публичного healthcheck: без организаций и токенов"""
+        clients = [client for tenant_clients in self._clients.values() for client in tenant_clients]
+        return {
+            'tenants': len(self._clients),
+            'tokens': len(clients),
+            'open_circuits': sum(1 for c in clients if c.circuit_breaker.state == CircuitBreaker.OPEN)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние токенов по организациям (для служебных маршрутов, без самих токенов)"""
+        return {
+            tenant: [
+                {
+                    'token': f"…{client.oauth_token[-4:]}",
+                    'in_flight': client.in_flight,
+                    'circuit': client.circuit_breaker.state
+                }
+                for client in clients
+            ]
+            for tenant, clients in self._clients.items()
+        }
+
+
+_pool: Optional[TelemostClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_telemost_pool() -> TelemostClientPool:
+    """Общий пул клиентов процесса (создается из окружения при первом использовании)
+
+    Raises:
+        TelemostAuthError: Если не задан ни один токен
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = TelemostClientPool.from_env()
+                logger.info("Telemost API client pool initialized: tenants=%s", _pool.tenants)
+    return _pool
@@ -0,0 +1,330 @@
+"""
+Трассировка запросов: Flask → TelemostAPI / TelegramBot
+
+Каждый HTTP-запрос получает trace id (или продолжает трассу из заголовка
+traceparent). Вызовы внешних API внутри запроса записываются дочерними
+span'ами с длительностью, повторами и попаданиями в кэш. Текущий span
+хранится в contextvars, поэтому трасса не смешивается между потоками и
+greenlet'ами; для пулов потоков контекст передается через copy_context().
+
+Завершенные трассы пишутся в JSONL-файл (TRACE_EXPORT_PATH) в формате
+OTLP/JSON — его читает, например, otlpjsonfile receiver OpenTelemetry
+Collector. Медленные запросы (SLOW_REQUEST_MS) попадают в лог с разбивкой
+времени по span'ам.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import logging
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import Flask, g, request
+
+from src import memory
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'telemost-bot'
+
+# Значения SpanKind в OTLP
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+
+class Trace:
+    """Общие данные трассы: id, решение о сэмплировании и завершенные span'ы"""
+
+    def __init__(self, trace_id: Optional[str] = None, sampled: bool = True):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.sampled = sampled
+        self.spans: List['Span'] = []
+        self.exported = False
+
+
+class Span:
+    """Один участок работы внутри трассы"""
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: int = SPAN_KIND_CLIENT
+    ):
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        self.duration = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append({'name': name, 'time_ns': time.time_ns(), 'attributes': attributes})
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self._started
+        self.trace.spans.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+def current_span() -> Optional[Span]:
+    """Текущий span (None вне трассируемого запроса)"""
+    return _current_span.get()
+
+
+def add_event(name: str, **attributes: Any) -> None:
+    """Добавить событие в текущий span (ничего не делает вне трассы)"""
+    span = _current_span.get()
+    if span is not None:
+        span.add_event(name, **attributes)
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Дочерний span текущей трассы
+
+    Вне трассируемого запроса (фоновые потоки) ничего не записывает и
+    возвращает None.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    span = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+        if parent.trace.exported:
+            # Span завершился после корневого (фоновая задача) — отправляем отдельно
+            _exporter.export([span])
+
+
+def _parse_traceparent(header: str) -> Optional[Dict[str, Any]]:
+    """W3C traceparent: 00-<trace id>-<parent span id>-<flags>"""
+    parts = header.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    return {'trace_id': parts[1], 'parent_id': parts[2], 'sampled': bool(flags & 1)}
+
+
+# ===========================================
+# Экспорт
+# ===========================================
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    result = {
+        'traceId': span.trace.trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': span.kind,
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.start_ns + int(span.duration * 1e9)),
+        'attributes': _otlp_attributes(span.attributes),
+        'events': [
+            {'name': e['name'], 'timeUnixNano': str(e['time_ns']), 'attributes': _otlp_attributes(e['attributes'])}
+            for e in span.events
+        ],
+        'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+    }
+    if span.parent_id:
+        result['parentSpanId'] = span.parent_id
+    return result
+
+
+class FileSpanExporter:
+    """Запись span'ов в JSONL-файл в формате OTLP/JSON из фонового потока"""
+
+    def __init__(self, path: Optional[str] = None, max_queue: int = 10000):
+        """
+        Args:
+            path: Файл экспорта (по умолчанию TRACE_EXPORT_PATH; пусто — экспорт выключен)
+            max_queue: Максимум трасс, ожидающих записи
+        """
+        self.path = path if path is not None else os.getenv('TRACE_EXPORT_PATH', '')
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        memory.track('trace_export_queue', self, lambda exporter: {'items': exporter._queue.qsize()})
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def export(self, spans: List[Span]) -> None:
+        """Поставить span'ы в очередь на запись (при переполнении они отбрасываются)"""
+        if not self.enabled or not spans or not spans[0].trace.sampled:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            pass
+
+    def _ensure_started(self):
+        # После fork поток записи остается в родителе — запускаем свой
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, 'a') as f:
+                    for spans in batch:
+                        f.write(json.dumps({'resourceSpans': [{
+                            'resource': {'attributes': _otlp_attributes({
+                                'service.name': SERVICE_NAME,
+                                'process.pid': os.getpid()
+                            })},
+                            'scopeSpans': [{
+                                'scope': {'name': __name__},
+                                'spans': [_otlp_span(span) for span in spans]
+                            }]
+                        }]}, ensure_ascii=False) + '\n')
+            except OSError as e:
+                logger.error("Failed to export traces: %s", e)
+
+
+_exporter = FileSpanExporter()
+
+
+def _log_slow_request(root: Span) -> None:
+    threshold = float(os.getenv('SLOW_REQUEST_MS', 1000))
+    if root.duration_ms < threshold:
+        return
+    if random.random() >= float(os.getenv('SLOW_REQUEST_SAMPLE_RATE', 1)):
+        return
+
+    spans = [span for span in root.trace.spans if span is not root]
+    breakdown = [
+        {'name': span.name, 'duration_ms': round(span.duration_ms, 1), **({'error': span.error} if span.error else {})}
+        for span in spans
+    ]
+    # Вложенные вызовы уже входят во время внешних: суммируются только прямые потомки запроса
+    upstream_ms = sum(span.duration_ms for span in spans if span.parent_id == root.span_id)
+    logger.warning(
+        "Slow request %s: %.0f ms (upstream %.0f ms) trace=%s",
+        root.name, root.duration_ms, upstream_ms, root.trace.trace_id,
+        extra={'trace_id': root.trace.trace_id, 'duration_ms': round(root.duration_ms, 1), 'spans': breakdown}
+    )
+
+
+# ===========================================
+# Интеграция с Flask
+# ===========================================
+
+def init_app(app: Flask) -> None:
+    """Трассировка всех запросов приложения
+
+    Корневой span создается на каждый запрос; в файл попадает доля трасс
+    TRACE_SAMPLE_RATE (или решение вызывающей стороны из traceparent).
+    Trace id возвращается в заголовке X-Trace-Id.
+    """
+    sample_rate = float(os.getenv('TRACE_SAMPLE_RATE', 1))
+
+    @app.before_request
+    def start_trace():
+        incoming = _parse_traceparent(request.headers.get('traceparent', ''))
+        if incoming:
+            trace = Trace(incoming['trace_id'], sampled=incoming['sampled'])
+            parent_id = incoming['parent_id']
+        else:
+            trace = Trace(sampled=random.random() < sample_rate)
+            parent_id = None
+
+        span = Span(
+            trace, request.method, parent_id,
+            {'http.method': request.method, 'http.target': request.path},
+            kind=SPAN_KIND_SERVER
+        )
+        g.trace_span = span
+        g.trace_token = _current_span.set(span)
+
+    @app.after_request
+    def tag_response(response):
+        span = g.get('trace_span')
+        if span is not None:
+            if request.url_rule is not None:
+                span.name = f"{request.method} {request.url_rule.rule}"
+                span.set_attribute('http.route', request.url_rule.rule)
+            span.set_attribute('http.status_code', response.status_code)
+            response.headers['X-Trace-Id'] = span.trace.trace_id
+        return response
+
+    @app.teardown_request
+    def end_trace(exc):
+        span = g.pop('trace_span', None)
+        token = g.pop('trace_token', None)
+        if span is None:
+            return
+        if exc is not None:
+            span.error = f"{type(exc).__name__}: {exc}"
+        if token is not None:
+            _current_span.reset(token)
+        span.end()
+        span.trace.exported = True
+        _exporter.export(list(span.trace.spans))
+        _log_slow_request(span)
@@ -0,0 +1,92 @@
+"""
+HTTP-транспорт клиентов Telemost и Telegram
+
+Все сессии requests получают адаптер отсюда: обычный пул соединений или,
+в зависимости от окружения, адаптер записи/воспроизведения кассеты
+(HTTP_CASSETTE_MODE=record|replay, файл — HTTP_CASSETTE). Если задан
+FAULT_SCENARIO, поверх адаптера внедряются сбои из сценария (src/faults.py).
+"""
+
+import os
+import atexit
+import logging
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from src.cassette import Cassette, CassetteRecorder, RecordingAdapter, ReplayAdapter, read_cassette
+from src.faults import FaultInjectingAdapter, FaultInjector
+
+logger = logging.getLogger(__name__)
+
+_recorder: Optional[CassetteRecorder] = None
+_cassette: Optional[Cassette] = None
+_fault_injector: Optional[FaultInjector] = None
+_lock = threading.Lock()
+
+
+def _get_recorder() -> CassetteRecorder:
+    global _recorder
+    if _recorder is None:
+        with _lock:
+            if _recorder is None:
+                _recorder = CassetteRecorder(os.environ['HTTP_CASSETTE'])
+                atexit.register(_recorder.close)
+                logger.warning("Recording upstream HTTP traffic to %s", _recorder.path)
+    return _recorder
+
+
+def _get_cassette() -> Cassette:
+    global _cassette
+    if _cassette is None:
+        with _lock:
+            if _cassette is None:
+                paths = [p.strip() for p in os.environ['HTTP_CASSETTE'].split(',') if p.strip()]
+                _cassette = Cassette(read_cassette(*paths))
+                logger.warning("Replaying upstream HTTP traffic from %s (%s records)", paths, len(_cassette.records))
+    return _cassette
+
+
+def get_fault_injector() -> Optional[FaultInjector]:
+    """Сценарий сбоев процесса (None, если FAULT_SCENARIO не задан)"""
+    global _fault_injector
+    if _fault_injector is None and os.getenv('FAULT_SCENARIO'):
+        with _lock:
+            if _fault_injector is None:
+                _fault_injector = FaultInjector.from_file(os.environ['FAULT_SCENARIO'])
+                logger.warning("Injecting upstream faults from scenario %s (%s rules)",
+                               _fault_injector.name, len(_fault_injector.rules))
+    return _fault_injector
+
+
+def build_adapter(pool_connections: int = 10, pool_maxsize: int = 10) -> BaseAdapter:
+    """Адаптер для сессии клиента внешнего API
+
+    Args:
+        pool_connections: Сколько хостов держать в пуле
+        pool_maxsize: Соединений на хост
+    """
+    mode = os.getenv('HTTP_CASSETTE_MODE', '')
+    kwargs = {'pool_connections': pool_connections, 'pool_maxsize': pool_maxsize}
+    if mode == 'record':
+        adapter: BaseAdapter = RecordingAdapter(_get_recorder(), **kwargs)
+    elif mode == 'replay':
+        adapter = ReplayAdapter(_get_cassette(), replay_latency=os.getenv('HTTP_CASSETTE_LATENCY', '0') == '1', **kwargs)
+    else:
+        adapter = HTTPAdapter(**kwargs)
+
+    injector = get_fault_injector()
+    if injector is not None:
+        adapter = FaultInjectingAdapter(adapter, injector)
+    return adapter
+
+
+def build_session(pool_connections: int = 10, pool_maxsize: int = 10) -> requests.Session:
+    """Сессия requests с адаптером из build_adapter для http и https"""
+    session = requests.Session()
+    adapter = build_adapter(pool_connections, pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -0,0 +1,162 @@
+"""
+Проверка initData Telegram Web App
+
+Web App передает строку Telegram.WebApp.initData в заголовке
+X-Telegram-Init-Data. Подпись проверяется по алгоритму Telegram:
+secret_key = HMAC_SHA256("WebAppData", bot_token),
+hash = HMAC_SHA256(secret_key, data_check_string).
+
+Один клиент за сессию присылает одну и ту же строку, поэтому уже
+проверенные строки хранятся в небольшом LRU: повторный запрос обходится
+поиском в словаре и проверкой auth_date.
+"""
+
+import os
+import hmac
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+
+from flask import Flask, g, jsonify, request
+
+from src import memory
+
+logger = logging.getLogger(__name__)
+
+INIT_DATA_HEADER = 'X-Telegram-Init-Data'
+
+# Маршруты /api, которые вызывает не Web App (webhook Telegram, проверки мониторинга)
+# или Web App до получения initData (статус бота, ответ getMe кэшируется)
+PUBLIC_ENDPOINTS = {'webhook.telegram_webhook', 'meetings.health_check', 'meetings.bot_status'}
+
+
+class InitDataError(ValueError):
+    """initData отсутствует, подделана или устарела"""
+    pass
+
+
+class InitDataValidator:
+    """Проверка подписи и срока действия initData с кэшем проверенных строк"""
+
+    def __init__(self, bot_token: str, max_age: float = 86400, cache_size: int = 4096):
+        """
+        Args:
+            bot_token: Токен бота, из которого открыт Web App
+            max_age: Максимальный возраст auth_date (сек)
+            cache_size: Сколько проверенных строк хранить
+        """
+        self.max_age = max_age
+        self.cache_size = cache_size
+        self._secret_key = hmac.new(b'WebAppData', bot_token.encode(), hashlib.sha256).digest()
+        # Ключ — строка initData целиком: с одним hash, но другими полями запрос должен пройти проверку заново
+        self._verified: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        memory.track('initdata_cache', self)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Число проверенных строк в кэше и оценка памяти"""
+        with self._lock:
+            entries = list(self._verified.items())
+        return {'items': len(entries), 'bytes': memory.deep_sizeof(entries)}
+
+    def validate(self, init_data: str) -> Dict[str, Any]:
+        """Проверить initData
+
+        Args:
+            init_data: Строка Telegram.WebApp.initData
+
+        Returns:
+            Поля initData (user — словарь пользователя)
+
+        Raises:
+            InitDataError: Подпись неверна, нет обязательных полей или истек срок
+        """
+        if not init_data:
+            raise InitDataError("initData is missing")
+
+        with self._lock:
+            data = self._verified.get(init_data)
+            if data is not None:
+                self._verified.move_to_end(init_data)
+
+        if data is None:
+            data = self._verify_signature(init_data)
+            with self._lock:
+                self._verified[init_data] = data
+                if len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+
+        if time.time() - data['auth_date'] > self.max_age:
+            raise InitDataError("initData has expired")
+        return data
+
+    def _verify_signature(self, init_data: str) -> Dict[str, Any]:
+        fields = dict(parse_qsl(init_data, keep_blank_values=True))
+        received_hash = fields.pop('hash', '')
+        data_check_string = '\n'.join(f"{key}={fields[key]}" for key in sorted(fields))
+        expected_hash = hmac.new(self._secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+
+        if not hmac.compare_digest(received_hash, expected_hash):
+            raise InitDataError("initData signature is invalid")
+
+        try:
+            data: Dict[str, Any] = dict(fields)
+            data['auth_date'] = int(fields['auth_date'])
+            if 'user' in fields:
+                data['user'] = json.loads(fields['user'])
+        except (KeyError, ValueError) as e:
+            raise InitDataError(f"initData is malformed: {e}")
+        return data
+
+
+def init_app(app: Flask, bot_token: Optional[str] = None) -> None:
+    """Требовать проверенный initData на всех маршрутах /api
+
+    Пользователь Telegram из initData сохраняется в g.telegram_user.
+    Проверка отключается только явным WEBAPP_AUTH=0 (локальная разработка
+    в браузере).
+
+    Args:
+        app: Приложение Flask
+        bot_token: Токен бота (по умолчанию TELEGRAM_BOT_TOKEN)
+
+    Raises:
+        RuntimeError: Проверка включена, но токен бота не задан
+    """
+    bot_token = bot_token or os.getenv('TELEGRAM_BOT_TOKEN')
+    if os.getenv('WEBAPP_AUTH', '1') == '0':
+        logger.warning("Web App initData validation is disabled (WEBAPP_AUTH=0)")
+        return
+    if not bot_token:
+        # Без токена API было бы открыто всем: не запускаемся, пока это не разрешено явно
+        raise RuntimeError("TELEGRAM_BOT_TOKEN is required to validate Web App initData; "
+                           "set WEBAPP_AUTH=0 to run without validation")
+
+    validator = InitDataValidator(
+        bot_token,
+        max_age=float(os.getenv('WEBAPP_AUTH_MAX_AGE', 86400)),
+        cache_size=int(os.getenv('WEBAPP_AUTH_CACHE_SIZE', 4096))
+    )
+    app.extensions['webapp_auth'] = validator
+
+    @app.before_request
+    def require_init_data():
+        if not request.path.startswith('/api/') or request.endpoint in PUBLIC_ENDPOINTS:
+            return None
+        if request.method == 'OPTIONS':
+            # Preflight CORS не содержит заголовков авторизации
+            return None
+
+        try:
+            data = validator.validate(request.headers.get(INIT_DATA_HEADER, ''))
+        except InitDataError as e:
+            logger.warning("Rejected Web App request to %s from %s: %s", request.path, request.remote_addr, e)
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        g.telegram_user = data.get('user')
+        return None
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Отдельная база SQLite на тест"""
+    return str(tmp_path / 'bot.db')
@@ -0,0 +1,129 @@
+"""
+Кассеты HTTP-обмена: удаление секретов при записи и подбор ответа при воспроизведении
+"""
+
+import json
+
+import pytest
+import requests
+
+from src.cassette import (
+    Cassette,
+    CassetteRecorder,
+    ReplayAdapter,
+    _redact_query,
+    read_cassette,
+    redact_body,
+    redact_path,
+)
+
+BOT_TOKEN = '123456:AAH-secret_Part'
+
+
+def test_bot_token_is_removed_from_path():
+    assert redact_path(f'/bot{BOT_TOKEN}/sendMessage') == '/bot123456:REDACTED/sendMessage'
+    assert redact_path('/v2/telemost-api/conferences') == '/v2/telemost-api/conferences'
+
+
+def test_secret_query_values_are_removed():
+    assert _redact_query('access_token=abc&limit=10&API_KEY=k') == 'access_token=REDACTED&limit=10&API_KEY=REDACTED'
+    assert _redact_query('') == ''
+
+
+def test_form_secret_token_is_removed():
+    body = 'url=https%3A%2F%2Fexample.com%2Fhook&secret_token=s3cr3t&max_connections=40'
+
+    redacted = redact_body(body, 'application/x-www-form-urlencoded')
+
+    assert 's3cr3t' not in redacted
+    assert redacted == 'url=https%3A%2F%2Fexample.com%2Fhook&secret_token=REDACTED&max_connections=40'
+
+
+def test_nested_json_token_keys_are_removed():
+    body = json.dumps({
+        'chat_id': 42,
+        'auth': {'refresh_token': 'r-1', 'Authorization': 'OAuth t-1', 'scope': 'telemost'},
+        'items': [{'botToken': 'b-1', 'text': 'Привет'}],
+    }, ensure_ascii=False)
+
+    redacted = json.loads(redact_body(body, 'application/json'))
+
+    assert redacted == {
+        'chat_id': 42,
+        'auth': {'refresh_token': 'REDACTED', 'Authorization': 'REDACTED', 'scope': 'telemost'},
+        'items': [{'botToken': 'REDACTED', 'text': 'Привет'}],
+    }
+
+
+@pytest.mark.parametrize('body', [None, '', 'not json'])
+def test_other_bodies_are_kept(body):
+    assert redact_body(body, 'text/plain') == body
+
+
+def test_recorded_request_has_no_secrets(tmp_path):
+    path = str(tmp_path / 'cassette.jsonl.gz')
+    request = requests.Request(
+        'POST', f'https://api.telegram.org/bot{BOT_TOKEN}/setWebhook?token=q-1',
+        data={'url': 'https://example.com/hook', 'secret_token': 'w-1'},
+        headers={'Authorization': 'OAuth h-1'}
+    ).prepare()
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = b'{"ok": true, "result": true}'
+
+    recorder = CassetteRecorder(path)
+    recorder.record(request, response, started=1.0, elapsed=0.05)
+    recorder.close()
+
+    [record] = read_cassette(path)
+    assert record['path'] == '/bot123456:REDACTED/setWebhook'
+    assert record['query'] == 'token=REDACTED'
+    assert 'w-1' not in record['request']
+    for secret in ('AAH-secret_Part', 'q-1', 'w-1', 'h-1'):
+        assert secret not in json.dumps(record)
+
+
+def record(path, body, method='GET', query=''):
+    return {'ts': 0, 'method': method, 'path': path, 'query': query, 'status': 200, 'headers': {}, 'body': body,
+            'elapsed': 0.0}
+
+
+CONFERENCE = '/v2/telemost-api/conferences/{}'
+
+
+def test_exact_match_is_preferred():
+    cassette = Cassette([record(CONFERENCE.format('aaa'), 'aaa'), record(CONFERENCE.format('bbb'), 'bbb')])
+
+    assert cassette.match('GET', CONFERENCE.format('bbb'))['body'] == 'bbb'
+    assert cassette.match('GET', CONFERENCE.format('aaa'))['body'] == 'aaa'
+
+
+def test_match_falls_back_to_path_template():
+    cassette = Cassette([record(CONFERENCE.format('aaa'), 'aaa'), record(CONFERENCE.format('bbb'), 'bbb')])
+
+    assert [cassette.match('GET', CONFERENCE.format('zzz'))['body'] for _ in range(3)] == ['aaa', 'bbb', 'aaa']
+    assert cassette.match('PATCH', CONFERENCE.format('zzz')) is None
+    assert cassette.match('GET', '/v2/telemost-api/other') is None
+
+
+def test_match_uses_redacted_token_and_query():
+    cassette = Cassette([record('/bot123456:REDACTED/getMe', 'me', query='token=REDACTED')])
+
+    assert cassette.match('GET', f'/bot{BOT_TOKEN}/getMe', 'token=other')['body'] == 'me'
+
+
+def test_cassette_without_loop_runs_out():
+    cassette = Cassette([record(CONFERENCE.format('aaa'), 'aaa')], loop=False)
+
+    assert cassette.match('GET', CONFERENCE.format('aaa'))['body'] == 'aaa'
+    assert cassette.match('GET', CONFERENCE.format('aaa')) is None
+
+
+def test_replay_adapter_answers_without_network():
+    session = requests.Session()
+    session.mount('https://', ReplayAdapter(Cassette([record(CONFERENCE.format('aaa'), '{"id": "aaa"}')])))
+
+    assert session.get('https://cloud-api.yandex.net' + CONFERENCE.format('ccc')).json() == {'id': 'aaa'}
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get('https://cloud-api.yandex.net/v2/telemost-api/unknown')
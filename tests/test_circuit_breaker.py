@@ -0,0 +1,119 @@
+"""
+Circuit breaker и выбор токена Telemost в пуле
+"""
+
+import pytest
+
+from src import circuit_breaker
+from src.circuit_breaker import CircuitBreaker
+from src.telemost_pool import TelemostClientPool
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', clock)
+    return clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+
+    clock.now += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    open_breaker(breaker)
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+@pytest.fixture
+def pool():
+    return TelemostClientPool({'default': ['token-a', 'token-b', 'token-c'], 'acme': ['token-d']})
+
+
+def test_pool_skips_open_tokens(pool, clock):
+    broken = pool.client()
+    open_breaker(broken.circuit_breaker)
+
+    chosen = {pool.client().oauth_token for _ in range(30)}
+
+    assert broken.oauth_token not in chosen
+    assert chosen == {'token-a', 'token-b', 'token-c'} - {broken.oauth_token}
+    assert pool.summary() == {'tenants': 2, 'tokens': 4, 'open_circuits': 1}
+
+
+def test_pool_uses_half_open_token_again(pool, clock):
+    broken = pool.client()
+    open_breaker(broken.circuit_breaker)
+
+    clock.now += broken.circuit_breaker.reset_timeout
+
+    assert broken.oauth_token in {pool.client().oauth_token for _ in range(30)}
+
+
+def test_pool_falls_back_when_all_tokens_open(pool, clock):
+    for _ in range(3):
+        open_breaker(pool.client().circuit_breaker)
+
+    # Все токены организации разомкнуты — запрос все равно получает клиент
+    assert pool.summary()['open_circuits'] == 3
+    assert pool.client().oauth_token in {'token-a', 'token-b', 'token-c'}
+    assert pool.client('acme').oauth_token == 'token-d'
@@ -0,0 +1,168 @@
+"""
+Сценарии сбоев: выбор правила, вероятность срабатывания, ответы адаптера
+"""
+
+import json
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from src import faults
+from src.cassette import build_response
+from src.faults import FaultInjectingAdapter, FaultInjector, FaultRule
+
+CONFERENCES = '/v2/telemost-api/conferences'
+SEND_MESSAGE = '/bot123:REDACTED/sendMessage'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(faults.time, 'monotonic', clock)
+    return clock
+
+
+def test_unknown_fault_type_is_rejected():
+    with pytest.raises(ValueError, match='Unknown fault type'):
+        FaultRule({'type': 'explode'})
+
+
+def test_rule_matches_service_method_and_path():
+    rule = FaultRule({'service': 'telemost', 'method': 'post', 'path': '*/conferences', 'type': 'status'})
+
+    assert rule.matches('telemost', 'POST', CONFERENCES, 0)
+    assert not rule.matches('telemost', 'GET', CONFERENCES, 0)
+    assert not rule.matches('telegram', 'POST', CONFERENCES, 0)
+    assert not rule.matches('telemost', 'POST', CONFERENCES + '/abc', 0)
+
+
+def test_rule_without_filters_matches_everything():
+    rule = FaultRule({'type': 'reset'})
+
+    assert rule.matches('telegram', 'POST', SEND_MESSAGE, 0)
+    assert rule.matches('telemost', 'DELETE', CONFERENCES + '/abc', 1e6)
+
+
+def test_rule_time_window():
+    rule = FaultRule({'type': 'latency', 'start': 10, 'end': 40})
+
+    assert [rule.matches('telemost', 'GET', CONFERENCES, t) for t in (9.9, 10, 39.9, 40)] == [False, True, True, False]
+
+
+def test_probability_is_respected_with_seed():
+    injector = FaultInjector([FaultRule({'type': 'status', 'probability': 0.2})], seed=1)
+
+    hits = sum(injector.choose('telemost', 'GET', CONFERENCES) is not None for _ in range(10000))
+
+    assert 1800 < hits < 2200
+    assert injector.stats() == {'telemost status': hits}
+
+
+def test_same_seed_gives_same_faults():
+    def run(seed):
+        injector = FaultInjector([FaultRule({'type': 'reset', 'probability': 0.3})], seed=seed)
+        return [injector.choose('telegram', 'POST', SEND_MESSAGE) is not None for _ in range(200)]
+
+    assert run(7) == run(7)
+    assert run(7) != run(8)
+
+
+def test_first_matching_rule_wins():
+    rules = [
+        FaultRule({'service': 'telegram', 'type': 'rate_limit'}),
+        FaultRule({'type': 'status', 'status': 500}),
+    ]
+    injector = FaultInjector(rules, seed=1)
+
+    assert injector.choose('telegram', 'POST', SEND_MESSAGE) is rules[0]
+    assert injector.choose('telemost', 'GET', CONFERENCES) is rules[1]
+
+
+def test_rule_window_counts_from_start(clock):
+    injector = FaultInjector([FaultRule({'type': 'status', 'start': 10, 'end': 20})], seed=1)
+
+    assert injector.choose('telemost', 'GET', CONFERENCES) is None
+    clock.now += 15
+    assert injector.choose('telemost', 'GET', CONFERENCES) is not None
+    clock.now += 10
+    assert injector.choose('telemost', 'GET', CONFERENCES) is None
+
+    injector.reset()
+    clock.now += 10
+    assert injector.choose('telemost', 'GET', CONFERENCES) is not None
+    assert injector.stats() == {'telemost status': 1}
+
+
+def test_disabled_injector_does_nothing():
+    injector = FaultInjector([FaultRule({'type': 'reset'})])
+    injector.enabled = False
+
+    assert injector.choose('telemost', 'GET', CONFERENCES) is None
+
+
+class RecordedAdapter(BaseAdapter):
+    """Адаптер «настоящего» API: всегда 200"""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        return build_response(request, {'status': 200, 'headers': {}, 'body': '{"ok": true, "result": {"id": 1}}'})
+
+    def close(self):
+        pass
+
+
+def make_session(spec):
+    upstream = RecordedAdapter()
+    session = requests.Session()
+    session.mount('https://', FaultInjectingAdapter(upstream, FaultInjector([FaultRule(spec)], seed=1)))
+    return session, upstream
+
+
+def test_status_fault_does_not_reach_api():
+    session, upstream = make_session({'service': 'telemost', 'type': 'status', 'status': 502})
+
+    response = session.get('https://cloud-api.yandex.net' + CONFERENCES)
+
+    assert response.status_code == 502
+    assert response.json()['error'] == 'InjectedFault'
+    assert upstream.sent == 0
+
+
+def test_telegram_rate_limit_fault():
+    session, upstream = make_session({'service': 'telegram', 'type': 'rate_limit', 'retry_after': 3})
+
+    response = session.post('https://api.telegram.org' + SEND_MESSAGE, json={'chat_id': 1})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '3'
+    assert response.json()['parameters'] == {'retry_after': 3}
+
+
+def test_reset_fault_raises_connection_error():
+    session, _ = make_session({'type': 'reset'})
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get('https://cloud-api.yandex.net' + CONFERENCES)
+
+
+def test_malformed_json_fault_truncates_real_response():
+    session, upstream = make_session({'type': 'malformed_json'})
+
+    response = session.get('https://cloud-api.yandex.net' + CONFERENCES)
+
+    assert upstream.sent == 1
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(response.content)
@@ -0,0 +1,168 @@
+"""
+Ограничение частоты запросов: скользящее окно, хранилища счетчиков, ответ 429
+"""
+
+import pytest
+from flask import Flask, g, jsonify, request
+
+from src import rate_limit
+from src.rate_limit import MemoryWindowStore, SlidingWindowLimiter
+from src.routes import meetings
+from src.storage import RateLimitStore
+
+WINDOW = 60
+START = 1_700_000_040.0  # Начало окна: делится на WINDOW
+
+
+class Clock:
+    def __init__(self):
+        self.now = START
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, db_path):
+    if request.param == 'memory':
+        store = MemoryWindowStore()
+        return lambda: store
+    return lambda: RateLimitStore(db_path)
+
+
+def test_limit_within_window(clock, make_store):
+    limiter = SlidingWindowLimiter(3, WINDOW, make_store())
+
+    assert [limiter.hit('a') for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit('a') > 0
+    assert limiter.hit('b') == 0
+
+
+def test_previous_window_is_weighted_at_boundary(clock, make_store):
+    limiter = SlidingWindowLimiter(4, WINDOW, make_store())
+    clock.now += WINDOW - 1
+    for _ in range(4):
+        assert limiter.hit('a') == 0
+
+    # Новое окно только началось: прошлые запросы еще учитываются почти полностью
+    clock.now = START + WINDOW
+    assert limiter.hit('a') > 0
+
+
+def test_previous_window_weight_decreases(clock, make_store):
+    store = make_store()
+    for _ in range(4):
+        assert SlidingWindowLimiter(4, WINDOW, store).hit('a') == 0
+
+    # Середина следующего окна: 4 * 0.5 + текущие
+    clock.now = START + WINDOW * 1.5
+    limiter = SlidingWindowLimiter(4, WINDOW, store)
+    assert [limiter.hit('a') for _ in range(2)] == [0, 0]
+    assert limiter.hit('a') > 0
+
+
+def test_retry_after_is_accurate(clock, make_store):
+    limiter = SlidingWindowLimiter(2, WINDOW, make_store())
+    limiter.hit('a')
+    limiter.hit('a')
+
+    retry_after = limiter.hit('a')
+    assert 1 <= retry_after <= 2 * WINDOW
+
+    clock.now += retry_after - 1
+    assert SlidingWindowLimiter(2, WINDOW, limiter.store).hit('a') > 0
+    clock.now += 1
+    assert limiter.hit('a') == 0
+
+
+def test_rejected_requests_do_not_consume_limit(clock, make_store):
+    store = make_store()
+    limiter = SlidingWindowLimiter(2, WINDOW, store)
+    for _ in range(10):
+        limiter.hit('a')
+
+    # В окне остались только 2 разрешенных запроса
+    assert store.hit('default:a', int(START), WINDOW, lambda previous, current: True)[2] == 3
+
+
+def test_sqlite_store_is_shared_between_processes(clock, db_path):
+    # Два воркера — два ограничителя и два соединения с одной базой
+    first = SlidingWindowLimiter(3, WINDOW, RateLimitStore(db_path))
+    second = SlidingWindowLimiter(3, WINDOW, RateLimitStore(db_path))
+
+    assert [first.hit('a'), second.hit('a'), first.hit('a')] == [0, 0, 0]
+    assert second.hit('a') > 0
+
+
+def make_app(monkeypatch, user_limit=2, ip_limit=3):
+    monkeypatch.setattr(meetings, '_limiters', [
+        SlidingWindowLimiter(user_limit, WINDOW, name='user'),
+        SlidingWindowLimiter(ip_limit, WINDOW, name='ip'),
+    ])
+    app = Flask(__name__)
+
+    @app.before_request
+    def authenticate():
+        if 'X-User' in request.headers:
+            g.telegram_user = {'id': int(request.headers['X-User'])}
+
+    @app.route('/api/meetings', methods=['POST'])
+    @meetings.rate_limited
+    def create_meeting():
+        return jsonify({'ok': True}), 201
+
+    return app.test_client()
+
+
+def post(client, user=None, ip='10.0.0.1'):
+    headers = {'X-User': str(user)} if user is not None else {}
+    return client.post('/api/meetings', headers=headers, environ_base={'REMOTE_ADDR': ip})
+
+
+def test_user_limit_applies_across_ips(monkeypatch, clock):
+    client = make_app(monkeypatch)
+
+    assert post(client, user=1, ip='10.0.0.1').status_code == 201
+    assert post(client, user=1, ip='10.0.0.2').status_code == 201
+    assert post(client, user=1, ip='10.0.0.3').status_code == 429
+    assert post(client, user=2, ip='10.0.0.3').status_code == 201
+
+
+def test_ip_limit_applies_across_users(monkeypatch, clock):
+    client = make_app(monkeypatch)
+
+    assert [post(client, user=user).status_code for user in (1, 2, 3, 4)] == [201, 201, 201, 429]
+    assert post(client, user=5, ip='10.0.0.2').status_code == 201
+
+
+def test_anonymous_requests_are_limited_by_ip(monkeypatch, clock):
+    client = make_app(monkeypatch, user_limit=1)
+
+    assert [post(client).status_code for _ in range(4)] == [201, 201, 201, 429]
+
+
+def test_disabled_limit_is_skipped(monkeypatch, clock):
+    client = make_app(monkeypatch, user_limit=0, ip_limit=0)
+
+    assert all(post(client, user=1).status_code == 201 for _ in range(20))
+
+
+def test_too_many_requests_response(monkeypatch, clock):
+    client = make_app(monkeypatch, user_limit=1)
+    post(client, user=1)
+
+    response = post(client, user=1)
+    assert response.status_code == 429
+    retry_after = int(response.headers['Retry-After'])
+    assert 1 <= retry_after <= 2 * WINDOW
+    assert response.get_json() == {'error': 'Too many requests', 'retry_after': retry_after}
+
+    clock.now += retry_after
+    assert post(client, user=1).status_code == 201
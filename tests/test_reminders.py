@@ -0,0 +1,104 @@
+"""
+Напоминания: защита от повторной отправки и восстановление после перезапуска
+"""
+
+import time
+import threading
+
+from src.reminders import ReminderScheduler
+from src.storage import ReminderStore
+
+MEETING = {'id': 'conf-1', 'title': 'Планерка', 'join_url': 'https://telemost.yandex.ru/j/1'}
+
+
+class FakeBot:
+    """Клиент Telegram, который только запоминает отправленные сообщения"""
+
+    bot_tokens = ['1:token']
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id, text, bot_token=None):
+        time.sleep(self.delay)
+        with self._lock:
+            self.sent.append((chat_id, text))
+
+
+def add_reminder(store, fire_in: float = 60, chat_id: int = 100):
+    now = time.time()
+    return store.add_many([{
+        'meeting_id': MEETING['id'], 'chat_id': chat_id, 'fire_at': now + fire_in,
+        'meeting_start': now + fire_in + 900, 'text': 'Напоминание',
+    }])[0]
+
+
+def test_claim_is_exclusive(db_path):
+    store = ReminderStore(db_path)
+    reminder = add_reminder(store)
+
+    assert store.claim(reminder['id'])
+    assert not ReminderStore(db_path).claim(reminder['id'])
+
+
+def test_two_schedulers_send_once(db_path):
+    bot = FakeBot(delay=0.05)
+    reminder = add_reminder(ReminderStore(db_path), fire_in=-1)
+    schedulers = [ReminderScheduler(bot, ReminderStore(db_path)) for _ in range(2)]
+
+    barrier = threading.Barrier(len(schedulers))
+
+    def fire(scheduler):
+        barrier.wait()
+        scheduler._fire(dict(reminder))
+
+    threads = [threading.Thread(target=fire, args=(scheduler,)) for scheduler in schedulers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert bot.sent == [(100, 'Напоминание')]
+    assert ReminderStore(db_path).pending() == []
+
+
+def test_heap_is_reloaded_after_restart(db_path):
+    scheduled = ReminderScheduler(FakeBot(), ReminderStore(db_path), horizon=600)
+    count = scheduled.schedule(MEETING, [100, 200], time.time() + 1200, remind_before=[15])
+    assert count == 2
+
+    # Новый процесс: куча пуста, пока не прочитана база
+    restarted = ReminderScheduler(FakeBot(), ReminderStore(db_path), horizon=600)
+    assert restarted.pending_count() == 0
+    restarted._sync()
+
+    assert restarted.pending_count() == 2
+    scheduled.stop()
+
+
+def test_reminders_beyond_horizon_stay_in_database(db_path):
+    store = ReminderStore(db_path)
+    add_reminder(store, fire_in=3600)
+    scheduler = ReminderScheduler(FakeBot(), store, horizon=600)
+
+    scheduler._sync()
+
+    assert scheduler.pending_count() == 0
+    assert len(store.pending()) == 1
+
+
+def test_stuck_reminder_is_sent_after_restart(db_path):
+    store = ReminderStore(db_path)
+    reminder = add_reminder(store, fire_in=-700)
+    # Процесс забрал напоминание и упал до отправки
+    assert store.claim(reminder['id'])
+
+    bot = FakeBot()
+    scheduler = ReminderScheduler(bot, ReminderStore(db_path), horizon=600)
+    scheduler._sync()
+    assert scheduler.pending_count() == 1
+
+    scheduler._fire(dict(reminder))
+    assert len(bot.sent) == 1
@@ -0,0 +1,137 @@
+"""
+Распределение получателей между ботами пула
+"""
+
+import json
+import threading
+
+import pytest
+
+from src.sharding import ConsistentHashRing
+from src.storage import SentMessageStore
+from src.telegram_bot import TelegramBot
+
+NODES = ['node-a', 'node-b', 'node-c', 'node-d']
+KEYS = range(10000)
+BOT_TOKENS = ['111:AAA', '222:BBB', '333:CCC']
+
+
+def moved(before, after):
+    return sum(1 for key in KEYS if before.get(key) != after.get(key))
+
+
+def test_key_always_maps_to_same_node():
+    ring = ConsistentHashRing(NODES)
+
+    assert all(ring.get(key) == ConsistentHashRing(NODES).get(key) for key in range(100))
+    assert {ring.get(key) for key in KEYS} == set(NODES)
+
+
+def test_adding_node_moves_few_keys():
+    before = ConsistentHashRing(NODES)
+    after = ConsistentHashRing(NODES + ['node-e'])
+
+    changes = moved(before, after)
+    # Идеал — 1/5 ключей, и все они уходят на новый узел
+    assert changes < len(KEYS) * 0.3
+    assert all(after.get(key) == 'node-e' for key in KEYS if before.get(key) != after.get(key))
+
+
+def test_removing_node_moves_only_its_keys():
+    before = ConsistentHashRing(NODES)
+    after = ConsistentHashRing(NODES[:-1])
+
+    for key in KEYS:
+        if before.get(key) != 'node-d':
+            assert after.get(key) == before.get(key)
+    assert moved(before, after) < len(KEYS) * 0.35
+
+
+def test_empty_ring_is_rejected():
+    with pytest.raises(ValueError):
+        ConsistentHashRing([])
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, result):
+        self.content = json.dumps({'ok': True, 'result': result}).encode()
+        self.text = self.content.decode()
+
+
+class FakeSession:
+    """HTTP-сессия, которая запоминает, какой бот вызывал какой метод"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+        self._message_id = 0
+
+    def post(self, url, json=None, timeout=None):
+        token, method = url.rsplit('/', 2)[-2:]
+        with self._lock:
+            self.calls.append((token[len('bot'):], method, json))
+            self._message_id += 1
+            message_id = self._message_id
+        return FakeResponse({'message_id': message_id, 'chat': {'id': json['chat_id']}})
+
+
+@pytest.fixture
+def bot(db_path):
+    return TelegramBot(
+        bot_token=BOT_TOKENS[0],
+        bot_tokens=BOT_TOKENS[1:],
+        rate_limit=1000,
+        message_store=SentMessageStore(db_path),
+        session=FakeSession()
+    )
+
+
+def test_chat_always_maps_to_same_bot(bot):
+    other = TelegramBot(bot_token=BOT_TOKENS[0], bot_tokens=BOT_TOKENS[1:], session=FakeSession())
+
+    assert all(bot.token_for_chat(chat_id) == other.token_for_chat(chat_id) for chat_id in range(500))
+    assert {bot.token_for_chat(chat_id) for chat_id in range(500)} == set(BOT_TOKENS)
+
+
+def test_single_bot_serves_every_chat():
+    bot = TelegramBot(bot_token=BOT_TOKENS[0], bot_tokens=[], session=FakeSession())
+
+    assert {bot.token_for_chat(chat_id) for chat_id in range(100)} == {BOT_TOKENS[0]}
+
+
+def test_invitations_are_edited_by_sending_bot(bot):
+    meeting = {'id': 'conf-1', 'title': 'Планерка', 'join_url': 'https://telemost.yandex.ru/j/1'}
+    contacts = [{'id': chat_id} for chat_id in range(1, 31)]
+
+    result = bot.send_bulk_invitations(contacts, meeting)
+    assert result['sent_count'] == len(contacts)
+    assert len(result['per_bot']) == len(BOT_TOKENS)
+
+    sent_by = {call[2]['chat_id']: call[0] for call in bot.session.calls if call[1] == 'sendMessage'}
+    assert all(sent_by[chat_id] == bot.token_for_chat(chat_id) for chat_id in sent_by)
+
+    bot.session.calls.clear()
+    result = bot.edit_bulk_invitations({**meeting, 'title': 'Ретро'})
+    assert result['edited_count'] == len(contacts)
+
+    edited_by = {int(call[2]['chat_id']): call[0] for call in bot.session.calls if call[1] == 'editMessageText'}
+    assert edited_by == sent_by
+
+
+def test_invitation_from_removed_bot_is_not_edited(bot, db_path):
+    meeting = {'id': 'conf-1', 'title': 'Планерка', 'join_url': 'https://telemost.yandex.ru/j/1'}
+    chat_id = next(c for c in range(100) if bot.token_for_chat(c) == BOT_TOKENS[2])
+    bot.send_bulk_invitations([{'id': chat_id}], meeting)
+
+    smaller = TelegramBot(
+        bot_token=BOT_TOKENS[0],
+        bot_tokens=BOT_TOKENS[1:2],
+        message_store=SentMessageStore(db_path),
+        session=FakeSession()
+    )
+    result = smaller.edit_bulk_invitations({**meeting, 'title': 'Ретро'})
+
+    assert result['failed_count'] == 1
+    assert smaller.session.calls == []
@@ -0,0 +1,157 @@
+"""
+Проверка initData Telegram Web App: подпись, срок действия, обязательные поля
+"""
+
+import hmac
+import json
+import time
+import hashlib
+from urllib.parse import urlencode
+
+import pytest
+from flask import Flask, g, jsonify
+
+from src import webapp_auth
+from src.webapp_auth import INIT_DATA_HEADER, InitDataError, InitDataValidator
+
+BOT_TOKEN = '123456:TEST-TOKEN'
+USER = {'id': 42, 'first_name': 'Ivan'}
+
+
+def sign(fields, bot_token=BOT_TOKEN):
+    """Строка initData, подписанная так же, как ее подписывает Telegram"""
+    data_check_string = '\n'.join(f"{key}={fields[key]}" for key in sorted(fields))
+    secret_key = hmac.new(b'WebAppData', bot_token.encode(), hashlib.sha256).digest()
+    signature = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode({**fields, 'hash': signature})
+
+
+def make_fields(auth_date=None, **extra):
+    fields = {
+        'auth_date': str(int(auth_date if auth_date is not None else time.time())),
+        'query_id': 'AAF1',
+        'user': json.dumps(USER),
+    }
+    fields.update(extra)
+    return fields
+
+
+@pytest.fixture
+def validator():
+    return InitDataValidator(BOT_TOKEN, max_age=3600)
+
+
+def test_valid_init_data(validator):
+    data = validator.validate(sign(make_fields()))
+
+    assert data['user'] == USER
+    assert data['query_id'] == 'AAF1'
+    assert isinstance(data['auth_date'], int)
+
+
+def test_valid_init_data_is_cached(validator):
+    init_data = sign(make_fields())
+    validator.validate(init_data)
+
+    assert validator.validate(init_data)['user'] == USER
+    assert validator.memory_usage()['items'] == 1
+
+
+def test_tampered_field_is_rejected(validator):
+    init_data = sign(make_fields())
+    tampered = init_data.replace('%22id%22%3A+42', '%22id%22%3A+43')
+    assert tampered != init_data
+
+    with pytest.raises(InitDataError, match='signature'):
+        validator.validate(tampered)
+
+
+def test_added_field_is_rejected(validator):
+    init_data = sign(make_fields()) + '&chat_type=private'
+
+    with pytest.raises(InitDataError, match='signature'):
+        validator.validate(init_data)
+
+
+def test_other_bot_token_is_rejected(validator):
+    with pytest.raises(InitDataError, match='signature'):
+        validator.validate(sign(make_fields(), bot_token='654321:OTHER-TOKEN'))
+
+
+def test_expired_init_data_is_rejected(validator):
+    init_data = sign(make_fields(auth_date=time.time() - 7200))
+
+    with pytest.raises(InitDataError, match='expired'):
+        validator.validate(init_data)
+
+
+def test_cached_init_data_expires(validator, monkeypatch):
+    init_data = sign(make_fields())
+    validator.validate(init_data)
+
+    later = time.time() + 7200
+    monkeypatch.setattr(webapp_auth.time, 'time', lambda: later)
+    with pytest.raises(InitDataError, match='expired'):
+        validator.validate(init_data)
+
+
+@pytest.mark.parametrize('init_data', ['', None])
+def test_missing_init_data_is_rejected(validator, init_data):
+    with pytest.raises(InitDataError, match='missing'):
+        validator.validate(init_data)
+
+
+def test_missing_hash_is_rejected(validator):
+    with pytest.raises(InitDataError, match='signature'):
+        validator.validate(urlencode(make_fields()))
+
+
+def test_missing_auth_date_is_rejected(validator):
+    fields = make_fields()
+    del fields['auth_date']
+
+    with pytest.raises(InitDataError, match='malformed'):
+        validator.validate(sign(fields))
+
+
+def test_malformed_user_is_rejected(validator):
+    with pytest.raises(InitDataError, match='malformed'):
+        validator.validate(sign(make_fields(user='{not json')))
+
+
+def make_app(monkeypatch, bot_token=BOT_TOKEN, **env):
+    monkeypatch.delenv('TELEGRAM_BOT_TOKEN', raising=False)
+    monkeypatch.delenv('WEBAPP_AUTH', raising=False)
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+
+    app = Flask(__name__)
+
+    @app.route('/api/meetings')
+    def meetings():
+        return jsonify({'user': g.get('telegram_user')})
+
+    webapp_auth.init_app(app, bot_token)
+    return app
+
+
+def test_api_requires_valid_init_data(monkeypatch):
+    client = make_app(monkeypatch).test_client()
+
+    assert client.get('/api/meetings').status_code == 401
+    assert client.get('/api/meetings', headers={INIT_DATA_HEADER: 'hash=0'}).status_code == 401
+
+    response = client.get('/api/meetings', headers={INIT_DATA_HEADER: sign(make_fields())})
+    assert response.status_code == 200
+    assert response.get_json() == {'user': USER}
+
+
+def test_missing_bot_token_refuses_to_start(monkeypatch):
+    with pytest.raises(RuntimeError, match='WEBAPP_AUTH=0'):
+        make_app(monkeypatch, bot_token=None)
+
+
+def test_validation_disabled_explicitly(monkeypatch):
+    client = make_app(monkeypatch, bot_token=None, WEBAPP_AUTH='0').test_client()
+
+    assert client.get('/api/meetings').status_code == 200